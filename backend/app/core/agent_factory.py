@@ -1,9 +1,17 @@
+import os
+from dataclasses import replace
+from enum import StrEnum
+
 from dotenv import load_dotenv
-from pydantic_ai import Agent, PromptedOutput
+from pydantic_ai import Agent, NativeOutput, PromptedOutput, TextOutput
+from pydantic_ai.models import Model
+from pydantic_ai.models.openai import OpenAIChatModel
+from pydantic_ai.providers.ollama import OllamaProvider
 
 from app.schemas.rag_response import RagResponse
 
 from .model_router import get_model_for_query
+from .output_repair import SCHEMA_INSTRUCTIONS, parse_rag_output
 
 load_dotenv()
 
@@ -11,13 +19,53 @@ load_dotenv()
 DEFAULT_MODEL = "ollama:qwen2.5:3b"
 
 
-def get_rag_agent(user_query: str = None, model_name: str = None) -> Agent:
+class OutputMode(StrEnum):
+    """How the agent obtains a ``RagResponse`` from the model."""
+
+    # Schema described in the prompt; invalid JSON triggers a validation retry (extra generation)
+    PROMPTED = "prompted"
+    # Schema sent as Ollama structured output (``format``); decoding cannot produce non-conforming JSON
+    NATIVE = "native"
+
+
+DEFAULT_OUTPUT_MODE = OutputMode(os.getenv("RAG_OUTPUT_MODE", OutputMode.PROMPTED))
+# In PROMPTED mode, try the canonical normalizers on invalid output before spending a retry
+DEFAULT_OUTPUT_REPAIR = os.getenv("RAG_OUTPUT_REPAIR", "true").lower() in ("1", "true", "yes")
+# Validation retries per run: a model gets up to AGENT_RETRIES + 1 generations before the fallback is tried
+AGENT_RETRIES = 2
+
+
+def _build_model(model_name: str, output_mode: OutputMode) -> Model | str:
+    """
+    Resolve the model passed to the Agent.
+
+    PydanticAI's Ollama profile does not advertise JSON-schema output, so in NATIVE mode we build the
+    model explicitly and enable it: the schema is sent as ``response_format``, which Ollama maps to its
+    ``format`` parameter (grammar-constrained decoding).
+    """
+    if output_mode is OutputMode.NATIVE and model_name.startswith("ollama:"):
+        ollama_name = model_name.removeprefix("ollama:")
+        provider = OllamaProvider()
+        profile = provider.model_profile(ollama_name)
+        if profile is not None:
+            profile = replace(profile, supports_json_schema_output=True)
+        return OpenAIChatModel(ollama_name, provider=provider, profile=profile)
+    return model_name
+
+
+def get_rag_agent(
+    user_query: str = None, model_name: str = None, output_mode: OutputMode = None, repair: bool = None
+) -> Agent:
     """
     Factory function to create a PydanticAI Agent configured for RAG tasks.
 
     Args:
         user_query (str, optional): The user's question to determine the model via routing.
         model_name (str, optional): Explicit model name to override routing.
+        output_mode (OutputMode, optional): PROMPTED or NATIVE (schema-constrained). Defaults to
+            ``RAG_OUTPUT_MODE`` from the environment, or PROMPTED.
+        repair (bool, optional): PROMPTED mode only. Repair invalid output with the canonical normalizers
+            before asking for a regeneration. Defaults to ``RAG_OUTPUT_REPAIR`` (on).
 
     Returns:
         Agent: A configured PydanticAI Agent instance with the RagResponse result type.
@@ -30,6 +78,8 @@ def get_rag_agent(user_query: str = None, model_name: str = None) -> Agent:
         else:
             model_name = DEFAULT_MODEL
 
+    output_mode = OutputMode(output_mode or DEFAULT_OUTPUT_MODE)
+
     # Define a system prompt that enforces the persona and constraints
     system_prompt = (
         "You are an expert technical assistant (PepoRAG). "
@@ -39,11 +89,23 @@ def get_rag_agent(user_query: str = None, model_name: str = None) -> Agent:
         "Analyze the context carefully before answering."
     )
 
+    if repair is None:
+        repair = DEFAULT_OUTPUT_REPAIR
+
+    if output_mode is OutputMode.NATIVE:
+        output_type = NativeOutput(RagResponse)
+    elif repair:
+        # Plain-text output parsed by our repair stage; the schema goes in the prompt as PromptedOutput would
+        output_type = TextOutput(parse_rag_output)
+        system_prompt = f"{system_prompt}\n\n{SCHEMA_INSTRUCTIONS}"
+    else:
+        output_type = PromptedOutput(RagResponse)
+
     agent = Agent(
-        model=model_name,
-        output_type=PromptedOutput(RagResponse),
+        model=_build_model(model_name, output_mode),
+        output_type=output_type,
         system_prompt=system_prompt,
-        retries=2,  # Allow 2 retries for JSON validation failures
+        retries=AGENT_RETRIES,  # Retries for JSON validation failures (after repair, if enabled)
     )
 
     return agent
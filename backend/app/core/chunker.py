@@ -0,0 +1,277 @@
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from .tokens import estimate_tokens
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+# A new heading only closes the current chunk once it holds this much, so short sections are merged
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "128"))
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})")
+_SENTENCE_END_RE = re.compile(r"[.!?:;]\s")
+
+
+@dataclass(frozen=True)
+class Block:
+    """A structural unit that is never split across chunks unless it alone exceeds the budget."""
+
+    kind: str  # heading | paragraph | code | table
+    text: str
+    headings: tuple[str, ...]
+    tokens: int
+
+
+@dataclass(frozen=True)
+class Chunk:
+    seq: int
+    text: str
+    tokens: int
+    headings: tuple[str, ...]
+    kinds: tuple[str, ...]
+
+    def metadata(self) -> dict[str, Any]:
+        """``chunks.metadata`` payload: section path and the block kinds the chunk contains."""
+        return {"headings": list(self.headings), "kinds": list(self.kinds), "tokens": self.tokens}
+
+
+def _closes_fence(line: str, fence: str) -> bool:
+    """CommonMark closing fence: a run of the opener's character at least as long, with nothing after it."""
+    marker = line.strip()
+    return len(marker) >= len(fence) and marker == fence[0] * len(marker)
+
+
+def _split_text(text: str, max_chars: int) -> Iterator[str]:
+    """Split an oversized paragraph at the last sentence end (else whitespace) before ``max_chars``."""
+    while len(text) > max_chars:
+        window = text[:max_chars]
+        cut = max((m.end() for m in _SENTENCE_END_RE.finditer(window)), default=0)
+        if cut < max_chars // 2:
+            cut = window.rfind(" ") + 1 or max_chars
+        yield text[:cut].rstrip()
+        text = text[cut:].lstrip()
+    if text:
+        yield text
+
+
+def iter_blocks(lines: Iterable[str], max_tokens: int = CHUNK_MAX_TOKENS) -> Iterator[Block]:
+    """
+    Parse Markdown-like text (as produced by the PDF/EPub loaders) into structural blocks.
+
+    Code fences and tables are kept whole; one that exceeds ``max_tokens`` is split on line
+    boundaries, re-opening the fence or repeating the table header in each part. Only the current
+    block is held in memory, so input can be a file object of any size.
+
+    Args:
+        lines (Iterable[str]): Input lines, with or without trailing newlines.
+        max_tokens (int): Upper bound for a single block.
+
+    Yields:
+        Block: Blocks in document order.
+    """
+    max_chars = max_tokens * 4
+    headings: list[tuple[int, str]] = []
+    buf: list[str] = []
+    buf_chars = 0
+    kind = "paragraph"
+    fence = ""
+    reopen: list[str] = []  # lines repeated at the start of a continuation part (fence opener, table header)
+
+    def flush(closing: str | None = None) -> Iterator[Block]:
+        nonlocal buf, buf_chars
+        if buf:
+            lines_out = buf + [closing] if closing else buf
+            text = "\n".join(lines_out)
+            path = tuple(title for _, title in headings)
+            if kind == "paragraph":
+                for part in _split_text("\n".join(buf), max_chars):
+                    yield Block("paragraph", part, path, estimate_tokens(part))
+            else:
+                yield Block(kind, text, path, estimate_tokens(text))
+        buf, buf_chars = [], 0
+
+    def add(line: str) -> None:
+        nonlocal buf_chars
+        buf.append(line)
+        buf_chars += len(line) + 1
+
+    for raw in lines:
+        line = raw.rstrip("\n").rstrip()
+
+        if kind == "code":
+            if _closes_fence(line, fence):
+                add(line)
+                yield from flush()
+                kind = "paragraph"
+                continue
+            if buf_chars + len(line) > max_chars and len(buf) > len(reopen):
+                yield from flush(closing=fence)
+                for opener in reopen:
+                    add(opener)
+            add(line)
+            continue
+
+        fence_match = _FENCE_RE.match(line)
+        heading_match = _HEADING_RE.match(line)
+        if fence_match:
+            yield from flush()
+            kind, fence = "code", fence_match.group(1)
+            reopen = [line]
+            add(line)
+        elif heading_match:
+            yield from flush()
+            kind = "paragraph"
+            level, title = len(heading_match.group(1)), heading_match.group(2)
+            headings = [(lvl, t) for lvl, t in headings if lvl < level] + [(level, title)]
+            yield Block("heading", line, tuple(t for _, t in headings), estimate_tokens(line))
+        elif line.lstrip().startswith("|"):
+            if kind != "table":
+                yield from flush()
+                kind, reopen = "table", []
+            if len(reopen) < 2:
+                reopen.append(line)  # header row + separator row
+            elif buf_chars + len(line) > max_chars:
+                yield from flush()
+                for header in reopen:
+                    add(header)
+            add(line)
+        elif not line.strip():
+            yield from flush()
+            kind = "paragraph"
+        else:
+            if kind == "table":
+                yield from flush()
+                kind = "paragraph"
+            add(line)
+            if buf_chars > max_chars:
+                yield from flush()
+
+    # An unterminated fence at EOF is kept as code rather than reparsed as prose
+    yield from flush()
+
+
+def _overlap_tail(block: Block, overlap_tokens: int) -> Block | None:
+    """Trailing sentences of a paragraph, at most ``overlap_tokens`` long, to repeat in the next chunk."""
+    if overlap_tokens <= 0 or block.kind != "paragraph":
+        return None
+    text = block.text
+    if block.tokens > overlap_tokens:
+        text = text[-overlap_tokens * 4 :]
+        starts = [m.end() for m in _SENTENCE_END_RE.finditer(text)]
+        text = text[starts[0] :] if starts else text[text.find(" ") + 1 :]
+    text = text.strip()
+    return Block("paragraph", text, block.headings, estimate_tokens(text)) if text else None
+
+
+def iter_chunks(
+    blocks: Iterable[Block],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    min_tokens: int = CHUNK_MIN_TOKENS,
+) -> Iterator[Chunk]:
+    """
+    Pack blocks into chunks of at most ``max_tokens``.
+
+    Headings start a new chunk once the current one reaches ``min_tokens``; otherwise blocks are merged
+    so small sections do not become tiny fragments. Within a section, consecutive chunks share up to
+    ``overlap_tokens`` of trailing prose (code and tables are never duplicated).
+
+    Args:
+        blocks (Iterable[Block]): Output of ``iter_blocks``.
+        max_tokens (int): Chunk token budget.
+        overlap_tokens (int): Prose carried over between chunks of the same section.
+        min_tokens (int): Minimum size before a heading may close a chunk.
+
+    Yields:
+        Chunk: Chunks in document order, ``seq`` from 0.
+    """
+    current: list[Block] = []
+    tokens = 0
+    fresh = False  # current holds more than the overlap carried from the previous chunk
+    seq = 0
+
+    def emit() -> Chunk:
+        nonlocal seq
+        text = "\n\n".join(b.text for b in current)
+        headings = next((b.headings for b in current if b.kind == "heading"), current[-1].headings)
+        kinds = tuple(sorted({b.kind for b in current}))
+        chunk = Chunk(seq, text, estimate_tokens(text), headings, kinds)
+        seq += 1
+        return chunk
+
+    for block in blocks:
+        if block.kind == "heading" and fresh and tokens >= min_tokens:
+            yield emit()
+            current, tokens, fresh = [], 0, False
+        elif fresh and tokens + block.tokens > max_tokens:
+            yield emit()
+            tail = _overlap_tail(current[-1], overlap_tokens)
+            same_section = tail is not None and tail.headings == block.headings
+            current = [tail] if same_section and tail.tokens + block.tokens <= max_tokens else []
+            tokens = sum(b.tokens for b in current)
+            fresh = False
+        current.append(block)
+        tokens += block.tokens
+        fresh = True
+
+    if fresh:
+        yield emit()
+
+
+def chunk_text(
+    lines: Iterable[str],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    min_tokens: int = CHUNK_MIN_TOKENS,
+) -> Iterator[Chunk]:
+    """Stream a document's lines into chunks (``iter_blocks`` + ``iter_chunks``) in constant memory."""
+    return iter_chunks(iter_blocks(lines, max_tokens), max_tokens, overlap_tokens, min_tokens)
+
+
+@dataclass
+class ChunkStats:
+    """Running chunk-size distribution as a fixed-width token histogram (constant memory)."""
+
+    bucket_tokens: int = 32
+    count: int = 0
+    total_tokens: int = 0
+    min_tokens: int | None = None
+    max_tokens: int = 0
+    histogram: dict[int, int] = field(default_factory=dict)
+
+    def add(self, chunk: Chunk) -> None:
+        self.count += 1
+        self.total_tokens += chunk.tokens
+        self.min_tokens = chunk.tokens if self.min_tokens is None else min(self.min_tokens, chunk.tokens)
+        self.max_tokens = max(self.max_tokens, chunk.tokens)
+        bucket = chunk.tokens // self.bucket_tokens * self.bucket_tokens
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def percentile(self, p: float) -> int:
+        """Upper edge of the histogram bucket holding the ``p``-th percentile (0-100)."""
+        target = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= target:
+                return bucket + self.bucket_tokens
+        return self.max_tokens
+
+    def summary(self, elapsed_sec: float | None = None) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            "chunks": self.count,
+            "total_tokens": self.total_tokens,
+            "mean_tokens": self.total_tokens / self.count if self.count else 0.0,
+            "min_tokens": self.min_tokens or 0,
+            "p50_tokens": self.percentile(50),
+            "p95_tokens": self.percentile(95),
+            "max_tokens": self.max_tokens,
+            "histogram": {str(k): v for k, v in sorted(self.histogram.items())},
+        }
+        if elapsed_sec:
+            result["chunks_per_sec"] = self.count / elapsed_sec
+        return result
@@ -0,0 +1,220 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import StrEnum
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Rolling window the error and slow-call rates are computed over
+BREAKER_WINDOW_SEC = float(os.getenv("BREAKER_WINDOW_SEC", "60"))
+# Calls needed in the window before the rates can trip the breaker
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+# A successful call slower than this counts towards the slow-call rate
+BREAKER_SLOW_CALL_SEC = float(os.getenv("BREAKER_SLOW_CALL_SEC", "30"))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+# How long a tripped breaker rejects calls before letting probes through
+BREAKER_OPEN_SEC = float(os.getenv("BREAKER_OPEN_SEC", "30"))
+# Successful probes needed to close again; this many may be in flight while half-open
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+
+class BreakerState(StrEnum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+# Gauge values for ``circuit_breaker_state``
+_STATE_VALUE = {BreakerState.CLOSED: 0, BreakerState.HALF_OPEN: 1, BreakerState.OPEN: 2}
+
+
+@dataclass(frozen=True)
+class Admission:
+    """
+    Ticket for one allowed call, handed back to ``record``/``release``.
+
+    ``probe`` is set for calls let through while half-open; ``epoch`` is the half-open period they belong to,
+    so only those calls free a probe slot or decide whether the breaker closes.
+    """
+
+    probe: bool = False
+    epoch: int = 0
+
+
+class CircuitOpenError(RuntimeError):
+    """Every candidate model's breaker is open; the request fails fast instead of waiting on them."""
+
+    def __init__(self, models: list[str]) -> None:
+        super().__init__(f"Circuit open for {', '.join(models)}")
+        self.models = models
+        self.retry_after_sec = min(get_breaker(m).retry_after() for m in models)
+
+
+class CircuitBreaker:
+    """
+    Per-model breaker over a rolling window of call outcomes and latencies.
+
+    Closed: calls pass; once the window holds ``min_calls`` calls and the error rate or slow-call rate
+    reaches its threshold, the breaker opens. Open: calls are rejected for ``open_sec``. Half-open:
+    up to ``half_open_probes`` calls go through; that many successes close it, any failure reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_sec: float = BREAKER_WINDOW_SEC,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        slow_call_sec: float = BREAKER_SLOW_CALL_SEC,
+        slow_call_rate: float = BREAKER_SLOW_CALL_RATE,
+        open_sec: float = BREAKER_OPEN_SEC,
+        half_open_probes: int = BREAKER_HALF_OPEN_PROBES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.window_sec = window_sec
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_sec = slow_call_sec
+        self.slow_call_rate = slow_call_rate
+        self.open_sec = open_sec
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls: deque[tuple[float, bool, bool]] = deque()  # (finished_at, failed, slow)
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._half_open_epoch = 0
+        metrics.set_gauge("circuit_breaker_state", _STATE_VALUE[self._state], model=name)
+
+    @property
+    def state(self) -> BreakerState:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets probes through (0 when not open)."""
+        with self._lock:
+            if self._state is not BreakerState.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_sec - self._clock())
+
+    def allow(self) -> Admission | None:
+        """
+        Whether to send a call to this model now: an ``Admission`` if so, else None. Each admission must be
+        passed to ``record`` or ``release``, since in half-open state it holds a probe slot.
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state is BreakerState.CLOSED:
+                return Admission()
+            if self._state is BreakerState.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                metrics.inc("circuit_breaker_probes_total", model=self.name)
+                return Admission(probe=True, epoch=self._half_open_epoch)
+        metrics.inc("circuit_breaker_rejections_total", model=self.name)
+        return None
+
+    def record(self, admission: Admission, ok: bool, duration: float) -> None:
+        """Outcome of an allowed call: ``ok`` False for errors/invalid output, ``duration`` in seconds."""
+        slow = ok and duration > self.slow_call_sec
+        with self._lock:
+            now = self._clock()
+            if self._state is BreakerState.HALF_OPEN:
+                if not self._is_current_probe(admission):
+                    return  # admitted before the breaker opened; only probes judge a half-open breaker
+                self._probes_in_flight -= 1
+                if not ok or slow:
+                    self._trip(now, "probe_failed")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._transition(BreakerState.CLOSED)
+                    self._calls.clear()
+                return
+            if self._state is BreakerState.OPEN:
+                return  # a call admitted before the trip finished late; the window was already judged
+
+            self._calls.append((now, not ok, slow))
+            while self._calls and self._calls[0][0] < now - self.window_sec:
+                self._calls.popleft()
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            if sum(failed for _, failed, _ in self._calls) / total >= self.error_rate:
+                self._trip(now, "error_rate")
+            elif sum(slow for _, _, slow in self._calls) / total >= self.slow_call_rate:
+                self._trip(now, "slow_calls")
+
+    def release(self, admission: Admission) -> None:
+        """Give back an allowed call that ended without a verdict (e.g. the client disconnected)."""
+        with self._lock:
+            if self._state is BreakerState.HALF_OPEN and self._is_current_probe(admission):
+                self._probes_in_flight -= 1
+
+    def _is_current_probe(self, admission: Admission) -> bool:
+        return admission.probe and admission.epoch == self._half_open_epoch
+
+    def _maybe_half_open(self) -> None:
+        if self._state is BreakerState.OPEN and self._clock() >= self._opened_at + self.open_sec:
+            self._transition(BreakerState.HALF_OPEN)
+            self._half_open_epoch += 1
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+
+    def _trip(self, now: float, reason: str) -> None:
+        self._opened_at = now
+        self._calls.clear()
+        self._transition(BreakerState.OPEN)
+        metrics.inc("circuit_breaker_trips_total", model=self.name, reason=reason)
+        logger.warning(f"Circuit breaker for {self.name} opened ({reason}); rejecting calls for {self.open_sec:.0f}s")
+
+    def _transition(self, state: BreakerState) -> None:
+        if state is self._state:
+            return
+        logger.info(f"Circuit breaker for {self.name}: {self._state} -> {state}")
+        self._state = state
+        metrics.inc("circuit_breaker_transitions_total", model=self.name, to=state)
+        metrics.set_gauge("circuit_breaker_state", _STATE_VALUE[state], model=self.name)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model_name: str) -> CircuitBreaker:
+    """Process-wide breaker for ``model_name``, created on first use."""
+    with _breakers_lock:
+        breaker = _breakers.get(model_name)
+        if breaker is None:
+            breaker = _breakers[model_name] = CircuitBreaker(model_name)
+        return breaker
+
+
+def admit(model_name: str) -> Admission | None:
+    """Admission to call ``model_name`` now, or None if its breaker rejects it (never with ``BREAKER_ENABLED`` off)."""
+    if not BREAKER_ENABLED:
+        return Admission()
+    return get_breaker(model_name).allow()
+
+
+def record_outcome(model_name: str, admission: Admission, ok: bool | None, duration: float) -> None:
+    """Report an admitted call: ``ok`` True/False, or None when it ended without a verdict."""
+    if not BREAKER_ENABLED:
+        return
+    breaker = get_breaker(model_name)
+    if ok is None:
+        breaker.release(admission)
+    else:
+        breaker.record(admission, ok, duration)
@@ -0,0 +1,28 @@
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+from sqlalchemy import Engine, create_engine
+
+load_dotenv()
+
+
+def database_url() -> str:
+    """Build the SQLAlchemy URL from the ``POSTGRES_*`` variables used by docker-compose."""
+    user = os.getenv("POSTGRES_USER", "postgres")
+    password = os.getenv("POSTGRES_PASSWORD", "")
+    host = os.getenv("POSTGRES_HOST", "localhost")
+    port = os.getenv("POSTGRES_PORT", "5432")
+    name = os.getenv("POSTGRES_DB", "peporag")
+    return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}"
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Process-wide pooled engine (created lazily on first use)."""
+    return create_engine(
+        database_url(),
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "5")),
+        pool_pre_ping=True,
+    )
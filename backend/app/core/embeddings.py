@@ -0,0 +1,38 @@
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBED_TIMEOUT_SEC = 30.0
+
+_client: httpx.AsyncClient | None = None
+
+
+def ollama_api_base() -> str:
+    """Native Ollama API root, derived from ``OLLAMA_BASE_URL`` (which points at the OpenAI-compatible ``/v1``)."""
+    base = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1").rstrip("/")
+    return base.removesuffix("/v1")
+
+
+async def embed_texts(texts: list[str], model: str = EMBEDDING_MODEL) -> list[list[float]]:
+    """
+    Embed a batch of texts with Ollama's ``/api/embed`` endpoint.
+
+    Args:
+        texts (list[str]): Inputs to embed (one request for the whole batch).
+        model (str): Ollama embedding model name.
+
+    Returns:
+        list[list[float]]: One embedding per input, in order.
+    """
+    global _client
+    if _client is None:
+        # Reused across requests so embedding calls keep their pooled keep-alive connections
+        _client = httpx.AsyncClient(base_url=ollama_api_base(), timeout=EMBED_TIMEOUT_SEC)
+
+    response = await _client.post("/api/embed", json={"model": model, "input": texts})
+    response.raise_for_status()
+    return response.json()["embeddings"]
@@ -0,0 +1,539 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Sequence
+from typing import Any
+
+import httpx
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import DBAPIError
+
+from app.schemas.retrieval import RetrievedChunk
+
+from .db import get_engine
+from .embeddings import ollama_api_base
+from .metrics import metrics
+from .model_router import query_bucket
+
+logger = logging.getLogger(__name__)
+
+# When retrieval adds graph neighbours: off, complex (queries the router flags as complex) or always
+GRAPH_EXPANSION = os.getenv("GRAPH_EXPANSION", "complex")
+# Wall-clock budget for the expansion (also the statement timeout); on overrun the vector results go alone
+GRAPH_BUDGET_SEC = float(os.getenv("GRAPH_BUDGET_MS", "40")) / 1000
+GRAPH_MAX_SEEDS = int(os.getenv("GRAPH_MAX_SEEDS", "16"))
+# Neighbours read per seed entity (adjacency rows are sorted by weight)
+GRAPH_FANOUT = int(os.getenv("GRAPH_FANOUT", "8"))
+GRAPH_MAX_ENTITIES = int(os.getenv("GRAPH_MAX_ENTITIES", "32"))
+# Chunks added to the vector results per query
+GRAPH_MAX_CHUNKS = int(os.getenv("GRAPH_MAX_CHUNKS", "4"))
+
+# Offline build
+GRAPH_EXTRACTION_MODEL = os.getenv("GRAPH_EXTRACTION_MODEL", "qwen2.5:3b")
+GRAPH_EXTRACTION_TIMEOUT_SEC = 300.0
+# Neighbours and chunk postings kept per entity in entity_adjacency
+GRAPH_MAX_DEGREE = int(os.getenv("GRAPH_MAX_DEGREE", "32"))
+GRAPH_MAX_POSTINGS = int(os.getenv("GRAPH_MAX_POSTINGS", "64"))
+# Entities mentioned by more than this fraction of chunks ("python", "data") link everything; left out
+GRAPH_HUB_FRACTION = float(os.getenv("GRAPH_HUB_FRACTION", "0.05"))
+RELATION_WEIGHT = 1.0
+CO_OCCURRENCE_WEIGHT = 0.25
+
+_EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "chunks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "entities": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {"name": {"type": "string"}, "type": {"type": "string"}},
+                            "required": ["name", "type"],
+                        },
+                    },
+                    "relations": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "source": {"type": "string"},
+                                "relation": {"type": "string"},
+                                "target": {"type": "string"},
+                            },
+                            "required": ["source", "relation", "target"],
+                        },
+                    },
+                },
+                "required": ["id", "entities", "relations"],
+            },
+        }
+    },
+    "required": ["chunks"],
+}
+
+_EXTRACTION_PROMPT = (
+    "Extract the technical entities (technologies, concepts, components, patterns, algorithms, people) "
+    "and the relations between them from each passage below. Use short canonical names "
+    '(e.g. "PostgreSQL", "HNSW index", "event loop"). Answer with one object per passage id.'
+)
+
+_NAME_RE = re.compile(r"\s+")
+_TERM_RE = re.compile(r"[\w][\w.+#-]*")
+
+
+def normalize_entity(name: str) -> str | None:
+    """Canonical key of an entity name (lower-case, single spaces); None for names too short or long to be useful."""
+    name = _NAME_RE.sub(" ", name).strip(" .,:;\"'()[]").lower()
+    return name if 2 <= len(name) <= 80 else None
+
+
+def query_terms(query: str, max_words: int = 3) -> list[str]:
+    """Word n-grams of the query, matched against entity names to seed the expansion without an LLM call."""
+    words = [w.lower() for w in _TERM_RE.findall(query)]
+    return list(
+        dict.fromkeys(" ".join(words[i : i + n]) for n in range(1, max_words + 1) for i in range(len(words) - n + 1))
+    )
+
+
+def should_expand(query: str) -> bool:
+    if GRAPH_EXPANSION == "always":
+        return True
+    return GRAPH_EXPANSION == "complex" and query_bucket(query).endswith(":complex")
+
+
+class EntityGraph:
+    """
+    Bounded one-hop expansion over the precomputed entity graph.
+
+    Seeds are the entities of the retrieved chunks plus entity names appearing in the query. The top
+    ``fanout`` neighbours of up to ``max_seeds`` seeds are scored, the best ``max_entities`` of them
+    (seeds included) vote for the chunks that mention them, and the ``max_chunks`` best chunks not
+    already retrieved are returned. Everything runs in one statement over ``entity_adjacency``.
+    """
+
+    def __init__(
+        self,
+        engine: Engine | None = None,
+        budget_sec: float = GRAPH_BUDGET_SEC,
+        max_seeds: int = GRAPH_MAX_SEEDS,
+        fanout: int = GRAPH_FANOUT,
+        max_entities: int = GRAPH_MAX_ENTITIES,
+        max_chunks: int = GRAPH_MAX_CHUNKS,
+    ) -> None:
+        self._engine = engine
+        self.budget_sec = budget_sec
+        self.max_seeds = max_seeds
+        self.fanout = fanout
+        self.max_entities = max_entities
+        self.max_chunks = max_chunks
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            self._engine = get_engine()
+        return self._engine
+
+    def expand(self, query: str, query_embedding: Sequence[float], chunk_ids: list[int]) -> list[RetrievedChunk]:
+        """Graph neighbours of ``chunk_ids`` (and of entities named in ``query``), best first."""
+        sql = text(
+            """
+            WITH seeds AS (
+                SELECT id, 1.0 AS w FROM entities WHERE name = ANY(CAST(:terms AS text[]))
+                UNION ALL
+                SELECT e.id, 0.5 FROM chunks c CROSS JOIN LATERAL unnest(c.entity_ids) AS e(id)
+                WHERE c.id = ANY(CAST(:chunk_ids AS bigint[]))
+            ),
+            top_seeds AS (
+                SELECT id, sum(w) AS w FROM seeds GROUP BY id ORDER BY w DESC LIMIT :max_seeds
+            ),
+            reached AS (
+                SELECT n.id, s.w * n.weight AS w
+                FROM top_seeds s
+                JOIN entity_adjacency a ON a.entity_id = s.id
+                CROSS JOIN LATERAL unnest(a.neighbors[1:CAST(:fanout AS int)], a.weights[1:CAST(:fanout AS int)])
+                    AS n(id, weight)
+                UNION ALL
+                SELECT id, w FROM top_seeds
+            ),
+            top_entities AS (
+                SELECT id, sum(w) AS w FROM reached GROUP BY id ORDER BY w DESC LIMIT :max_entities
+            ),
+            candidates AS (
+                SELECT p.chunk_id, sum(t.w) AS graph_score
+                FROM top_entities t
+                JOIN entity_adjacency a ON a.entity_id = t.id
+                CROSS JOIN LATERAL unnest(a.chunk_ids) AS p(chunk_id)
+                WHERE NOT p.chunk_id = ANY(CAST(:chunk_ids AS bigint[]))
+                GROUP BY p.chunk_id
+                ORDER BY graph_score DESC
+                LIMIT :max_chunks
+            )
+            SELECT c.id, c.book_id, c.seq, c.content, c.metadata, k.graph_score,
+                   1 - (c.embedding <=> CAST(:q AS vector)) AS score
+            FROM candidates k JOIN chunks c ON c.id = k.chunk_id
+            ORDER BY k.graph_score DESC
+            """
+        )
+        params = {
+            "terms": query_terms(query),
+            "chunk_ids": chunk_ids,
+            "max_seeds": self.max_seeds,
+            "fanout": self.fanout,
+            "max_entities": self.max_entities,
+            "max_chunks": self.max_chunks,
+            "q": "[" + ",".join(f"{x:.7g}" for x in query_embedding) + "]",
+        }
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL statement_timeout = {max(1, int(self.budget_sec * 1000))}"))
+            rows = conn.execute(sql, params).mappings().all()
+        return [
+            RetrievedChunk(
+                chunk_id=r["id"],
+                book_id=r["book_id"],
+                seq=r["seq"],
+                content=r["content"],
+                score=float(r["score"]),
+                metadata={**(r["metadata"] or {}), "via": "graph", "graph_score": float(r["graph_score"])},
+            )
+            for r in rows
+        ]
+
+    async def neighbours(
+        self, query: str, query_embedding: Sequence[float], results: list[RetrievedChunk]
+    ) -> list[RetrievedChunk]:
+        """``expand`` within ``budget_sec``; returns nothing on overrun or error so retrieval never waits on it."""
+        start = time.perf_counter()
+        outcome = "ok"
+        extra: list[RetrievedChunk] = []
+        try:
+            # The statement timeout stops the work in Postgres; this also bounds waiting for a pooled connection
+            extra = await asyncio.wait_for(
+                asyncio.to_thread(self.expand, query, query_embedding, [r.chunk_id for r in results]),
+                timeout=self.budget_sec,
+            )
+        except TimeoutError:
+            outcome = "timeout"
+        except DBAPIError as e:
+            # Statement timeout, or the graph tables were never created
+            outcome = "timeout" if "statement timeout" in str(e) else "error"
+            if outcome == "error":
+                logger.warning(f"Graph expansion failed: {e}")
+        duration = time.perf_counter() - start
+        metrics.inc("graph_expansions_total", outcome=outcome)
+        metrics.observe("graph_expansion_seconds", duration, outcome=outcome)
+        metrics.observe("graph_expansion_chunks", len(extra))
+        return extra
+
+
+def graph_from_env() -> EntityGraph | None:
+    return None if GRAPH_EXPANSION == "off" else EntityGraph()
+
+
+# --- offline build -----------------------------------------------------------------------------------
+
+
+async def extract_batch(
+    client: httpx.AsyncClient, chunks: list[tuple[int, str]], model: str = GRAPH_EXTRACTION_MODEL
+) -> dict[int, tuple[dict[str, str], set[tuple[str, str]]]]:
+    """
+    Entities and relations for a batch of chunks in one schema-constrained Ollama call.
+
+    Returns:
+        dict: chunk id -> (normalized entity name -> kind, undirected relation pairs). Relation endpoints
+        are added to the chunk's entities; ids the model invents are ignored.
+    """
+    passages = "\n\n".join(f"[passage {chunk_id}]\n{content}" for chunk_id, content in chunks)
+    response = await client.post(
+        "/api/chat",
+        json={
+            "model": model,
+            "messages": [{"role": "user", "content": f"{_EXTRACTION_PROMPT}\n\n{passages}"}],
+            "format": _EXTRACTION_SCHEMA,
+            "stream": False,
+            "options": {"temperature": 0},
+        },
+    )
+    response.raise_for_status()
+    payload = json.loads(response.json()["message"]["content"])
+
+    wanted = {chunk_id for chunk_id, _ in chunks}
+    extracted: dict[int, tuple[dict[str, str], set[tuple[str, str]]]] = {i: ({}, set()) for i in wanted}
+    for item in payload.get("chunks", []):
+        try:
+            chunk_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if chunk_id not in wanted:
+            continue
+        entities, relations = extracted[chunk_id]
+        for entity in item.get("entities", []):
+            name = normalize_entity(str(entity.get("name", "")))
+            if name:
+                entities.setdefault(name, str(entity.get("type", "")).lower() or None)
+        for relation in item.get("relations", []):
+            source = normalize_entity(str(relation.get("source", "")))
+            target = normalize_entity(str(relation.get("target", "")))
+            if source and target and source != target:
+                entities.setdefault(source, None)
+                entities.setdefault(target, None)
+                relations.add((min(source, target), max(source, target)))
+    return extracted
+
+
+def store_batch(engine: Engine, extracted: dict[int, tuple[dict[str, str], set[tuple[str, str]]]]) -> None:
+    """
+    Write one batch in a single transaction: entities, and each chunk's ``entity_ids`` and ``relation_pairs``.
+
+    Edges are not accumulated here: ``rebuild_adjacency`` derives them from the chunks, so a build
+    interrupted at any point resumes without double-counting, and deleting a book's chunks (re-ingestion)
+    removes exactly what they contributed.
+    """
+    kinds: dict[str, str | None] = {}
+    for entities, _ in extracted.values():
+        for name, kind in entities.items():
+            kinds[name] = kinds.get(name) or kind
+
+    # Concurrent batches sharing entities lock their rows in the same order, so they cannot deadlock
+    names = sorted(kinds)
+    with engine.begin() as conn:
+        ids: dict[str, int] = {}
+        if kinds:
+            rows = conn.execute(
+                text(
+                    """
+                    INSERT INTO entities (name, kind)
+                    SELECT * FROM unnest(CAST(:names AS text[]), CAST(:kinds AS text[])) AS u(name, kind)
+                    ORDER BY name
+                    ON CONFLICT (name) DO UPDATE SET kind = COALESCE(entities.kind, EXCLUDED.kind)
+                    RETURNING id, name
+                    """
+                ),
+                {"names": names, "kinds": [kinds[n] for n in names]},
+            )
+            ids = {name: entity_id for entity_id, name in rows}
+
+        conn.execute(
+            text(
+                """
+                UPDATE chunks SET entity_ids = CAST(:entity_ids AS integer[]),
+                                  relation_pairs = CAST(:relation_pairs AS integer[])
+                WHERE id = :id
+                """
+            ),
+            [
+                {
+                    "id": chunk_id,
+                    "entity_ids": sorted(ids[n] for n in entities),
+                    "relation_pairs": sorted([ids[a], ids[b]] for a, b in relations),
+                }
+                for chunk_id, (entities, relations) in extracted.items()
+            ],
+        )
+
+
+def drop_chunk_postings(conn: Any, book_id: int) -> None:
+    """
+    Remove a book's chunks from the ``entity_adjacency`` postings, in the transaction that deletes them.
+
+    Expansion then never points at deleted chunks; their edge weights go at the next ``rebuild_adjacency``.
+    A no-op when the graph tables were never created.
+    """
+    if conn.execute(text("SELECT to_regclass('entity_adjacency')")).scalar() is None:
+        return
+    conn.execute(
+        text(
+            """
+            WITH gone AS (SELECT array_agg(id) AS ids FROM chunks WHERE book_id = :book_id)
+            UPDATE entity_adjacency a
+            SET chunk_ids = ARRAY(SELECT p FROM unnest(a.chunk_ids) AS p WHERE NOT p = ANY(gone.ids))
+            FROM gone
+            WHERE a.chunk_ids && gone.ids
+            """
+        ),
+        {"book_id": book_id},
+    )
+
+
+def rebuild_adjacency(
+    engine: Engine,
+    max_degree: int = GRAPH_MAX_DEGREE,
+    max_postings: int = GRAPH_MAX_POSTINGS,
+    hub_fraction: float = GRAPH_HUB_FRACTION,
+) -> dict[str, int]:
+    """
+    Recompute ``entity_edges`` and ``entity_adjacency`` from the chunks' entities and relations, then bump the
+    library version so retrieval caches holding old expansions are dropped.
+
+    Each chunk adds ``CO_OCCURRENCE_WEIGHT`` to every pair of its entities and ``RELATION_WEIGHT`` to every
+    extracted relation, in both directions so expansion only ever reads ``src``. Neighbour weights are
+    divided by the entity's strongest edge, so seed and neighbour scores stay comparable. Postings prefer
+    chunks that mention few entities (more likely to be about this one).
+    """
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE entities SET chunk_count = 0"))
+        conn.execute(
+            text(
+                """
+                UPDATE entities e SET chunk_count = s.n
+                FROM (
+                    SELECT m.id, count(*) AS n FROM chunks c CROSS JOIN LATERAL unnest(c.entity_ids) AS m(id)
+                    GROUP BY m.id
+                ) s
+                WHERE e.id = s.id
+                """
+            )
+        )
+        total = conn.execute(text("SELECT count(*) FROM chunks WHERE entity_ids IS NOT NULL")).scalar_one()
+        max_df = max(2, int(total * hub_fraction))
+        conn.execute(text("TRUNCATE entity_edges"))
+        conn.execute(
+            text(
+                """
+                WITH hubs AS (SELECT id FROM entities WHERE chunk_count > :max_df),
+                contributions AS (
+                    SELECT a.id AS src, b.id AS dst, CAST(:co_occurrence AS real) AS w
+                    FROM chunks c
+                    CROSS JOIN LATERAL unnest(c.entity_ids) AS a(id)
+                    CROSS JOIN LATERAL unnest(c.entity_ids) AS b(id)
+                    WHERE a.id <> b.id
+                    UNION ALL
+                    SELECT c.relation_pairs[i][1 + d], c.relation_pairs[i][2 - d], CAST(:relation AS real)
+                    FROM chunks c
+                    CROSS JOIN LATERAL generate_subscripts(c.relation_pairs, 1) AS i
+                    CROSS JOIN (VALUES (0), (1)) AS dirs(d)
+                )
+                INSERT INTO entity_edges (src, dst, weight)
+                SELECT src, dst, sum(w) FROM contributions
+                WHERE src NOT IN (SELECT id FROM hubs) AND dst NOT IN (SELECT id FROM hubs)
+                GROUP BY src, dst
+                """
+            ),
+            {"max_df": max_df, "co_occurrence": CO_OCCURRENCE_WEIGHT, "relation": RELATION_WEIGHT},
+        )
+        conn.execute(text("TRUNCATE entity_adjacency"))
+        conn.execute(
+            text(
+                """
+                WITH hubs AS (SELECT id FROM entities WHERE chunk_count > :max_df),
+                postings AS (
+                    SELECT m.id AS entity_id,
+                           (array_agg(c.id ORDER BY cardinality(c.entity_ids), c.id))[1:CAST(:max_postings AS int)]
+                               AS chunk_ids
+                    FROM chunks c CROSS JOIN LATERAL unnest(c.entity_ids) AS m(id)
+                    WHERE m.id NOT IN (SELECT id FROM hubs)
+                    GROUP BY m.id
+                ),
+                ranked AS (
+                    SELECT src, dst, weight / max(weight) OVER (PARTITION BY src) AS weight,
+                           row_number() OVER (PARTITION BY src ORDER BY weight DESC, dst) AS rn
+                    FROM entity_edges
+                ),
+                neighbours AS (
+                    SELECT src, array_agg(dst ORDER BY rn) AS neighbors, array_agg(weight ORDER BY rn) AS weights
+                    FROM ranked WHERE rn <= :max_degree GROUP BY src
+                )
+                INSERT INTO entity_adjacency (entity_id, neighbors, weights, chunk_ids)
+                SELECT p.entity_id, COALESCE(n.neighbors, '{}'), COALESCE(n.weights, '{}'), p.chunk_ids
+                FROM postings p LEFT JOIN neighbours n ON n.src = p.entity_id
+                """
+            ),
+            {"max_df": max_df, "max_postings": max_postings, "max_degree": max_degree},
+        )
+        stats = (
+            conn.execute(
+                text(
+                    """
+                SELECT count(*) AS entities,
+                       coalesce(sum(cardinality(neighbors)), 0) AS edges,
+                       pg_total_relation_size('entity_adjacency') AS bytes
+                FROM entity_adjacency
+                """
+                )
+            )
+            .mappings()
+            .one()
+        )
+        hubs = conn.execute(text("SELECT count(*) FROM entities WHERE chunk_count > :n"), {"n": max_df}).scalar_one()
+        conn.execute(text("UPDATE library_state SET version = version + 1, updated_at = now()"))
+    return {**stats, "hubs_skipped": hubs, "extracted_chunks": total}
+
+
+async def build_entity_graph(
+    engine: Engine | None = None,
+    model: str = GRAPH_EXTRACTION_MODEL,
+    batch_size: int = 8,
+    concurrency: int = 2,
+    limit: int | None = None,
+    **adjacency_options: Any,
+) -> dict[str, Any]:
+    """
+    Extract entities for every chunk not processed yet, ``concurrency`` batches at a time, then rebuild
+    the adjacency table (``adjacency_options`` go to ``rebuild_adjacency``). Safe to interrupt and rerun: it
+    resumes from the chunks still lacking ``entity_ids``.
+
+    Returns:
+        dict: Extraction throughput and the adjacency stats from ``rebuild_adjacency``.
+    """
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        pending = conn.execute(text("SELECT count(*) FROM chunks WHERE entity_ids IS NULL")).scalar_one()
+    pending = min(pending, limit) if limit is not None else pending
+    logger.info(f"Extracting entities for {pending} chunk(s) with {model}, {concurrency} x {batch_size}-chunk batches")
+
+    done = failed = 0
+    after = 0
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_batch(batch: list[tuple[int, str]]) -> None:
+        nonlocal done, failed
+        async with semaphore:
+            try:
+                extracted = await extract_batch(client, batch, model)
+                await asyncio.to_thread(store_batch, engine, extracted)
+                done += len(batch)
+            except (httpx.HTTPError, json.JSONDecodeError, KeyError, DBAPIError) as e:
+                # Left unmarked, so the next run retries these chunks
+                failed += len(batch)
+                logger.warning(f"Batch at chunk {batch[0][0]} failed: {e}")
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed else 0.0
+        eta = (pending - done - failed) / rate if rate else float("nan")
+        logger.info(f"  {done + failed}/{pending} chunks, {rate:.2f} chunks/s, ETA {eta:.0f}s")
+
+    async with httpx.AsyncClient(base_url=ollama_api_base(), timeout=GRAPH_EXTRACTION_TIMEOUT_SEC) as client:
+        while done + failed < pending:
+            page = min(batch_size * concurrency * 4, pending - done - failed)
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    text(
+                        "SELECT id, content FROM chunks WHERE entity_ids IS NULL AND id > :after ORDER BY id LIMIT :n"
+                    ),
+                    {"after": after, "n": page},
+                ).all()
+            if not rows:
+                break
+            after = rows[-1][0]
+            batches = [[(r[0], r[1]) for r in rows[i : i + batch_size]] for i in range(0, len(rows), batch_size)]
+            await asyncio.gather(*(run_batch(b) for b in batches))
+
+    elapsed = time.perf_counter() - start
+    adjacency = await asyncio.to_thread(rebuild_adjacency, engine, **adjacency_options)
+    return {
+        "model": model,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "chunks_extracted": done,
+        "chunks_failed": failed,
+        "extraction_sec": elapsed,
+        "chunks_per_sec": done / elapsed if elapsed else 0.0,
+        **adjacency,
+    }
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Where CPU-bound stages run: thread (default), process (sidesteps the GIL for pure-Python work,
+# costs pickling per call) or inline (on the event loop, for comparison)
+CPU_EXECUTOR = os.getenv("CPU_EXECUTOR", "thread")
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOOP_LAG_INTERVAL_SEC = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100")) / 1000
+# Lag (or a single on-loop stage) above this counts as the loop being blocked
+LOOP_LAG_THRESHOLD_SEC = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "50")) / 1000
+
+_thread_pool: ThreadPoolExecutor | None = None
+_process_pool: ProcessPoolExecutor | None = None
+# (stage, started, ended) of the most recent stage that ran on the loop thread, for lag attribution
+_last_loop_stage: tuple[str, float, float] | None = None
+
+
+def _executor(process_safe: bool) -> Executor | None:
+    global _thread_pool, _process_pool
+    if CPU_EXECUTOR == "inline":
+        return None
+    if CPU_EXECUTOR == "process" and process_safe:
+        if _process_pool is None:
+            # spawn: forking a process that already runs the event loop and HTTP client threads is unsafe
+            _process_pool = ProcessPoolExecutor(CPU_EXECUTOR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu")
+    return _thread_pool
+
+
+async def run_cpu[T](stage: str, fn: Callable[..., T], *args: Any, process_safe: bool = True) -> T:
+    """
+    Run a CPU-bound stage off the event loop and record its latency.
+
+    Args:
+        stage (str): Label for metrics (``cpu_stage_seconds``, ``cpu_stage_wait_seconds``).
+        fn (Callable): Function to run; with ``CPU_EXECUTOR=process`` it and its arguments must pickle.
+        *args: Positional arguments for ``fn``.
+        process_safe (bool): False for stages holding unpicklable state (loaded models, locks); those
+            always use the thread pool.
+
+    Returns:
+        The result of ``fn(*args)``.
+    """
+    executor = _executor(process_safe)
+    submitted = time.perf_counter()
+    if executor is None:
+        with on_loop_stage(stage):
+            result = fn(*args)
+        metrics.observe("cpu_stage_seconds", time.perf_counter() - submitted, stage=stage, executor="inline")
+        return result
+
+    kind = "process" if isinstance(executor, ProcessPoolExecutor) else "thread"
+
+    def timed() -> tuple[float, T]:
+        started = time.perf_counter()
+        return started, fn(*args)
+
+    if kind == "process":
+        # Start times are not comparable across processes; only the round trip is measured
+        result = await asyncio.get_running_loop().run_in_executor(executor, partial(fn, *args))
+    else:
+        started, result = await asyncio.get_running_loop().run_in_executor(executor, timed)
+        metrics.observe("cpu_stage_wait_seconds", started - submitted, stage=stage, executor=kind)
+    metrics.observe("cpu_stage_seconds", time.perf_counter() - submitted, stage=stage, executor=kind)
+    return result
+
+
+@contextmanager
+def on_loop_stage(stage: str) -> Iterator[None]:
+    """
+    Mark synchronous work that stays on the event loop (too small per call to be worth a hop).
+
+    Sections longer than ``LOOP_LAG_THRESHOLD_MS`` count as blocking the loop, and the lag monitor
+    attributes lag it observes to the most recent marked stage.
+    """
+    global _last_loop_stage
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ended = time.perf_counter()
+        _last_loop_stage = (stage, started, ended)
+        if ended - started > LOOP_LAG_THRESHOLD_SEC:
+            metrics.inc("event_loop_blocked_total", stage=stage)
+            metrics.observe("event_loop_block_seconds", ended - started, stage=stage)
+
+
+class LoopLagMonitor:
+    """
+    Measure event-loop lag: a task sleeps ``interval`` and records how late it wakes up.
+
+    Late wake-ups above the threshold are attributed to the last ``on_loop_stage`` that overlapped the
+    late window, or ``unattributed`` (e.g. library code such as pydantic-ai parsing).
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SEC, threshold: float = LOOP_LAG_THRESHOLD_SEC) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            metrics.observe("event_loop_lag_seconds", lag)
+            metrics.set_gauge("event_loop_lag_last_seconds", lag)
+            if lag > self.threshold:
+                stage = "unattributed"
+                if _last_loop_stage is not None and _last_loop_stage[2] >= expected:
+                    stage = _last_loop_stage[0]
+                metrics.inc("event_loop_lag_events_total", stage=stage)
+                logger.warning(f"Event loop lagged {lag * 1000:.0f}ms (last on-loop stage: {stage})")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def shutdown_executors() -> None:
+    global _thread_pool, _process_pool
+    for pool in (_thread_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    _thread_pool = _process_pool = None
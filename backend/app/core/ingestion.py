@@ -0,0 +1,449 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+from collections.abc import Awaitable, Callable, Iterator
+from enum import StrEnum
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, text
+
+from .chunker import Chunk, chunk_text
+from .db import get_engine
+from .embeddings import embed_texts
+from .entity_graph import drop_chunk_postings
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Books are referenced by their path relative to this directory (mounted into the backend and workers)
+INGEST_LIBRARY_DIR = Path(os.getenv("INGEST_LIBRARY_DIR", "library"))
+INGEST_FORMATS = (".md", ".markdown", ".txt")
+# Jobs running at once across all workers; each one keeps Ollama's embedding model busy, so this is what
+# stops ingestion from queueing interactive /ask embeddings behind it
+INGEST_MAX_RUNNING_JOBS = int(os.getenv("INGEST_MAX_RUNNING_JOBS", "1"))
+# Chunks embedded per request and committed per transaction (the resume granularity)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "16"))
+# Pause between batches, leaving Ollama free for query embeddings in between
+INGEST_BATCH_PAUSE_SEC = float(os.getenv("INGEST_BATCH_PAUSE_MS", "50")) / 1000
+INGEST_POLL_SEC = float(os.getenv("INGEST_POLL_SEC", "2"))
+# A running job whose worker has not committed for this long is considered crashed and requeued
+INGEST_STALE_SEC = float(os.getenv("INGEST_STALE_SEC", "120"))
+# Failed attempts before a job is marked failed; shutdown hand-backs do not count
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+# Wait before retrying a failed attempt, doubled after each further failure, so an Ollama or DB outage is not
+# hammered by the same job in a tight loop
+INGEST_RETRY_BACKOFF_SEC = float(os.getenv("INGEST_RETRY_BACKOFF_SEC", "30"))
+
+# pg_advisory_xact_lock key serializing claims, so the running-jobs limit holds across workers
+_CLAIM_LOCK_KEY = 0x1A9E57
+
+_JOB_COLUMNS = """
+    j.id, j.book_id, b.title, b.path, j.status, j.total_chunks, j.committed_seq, j.worker_id, j.attempts,
+    j.run_started_at, j.run_start_seq, j.error, j.created_at, j.finished_at, j.not_before, j.checksum,
+    now() AS db_now
+"""
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class IngestionError(ValueError):
+    """The book cannot be queued: outside the library, missing or in an unsupported format."""
+
+
+class JobInProgressError(IngestionError):
+    """The book already has a queued or running job."""
+
+
+class LeaseLost(RuntimeError):
+    """The job was reclaimed by another worker (this one stalled past ``INGEST_STALE_SEC``)."""
+
+
+def resolve_book_path(path: str) -> Path:
+    """Absolute path of a library-relative ``path``; rejects anything outside ``INGEST_LIBRARY_DIR``."""
+    root = INGEST_LIBRARY_DIR.resolve()
+    full = (root / path).resolve()
+    if not full.is_relative_to(root):
+        raise IngestionError(f"{path} is outside the library directory")
+    return full
+
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_chunks(path: Path) -> Iterator[Chunk]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        yield from chunk_text(f)
+
+
+def job_progress(row: Any) -> dict[str, Any]:
+    """API view of an ``ingestion_jobs`` row: percentage, current-attempt throughput and ETA."""
+    job = dict(row._mapping)
+    done = job["committed_seq"] + 1
+    total = job["total_chunks"]
+    rate = None
+    eta = None
+    if job["status"] == JobStatus.RUNNING and job["run_started_at"] is not None:
+        elapsed = (job["db_now"] - job["run_started_at"]).total_seconds()
+        run_chunks = job["committed_seq"] - job["run_start_seq"]
+        if elapsed > 0 and run_chunks > 0:
+            rate = run_chunks / elapsed
+            eta = (total - done) / rate if total is not None else None
+    return {
+        "job_id": job["id"],
+        "book_id": job["book_id"],
+        "title": job["title"],
+        "path": job["path"],
+        "status": job["status"],
+        "chunks_done": done,
+        "total_chunks": total,
+        "percent": round(100 * done / total, 1) if total else None,
+        "chunks_per_sec": rate,
+        "eta_sec": eta,
+        "attempts": job["attempts"],
+        "retry_at": job["not_before"] if job["status"] == JobStatus.QUEUED else None,
+        "worker_id": job["worker_id"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def enqueue_book(path: str, title: str | None = None, author: str | None = None, engine: Engine | None = None) -> dict:
+    """
+    Register (or re-register) a book and queue its ingestion.
+
+    Re-queuing a book that was already ingested replaces its chunks when the job completes; until then
+    searches keep returning the previous version.
+
+    Raises:
+        IngestionError: Bad path or format.
+        JobInProgressError: The book already has a queued/running job.
+    """
+    full = resolve_book_path(path)
+    if full.suffix.lower() not in INGEST_FORMATS:
+        raise IngestionError(f"Unsupported format {full.suffix!r}; expected one of {', '.join(INGEST_FORMATS)}")
+    if not full.is_file():
+        raise IngestionError(f"{path} does not exist in the library")
+    relative = str(full.relative_to(INGEST_LIBRARY_DIR.resolve()))
+    checksum = file_checksum(full)
+
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        book_id = conn.execute(
+            text(
+                """
+                INSERT INTO books (title, author, path) VALUES (:title, :author, :path)
+                ON CONFLICT (path) DO UPDATE
+                    SET title = COALESCE(:title_set, books.title), author = COALESCE(:author, books.author)
+                RETURNING id
+                """
+            ),
+            {"title": title or full.stem, "title_set": title, "author": author, "path": relative},
+        ).scalar_one()
+        job_id = conn.execute(
+            text(
+                """
+                INSERT INTO ingestion_jobs (book_id, checksum) VALUES (:book_id, :checksum)
+                ON CONFLICT (book_id) WHERE status IN ('queued', 'running') DO NOTHING
+                RETURNING id
+                """
+            ),
+            {"book_id": book_id, "checksum": checksum},
+        ).scalar_one_or_none()
+    if job_id is None:
+        raise JobInProgressError(f"{relative} already has an ingestion job in progress")
+    metrics.inc("ingest_jobs_enqueued_total")
+    return get_job(job_id, engine)
+
+
+def get_job(job_id: int, engine: Engine | None = None) -> dict | None:
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(f"SELECT {_JOB_COLUMNS} FROM ingestion_jobs j JOIN books b ON b.id = j.book_id WHERE j.id = :id"),
+            {"id": job_id},
+        ).one_or_none()
+    return job_progress(row) if row is not None else None
+
+
+def list_jobs(status: JobStatus | None = None, limit: int = 50, engine: Engine | None = None) -> list[dict]:
+    """Most recent jobs first, optionally filtered by status."""
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                f"""
+                SELECT {_JOB_COLUMNS} FROM ingestion_jobs j JOIN books b ON b.id = j.book_id
+                WHERE CAST(:status AS text) IS NULL OR j.status = :status
+                ORDER BY j.created_at DESC LIMIT :limit
+                """
+            ),
+            {"status": str(status) if status else None, "limit": limit},
+        ).all()
+    return [job_progress(r) for r in rows]
+
+
+def claim_job(
+    worker_id: str,
+    max_running: int = INGEST_MAX_RUNNING_JOBS,
+    stale_sec: float = INGEST_STALE_SEC,
+    max_attempts: int = INGEST_MAX_ATTEMPTS,
+    backoff_sec: float = INGEST_RETRY_BACKOFF_SEC,
+    engine: Engine | None = None,
+) -> Any | None:
+    """
+    Take the oldest queued job that is not backing off, if fewer than ``max_running`` jobs are running.
+
+    Jobs whose worker stopped heartbeating are requeued first (or failed after ``max_attempts``), keeping
+    their ``committed_seq`` so the next attempt resumes after the last committed chunk. A lost worker
+    counts as a failed attempt and backs off like one.
+    """
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _CLAIM_LOCK_KEY})
+        reclaimed = conn.execute(
+            text(
+                """
+                UPDATE ingestion_jobs
+                SET status = CASE WHEN attempts + 1 >= :max_attempts THEN 'failed' ELSE 'queued' END,
+                    error = 'worker ' || worker_id || ' stopped responding',
+                    worker_id = NULL,
+                    attempts = attempts + 1,
+                    not_before = now() + make_interval(secs => :backoff_sec * power(2, attempts)),
+                    finished_at = CASE WHEN attempts + 1 >= :max_attempts THEN now() END
+                WHERE status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale_sec)
+                RETURNING id, status
+                """
+            ),
+            {"max_attempts": max_attempts, "stale_sec": stale_sec, "backoff_sec": backoff_sec},
+        ).all()
+        for job_id, status in reclaimed:
+            logger.warning(f"Ingestion job {job_id} lost its worker; {status}")
+
+        running = conn.execute(text("SELECT count(*) FROM ingestion_jobs WHERE status = 'running'")).scalar_one()
+        if running >= max_running:
+            return None
+        return conn.execute(
+            text(
+                f"""
+                UPDATE ingestion_jobs j
+                SET status = 'running', worker_id = :worker_id, heartbeat_at = now(),
+                    run_started_at = now(), run_start_seq = committed_seq
+                FROM books b
+                WHERE b.id = j.book_id AND j.id = (
+                    SELECT id FROM ingestion_jobs
+                    WHERE status = 'queued' AND (not_before IS NULL OR not_before <= now())
+                    ORDER BY created_at LIMIT 1 FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {_JOB_COLUMNS}
+                """
+            ),
+            {"worker_id": worker_id},
+        ).one_or_none()
+
+
+def _prepare(engine: Engine, job: Any, worker_id: str) -> tuple[int, int]:
+    """
+    Count the book's chunks and decide where to start: after ``committed_seq`` when resuming the same file,
+    otherwise from scratch with the job's staged chunks removed. The book's live chunks stay untouched until
+    ``_finish`` swaps the staged ones in.
+
+    Returns:
+        tuple[int, int]: (total chunks, last committed seq).
+    """
+    path = resolve_book_path(job.path)
+    checksum = file_checksum(path)
+    total = sum(1 for _ in _read_chunks(path))
+    committed = job.committed_seq
+    with engine.begin() as conn:
+        if committed < 0 or checksum != job.checksum:
+            if committed >= 0:
+                logger.warning(f"{job.path} changed since job {job.id} started; ingesting it from the start")
+            conn.execute(text("DELETE FROM chunks_staging WHERE book_id = :book_id"), {"book_id": job.book_id})
+            committed = -1
+        _update_lease(
+            conn,
+            job.id,
+            worker_id,
+            "total_chunks = :total, checksum = :checksum, committed_seq = :seq, run_start_seq = :seq",
+            {"total": total, "checksum": checksum, "seq": committed},
+        )
+    return total, committed
+
+
+def _update_lease(conn: Any, job_id: int, worker_id: str, assignments: str, params: dict[str, Any]) -> None:
+    """Update a job this worker still holds (and refresh its heartbeat); raises ``LeaseLost`` otherwise."""
+    updated = conn.execute(
+        text(
+            f"""
+            UPDATE ingestion_jobs SET {assignments}, heartbeat_at = now()
+            WHERE id = :job_id AND worker_id = :worker_id AND status = 'running'
+            """
+        ),
+        {**params, "job_id": job_id, "worker_id": worker_id},
+    ).rowcount
+    if not updated:
+        raise LeaseLost(f"job {job_id} is no longer held by {worker_id}")
+
+
+def _commit_batch(engine: Engine, job: Any, worker_id: str, chunks: list[Chunk], embeddings: list[list[float]]) -> None:
+    """Stage one batch of chunks and advance ``committed_seq`` in the same transaction."""
+    with engine.begin() as conn:
+        # Lease first: the row lock makes a concurrent reclaim wait until this batch is in
+        _update_lease(conn, job.id, worker_id, "committed_seq = :seq", {"seq": chunks[-1].seq})
+        conn.execute(
+            text(
+                """
+                INSERT INTO chunks_staging (book_id, seq, content, metadata, embedding)
+                VALUES (:book_id, :seq, :content, CAST(:metadata AS jsonb), CAST(:embedding AS vector))
+                ON CONFLICT (book_id, seq) DO NOTHING
+                """
+            ),
+            [
+                {
+                    "book_id": job.book_id,
+                    "seq": chunk.seq,
+                    "content": chunk.text,
+                    "metadata": json.dumps(chunk.metadata()),
+                    "embedding": "[" + ",".join(f"{x:.7g}" for x in embedding) + "]",
+                }
+                for chunk, embedding in zip(chunks, embeddings, strict=True)
+            ],
+        )
+
+
+async def run_job(
+    job: Any,
+    worker_id: str,
+    stop: asyncio.Event,
+    engine: Engine | None = None,
+    embed: Callable[[list[str]], Awaitable[list[list[float]]]] = embed_texts,
+    batch_size: int = INGEST_BATCH_SIZE,
+    pause_sec: float = INGEST_BATCH_PAUSE_SEC,
+) -> JobStatus:
+    """
+    Ingest a claimed job batch by batch, resuming after its ``committed_seq``.
+
+    Returns ``DONE`` or ``FAILED``, or ``QUEUED`` when ``stop`` was set and the job was handed back.
+    """
+    engine = engine or get_engine()
+    try:
+        total, committed = await asyncio.to_thread(_prepare, engine, job, worker_id)
+        logger.info(f"Job {job.id}: {job.path}, {total} chunks, starting after seq {committed}")
+        chunks = (c for c in _read_chunks(resolve_book_path(job.path)) if c.seq > committed)
+        while batch := list(islice(chunks, batch_size)):
+            if stop.is_set():
+                await asyncio.to_thread(_finish, engine, job, worker_id, JobStatus.QUEUED)
+                logger.info(f"Job {job.id} handed back at seq {batch[0].seq - 1}")
+                return JobStatus.QUEUED
+            embeddings = await embed([c.text for c in batch])
+            await asyncio.to_thread(_commit_batch, engine, job, worker_id, batch, embeddings)
+            if pause_sec:
+                await asyncio.sleep(pause_sec)
+        await asyncio.to_thread(_finish, engine, job, worker_id, JobStatus.DONE)
+        logger.info(f"Job {job.id} done: {job.path}")
+        return JobStatus.DONE
+    except LeaseLost as e:
+        logger.warning(f"Stopping: {e}")
+        return JobStatus.QUEUED
+    except Exception as e:
+        # Embedding/DB errors are retried with backoff up to INGEST_MAX_ATTEMPTS; file errors fail at once
+        logger.exception(f"Job {job.id} failed")
+        retry = job.attempts + 1 < INGEST_MAX_ATTEMPTS and not isinstance(e, (OSError, IngestionError))
+        status = JobStatus.QUEUED if retry else JobStatus.FAILED
+        await asyncio.to_thread(_finish, engine, job, worker_id, status, f"{type(e).__name__}: {e}", True)
+        return status
+
+
+def _finish(
+    engine: Engine,
+    job: Any,
+    worker_id: str,
+    status: JobStatus,
+    error: str | None = None,
+    failed_attempt: bool = False,
+    backoff_sec: float = INGEST_RETRY_BACKOFF_SEC,
+) -> None:
+    """
+    Release the job with its final (or requeued) status.
+
+    ``failed_attempt`` counts the attempt and, for a requeue, holds the job back for ``backoff_sec`` doubled
+    per earlier failure. ``DONE`` swaps the staged chunks in for the book's live ones in the same transaction.
+    """
+    assignments = (
+        "status = :status, worker_id = NULL, error = :error, "
+        "finished_at = CASE WHEN :status IN ('done', 'failed') THEN now() END"
+    )
+    if failed_attempt:
+        assignments += (
+            ", attempts = attempts + 1, not_before = now() + make_interval(secs => :backoff_sec * power(2, attempts))"
+        )
+    with engine.begin() as conn:
+        try:
+            params = {"status": str(status), "error": error, "backoff_sec": backoff_sec}
+            _update_lease(conn, job.id, worker_id, assignments, params)
+        except LeaseLost:
+            return
+        if status is JobStatus.DONE:
+            _swap_staged_chunks(conn, job.book_id)
+            # New chunks are searchable now; query-side caches keyed on the version drop old results
+            conn.execute(text("UPDATE library_state SET version = version + 1, updated_at = now()"))
+        elif status is JobStatus.FAILED:
+            conn.execute(text("DELETE FROM chunks_staging WHERE book_id = :book_id"), {"book_id": job.book_id})
+
+
+def _swap_staged_chunks(conn: Any, book_id: int) -> None:
+    """Replace a book's chunks with its staged ones; readers see either version, never a partial book."""
+    drop_chunk_postings(conn, book_id)
+    params = {"book_id": book_id}
+    conn.execute(text("DELETE FROM chunks WHERE book_id = :book_id"), params)
+    conn.execute(
+        text(
+            """
+            INSERT INTO chunks (book_id, seq, content, metadata, embedding)
+            SELECT book_id, seq, content, metadata, embedding FROM chunks_staging WHERE book_id = :book_id
+            ORDER BY seq
+            """
+        ),
+        params,
+    )
+    conn.execute(text("DELETE FROM chunks_staging WHERE book_id = :book_id"), params)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def run_worker(
+    worker_id: str | None = None, stop: asyncio.Event | None = None, poll_sec: float = INGEST_POLL_SEC
+) -> None:
+    """Claim and run jobs until ``stop`` is set; idles ``poll_sec`` between empty claims."""
+    worker_id = worker_id or default_worker_id()
+    stop = stop or asyncio.Event()
+    engine = get_engine()
+    logger.info(f"Ingestion worker {worker_id} started (max {INGEST_MAX_RUNNING_JOBS} running job(s))")
+    while not stop.is_set():
+        job = await asyncio.to_thread(claim_job, worker_id, engine=engine)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=poll_sec)
+            except TimeoutError:
+                pass
+            continue
+        await run_job(job, worker_id, stop, engine)
+    logger.info(f"Ingestion worker {worker_id} stopped")
@@ -0,0 +1,199 @@
+import json
+
+
+class JsonObjectTracker:
+    """
+    Incrementally tracks brace nesting of the first top-level JSON object in a text stream.
+
+    Feed chunks as they arrive; once the object's closing brace is seen, ``complete`` turns True and
+    ``start``/``end`` hold its offsets in the concatenated stream. String contents and escapes are
+    respected, so braces inside JSON strings do not count.
+    """
+
+    def __init__(self) -> None:
+        self.start: int | None = None
+        self.end: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._consumed = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def feed(self, chunk: str) -> int | None:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk (str): Newly received text.
+
+        Returns:
+            int | None: Offset within ``chunk`` just past the closing brace, when the object completes in
+            this chunk; otherwise None (also after completion, for any further chunks).
+        """
+        if self.end is not None:
+            self._consumed += len(chunk)
+            return None
+
+        for i, ch in enumerate(chunk):
+            if self.start is None:
+                if ch == "{":
+                    self.start = self._consumed + i
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = self._consumed + i + 1
+                    self._consumed += len(chunk)
+                    return i + 1
+
+        self._consumed += len(chunk)
+        return None
+
+
+class JsonStringFieldStream:
+    """
+    Incrementally decodes one top-level string field (e.g. ``answer``) of the first JSON object in a stream.
+
+    Each character is looked at once, so following a long answer costs O(n) overall instead of re-parsing
+    the growing prefix on every chunk. Escapes split across chunks (``\\``, ``\\uXXXX``, surrogate pairs)
+    are held back until complete. Only the first occurrence of the field is followed.
+    """
+
+    _SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._expect_key = False
+        self._key: list[str] | None = None  # raw characters of the depth-1 key being read
+        self._last_key: str | None = None
+        self._expect_value = False
+        self._capturing = False
+        self._pending = ""  # incomplete escape sequence inside the captured value
+
+    def feed(self, chunk: str) -> str:
+        """Consume the next chunk; returns newly decoded characters of the field's value (maybe empty)."""
+        if self.done:
+            return ""
+        out: list[str] = []
+        for ch in chunk:
+            if self._capturing:
+                if self._capture(ch, out):
+                    self.done = True
+                    break
+                continue
+
+            if self._depth == 0:
+                # Like JsonObjectTracker, text before the first opening brace is not JSON
+                if ch == "{":
+                    self._depth, self._expect_key = 1, True
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key is not None:
+                        self._last_key, self._key = "".join(self._key), None
+                    continue
+                if self._key is not None:
+                    self._key.append(ch)
+                continue
+
+            if ch == '"':
+                if self._depth == 1 and self._expect_value and self._last_key == self.field:
+                    self._capturing = True
+                    continue
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key = []
+                    self._expect_key = False
+            elif ch in "{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1 and ch == "{"
+                self._expect_value = False
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                    break
+            elif self._depth == 1 and ch == ",":
+                self._expect_key, self._expect_value = True, False
+            elif self._depth == 1 and ch == ":":
+                self._expect_value = True
+            elif self._depth == 1 and not ch.isspace():
+                self._expect_value = False  # a non-string value
+        return "".join(out)
+
+    def _capture(self, ch: str, out: list[str]) -> bool:
+        """Decode one character of the captured string value into ``out``; True on its closing quote."""
+        if self._pending.startswith("\\u") and len(self._pending) >= 6:
+            # A complete high surrogate waiting for its low half; anything else leaves it unpaired
+            tail = self._pending[6:] + ch
+            if not "\\u".startswith(tail[:2]):
+                out.append("\ufffd")
+                self._pending = "\\" if len(tail) == 2 else ""
+                return self._capture(ch, out)
+        if self._pending or ch == "\\":
+            self._pending += ch
+            if len(self._pending) == 12 and _is_high_surrogate(self._pending[2:6]):
+                if not _is_low_surrogate(self._pending[8:12]):
+                    # A high surrogate followed by another \u escape: replace it, then decode the second alone
+                    out.append("\ufffd")
+                    self._pending = self._pending[6:]
+            decoded = self._decode_pending()
+            if decoded is not None:
+                out.append(decoded)
+                self._pending = ""
+            return False
+        if ch == '"':
+            return True
+        out.append(ch)
+        return False
+
+    def _decode_pending(self) -> str | None:
+        """Decoded escape once ``_pending`` holds a complete one, else None."""
+        esc = self._pending
+        if len(esc) < 2:
+            return None
+        if esc[1] != "u":
+            return self._SIMPLE_ESCAPES.get(esc[1], esc[1])
+        if len(esc) < 6:
+            return None
+        if _is_low_surrogate(esc[2:6]):
+            return "\ufffd"  # a low surrogate without its high half
+        if _is_high_surrogate(esc[2:6]) and len(esc) < 12:
+            return None  # high surrogate: wait for ``\\uDC00``-``\\uDFFF``
+        try:
+            return json.loads(f'"{esc}"')
+        except ValueError:
+            return "\ufffd"
+
+
+def _is_high_surrogate(hex_digits: str) -> bool:
+    return "d800" <= hex_digits.lower() < "dc00"
+
+
+def _is_low_surrogate(hex_digits: str) -> bool:
+    return "dc00" <= hex_digits.lower() < "e000"
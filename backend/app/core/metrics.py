@@ -0,0 +1,93 @@
+import threading
+from typing import Any
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics store (counters, gauges and summaries with labels).
+
+    Values live in memory per worker process and are exposed as JSON by the ``/metrics`` endpoint.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[LabelKey, float]] = {}
+        self._gauges: dict[str, dict[LabelKey, float]] = {}
+        self._summaries: dict[str, dict[LabelKey, dict[str, float]]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Increment a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge to an absolute value."""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one sample in a summary (count, sum, min, max)."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                series[key] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                summary["count"] += 1
+                summary["sum"] += value
+                summary["min"] = min(summary["min"], value)
+                summary["max"] = max(summary["max"], value)
+
+    def get_counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def get_summary(self, name: str, **labels: Any) -> dict[str, float] | None:
+        """Copy of one summary series (``count``, ``sum``, ``min``, ``max``), or None if never observed."""
+        with self._lock:
+            summary = self._summaries.get(name, {}).get(_label_key(labels))
+            return dict(summary) if summary is not None else None
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        JSON-friendly view of every series.
+
+        Returns:
+            dict: ``counters``, ``gauges`` and ``summaries`` keyed by metric name; each holds a list of
+            ``{"labels": {...}, ...values}`` entries. Summaries include a derived ``avg``.
+        """
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                    for name, series in self._gauges.items()
+                },
+                "summaries": {
+                    name: [{"labels": dict(k), **s, "avg": s["sum"] / s["count"]} for k, s in series.items()]
+                    for name, series in self._summaries.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+# Process-wide registry used by the core services
+metrics = MetricsRegistry()
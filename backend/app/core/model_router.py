@@ -1,4 +1,8 @@
+import json
 import logging
+import os
+from pathlib import Path
+from typing import Any
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +37,76 @@ LONG_QUERY_THRESHOLD = 150  # characters
 FAST_MODEL = "ollama:granite3-dense:2b"
 REASONING_MODEL = "ollama:qwen2.5:3b"
 
+# Routing table built from eval results by ``scripts/build_routing_table.py``; heuristics apply without it
+ROUTING_TABLE_PATH = os.getenv("ROUTING_TABLE_PATH", "")
+
+
+def query_bucket(query: str) -> str:
+    """
+    Feature bucket of a query, the key of the routing table: ``<short|long>:<simple|complex>``.
+
+    Uses the same length threshold and keyword list as the heuristics, so eval questions and live
+    queries land in the same buckets.
+    """
+    query_lower = query.lower()
+    length = "long" if len(query_lower) > LONG_QUERY_THRESHOLD else "short"
+    kind = "complex" if any(keyword in query_lower for keyword in COMPLEX_KEYWORDS) else "simple"
+    return f"{length}:{kind}"
+
+
+def load_routing_table(path: str | Path) -> dict[str, dict[str, Any]]:
+    """
+    Read the ``buckets`` section of a routing table file.
+
+    Returns:
+        dict: bucket -> entry with ``primary`` and ``fallback`` model names; empty if the file is
+        missing or invalid (the heuristics are used instead).
+    """
+    try:
+        with open(path) as f:
+            buckets = json.load(f)["buckets"]
+        if not isinstance(buckets, dict):
+            raise ValueError("'buckets' must be an object")
+        for bucket, entry in buckets.items():
+            if not isinstance(entry, dict) or not all(
+                isinstance(entry.get(key), str) and entry[key] for key in ("primary", "fallback")
+            ):
+                raise ValueError(f"bucket {bucket!r} needs string 'primary' and 'fallback'")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Routing table {path} not loaded ({e}); using heuristic routing")
+        return {}
+    logger.info(f"Loaded routing table {path} with {len(buckets)} bucket(s)")
+    return buckets
+
+
+# Loaded once at startup
+_routing_table: dict[str, dict[str, Any]] = load_routing_table(ROUTING_TABLE_PATH) if ROUTING_TABLE_PATH else {}
+
+
+def routed_models() -> list[str]:
+    """Every model ``get_model_for_query`` or ``get_fallback_model`` can return."""
+    models = {FAST_MODEL, REASONING_MODEL}
+    for entry in _routing_table.values():
+        models.update((entry["primary"], entry["fallback"]))
+    return sorted(models)
+
+
+def get_fallback_model(query: str, primary_model: str) -> str:
+    """
+    Model to retry with when ``primary_model`` fails for ``query``.
+
+    Args:
+        query (str): The user's question.
+        primary_model (str): The model that failed.
+
+    Returns:
+        str: The routing table's fallback for the query's bucket, else the other heuristic model.
+    """
+    entry = _routing_table.get(query_bucket(query)) if _routing_table else None
+    if entry is not None and entry["fallback"] != primary_model:
+        return entry["fallback"]
+    return REASONING_MODEL if primary_model == FAST_MODEL else FAST_MODEL
+
 
 def get_model_for_query(query: str) -> str:
     """
@@ -44,6 +118,15 @@ def get_model_for_query(query: str) -> str:
     Returns:
         str: The Ollama model string to use.
     """
+    bucket = query_bucket(query) if _routing_table else None
+    entry = _routing_table.get(bucket) if bucket else None
+    if entry is not None:
+        logger.info(
+            f"Routing to {entry['primary']} (Reason: routing table, bucket {bucket}, "
+            f"expected latency {entry.get('expected_latency_sec', float('nan')):.2f}s)"
+        )
+        return entry["primary"]
+
     query_lower = query.lower()
 
     # Rule 1: Length-based heuristic
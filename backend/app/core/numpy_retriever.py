@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Engine, text
+
+from app.schemas.retrieval import RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", "data/numpy_index")
+# Rows scored per block, so a large memory-mapped matrix never needs a full (queries x rows) score matrix
+SEARCH_BLOCK_ROWS = int(os.getenv("NUMPY_SEARCH_BLOCK_ROWS", "65536"))
+
+_MANIFEST_FILE = "manifest.json"
+
+
+def write_numpy_index(
+    out_dir: str | Path, embeddings: np.ndarray, chunks: Iterable[dict[str, Any]], version: str
+) -> None:
+    """
+    Write an index directory readable by ``NumpyRetriever``.
+
+    Args:
+        out_dir (str | Path): Target directory (created if missing; files are replaced).
+        embeddings (np.ndarray): ``(n, dim)`` matrix, one row per chunk; stored unit-normalized float32.
+        chunks (Iterable[dict]): ``RetrievedChunk`` fields except ``score``, in row order.
+        version (str): Library version reported by ``library_version()``.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    previous = _read_manifest(out) if (out / _MANIFEST_FILE).exists() else {}
+    # Data files get fresh names on every export, even at an unchanged version: a running retriever keeps
+    # reading (and memory-mapping) the files of the manifest it loaded, and rewriting a mapped file in place
+    # would truncate it under the reader (SIGBUS) until it sees the new manifest
+    suffix = f"{version}-{uuid.uuid4().hex[:8]}"
+    embeddings_file, chunks_file = f"embeddings-{suffix}.npy", f"chunks-{suffix}.jsonl"
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.save(out / embeddings_file, matrix / np.where(norms > 0, norms, 1.0))
+
+    count = 0
+    with open(out / chunks_file, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            count += 1
+    if count != len(matrix):
+        raise ValueError(f"{count} chunk records for {len(matrix)} embeddings")
+
+    manifest = {
+        "version": version,
+        "count": count,
+        "dim": int(matrix.shape[1]),
+        "embeddings": embeddings_file,
+        "chunks": chunks_file,
+    }
+    tmp = out / f"{_MANIFEST_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, out / _MANIFEST_FILE)
+
+    keep = {embeddings_file, chunks_file, previous.get("embeddings"), previous.get("chunks"), _MANIFEST_FILE}
+    for path in out.iterdir():
+        if path.name not in keep and path.name.startswith(("embeddings-", "chunks-")):
+            path.unlink()
+
+
+def _read_manifest(index_dir: Path) -> dict[str, Any]:
+    with open(index_dir / _MANIFEST_FILE) as f:
+        return json.load(f)
+
+
+def export_pgvector_index(engine: Engine, out_dir: str | Path) -> int:
+    """Snapshot ``chunks`` and ``library_state.version`` from Postgres into a NumPy index; returns the row count."""
+    with engine.connect() as conn:
+        version = str(conn.execute(text("SELECT version FROM library_state")).scalar_one())
+        rows = conn.execute(
+            text("SELECT id, book_id, seq, content, metadata, embedding::text AS embedding FROM chunks ORDER BY id")
+        ).mappings()
+        embeddings = []
+        chunks = []
+        for r in rows:
+            embeddings.append(json.loads(r["embedding"]))
+            chunks.append(
+                {
+                    "chunk_id": r["id"],
+                    "book_id": r["book_id"],
+                    "seq": r["seq"],
+                    "content": r["content"],
+                    "metadata": r["metadata"] or {},
+                }
+            )
+    write_numpy_index(out_dir, np.array(embeddings, dtype=np.float32), chunks, version)
+    return len(chunks)
+
+
+class NumpyRetriever:
+    """
+    Exact cosine top-k over a memory-mapped ``.npy`` matrix, a drop-in for ``PgVectorRetriever``.
+
+    Embeddings are stored unit-normalized, so cosine similarity is a plain dot product. Only the rows
+    of the results are read from the chunks JSONL file (via a line-offset table), and a new manifest version
+    is picked up on the next ``library_version()`` call.
+    """
+
+    def __init__(self, index_dir: str | Path = NUMPY_INDEX_DIR, block_rows: int = SEARCH_BLOCK_ROWS) -> None:
+        self.index_dir = Path(index_dir)
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._embeddings_file: str | None = None
+        self._matrix: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self._offsets: np.ndarray = np.empty(0, dtype=np.int64)
+        self._chunks_path = self.index_dir
+        self._load()
+
+    def _load(self) -> None:
+        manifest = _read_manifest(self.index_dir)
+        matrix = np.load(self.index_dir / manifest["embeddings"], mmap_mode="r")
+        chunks_path = self.index_dir / manifest["chunks"]
+
+        offsets = np.empty(manifest["count"], dtype=np.int64)
+        position = 0
+        with open(chunks_path, "rb") as f:
+            for i, line in enumerate(f):
+                offsets[i] = position
+                position += len(line)
+
+        if matrix.shape[0] != len(offsets):
+            raise ValueError(f"{self.index_dir}: {matrix.shape[0]} embeddings but {len(offsets)} chunk records")
+        with self._lock:
+            self._matrix, self._offsets, self._chunks_path = matrix, offsets, chunks_path
+            self._version = str(manifest["version"])
+            self._embeddings_file = manifest["embeddings"]
+        logger.info(f"Loaded NumPy index {self.index_dir} ({len(offsets)} chunks, version {self._version})")
+
+    def library_version(self) -> str:
+        manifest = _read_manifest(self.index_dir)
+        version = str(manifest["version"])
+        # A re-export at the same version has new files too; the ones loaded are removed by the export after it
+        if version != self._version or manifest["embeddings"] != self._embeddings_file:
+            self._load()
+        return version
+
+    def search(self, query_embedding: Sequence[float], k: int) -> list[RetrievedChunk]:
+        return self.search_batch([query_embedding], k)[0]
+
+    def search_batch(
+        self, query_embeddings: Sequence[Sequence[float]], k: int, reloaded: bool = False
+    ) -> list[list[RetrievedChunk]]:
+        """
+        Top-``k`` chunks for several queries with one pass over the matrix.
+
+        An export removes the files of all but the previous manifest, so a retriever that missed two exports
+        between ``library_version()`` checks finds its chunks file gone: it then loads the current manifest
+        and searches again (once).
+
+        Args:
+            query_embeddings (Sequence[Sequence[float]]): One embedding per query.
+            k (int): Results per query.
+            reloaded (bool): Set on the retry after such a reload.
+
+        Returns:
+            list[list[RetrievedChunk]]: Best chunks first, one list per query.
+        """
+        with self._lock:
+            matrix, offsets, chunks_path = self._matrix, self._offsets, self._chunks_path
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+        k = min(k, len(matrix))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(matrix), self.block_rows):
+            scores = queries @ matrix[start : start + self.block_rows].T
+            block_k = min(k, scores.shape[1])
+            # argpartition finds each row's top-k in O(rows) without sorting the whole block
+            top = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_ids = np.concatenate([best_ids, top + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+
+        try:
+            records = _read_records(chunks_path, offsets, np.unique(best_ids))
+        except FileNotFoundError:
+            if reloaded:
+                raise
+            logger.info(f"{chunks_path.name} was removed by a newer export; reloading {self.index_dir}")
+            self._load()
+            return self.search_batch(query_embeddings, k, reloaded=True)
+        return [
+            [RetrievedChunk(**records[int(row)], score=float(score)) for row, score in zip(ids, scores, strict=True)]
+            for ids, scores in zip(best_ids, best_scores, strict=True)
+        ]
+
+
+def _read_records(chunks_path: Path, offsets: np.ndarray, rows: np.ndarray) -> dict[int, dict[str, Any]]:
+    records = {}
+    with open(chunks_path, "rb") as f:
+        for row in rows:  # sorted by np.unique, so reads move forward through the file
+            f.seek(int(offsets[row]))
+            records[int(row)] = json.loads(f.readline())
+    return records
@@ -0,0 +1,101 @@
+import json
+import logging
+from typing import Any
+
+from pydantic import ValidationError
+from pydantic_ai import ModelRetry, RunContext
+
+from app.schemas.rag_response import RagResponse
+
+from .json_stream import JsonObjectTracker
+from .metrics import metrics
+from .rag_normalize import normalize_payload, normalize_text_output
+
+logger = logging.getLogger(__name__)
+
+# Same wording as PydanticAI's PromptedOutput template, so switching to the repair path does not change
+# what the model is asked to produce.
+SCHEMA_INSTRUCTIONS = (
+    "Always respond with a JSON object that's compatible with this schema:\n\n"
+    f"{json.dumps(RagResponse.model_json_schema())}\n\n"
+    "Don't include any text or Markdown fencing before or after."
+)
+
+NO_ANSWER_PLACEHOLDER = "No answer provided."
+
+
+def extract_json_object(text: str) -> str | None:
+    """
+    Return the first complete top-level ``{...}`` object in ``text`` (string/escape aware), or None.
+
+    Tolerates Markdown fences, leading prose and trailing text after the object.
+    """
+    tracker = JsonObjectTracker()
+    if tracker.feed(text) is None:
+        return None
+    return text[tracker.start : tracker.end]
+
+
+def repair_rag_output(text: str) -> tuple[RagResponse | None, str]:
+    """
+    Try to turn raw model text into a ``RagResponse`` without another generation.
+
+    Order: strict validation of the JSON object, then ``normalize_payload`` on it; plain prose (no JSON
+    attempt at all) goes through ``normalize_text_output``. Broken JSON or a payload without any
+    recognizable answer is not repaired.
+
+    Returns:
+        tuple: (response or None, outcome) where outcome is ``valid``, ``repaired_payload``,
+        ``repaired_text`` or ``unrepairable``.
+    """
+    candidate = extract_json_object(text)
+    if candidate is not None:
+        try:
+            parsed: Any = json.loads(candidate)
+        except json.JSONDecodeError:
+            return None, "unrepairable"
+        if not isinstance(parsed, dict):
+            return None, "unrepairable"
+
+        try:
+            return RagResponse.model_validate(parsed), "valid"
+        except ValidationError:
+            pass
+
+        normalized = normalize_payload(parsed)
+        if normalized["answer"] == NO_ANSWER_PLACEHOLDER:
+            return None, "unrepairable"
+        try:
+            return RagResponse.model_validate(normalized), "repaired_payload"
+        except ValidationError:
+            return None, "unrepairable"
+
+    if "{" in text or not text.strip():
+        # Started a JSON object that never closed, or produced nothing: regenerate
+        return None, "unrepairable"
+
+    return RagResponse.model_validate(normalize_text_output(text)), "repaired_text"
+
+
+def parse_rag_output(ctx: RunContext[Any], text: str) -> RagResponse:
+    """
+    Text output function for the agent: repair first, and only ask for a regeneration when repair fails.
+
+    Raising ``ModelRetry`` consumes one of the agent's ``retries`` (a full extra generation).
+    """
+    model_name = f"{ctx.model.system}:{ctx.model.model_name}" if ctx.model is not None else "unknown"
+    response, outcome = repair_rag_output(text)
+    metrics.inc("rag_output_parse_total", model=model_name, outcome=outcome)
+
+    if response is None:
+        metrics.inc("rag_output_regenerated_total", model=model_name)
+        logger.info(f"Output from {model_name} could not be repaired; requesting regeneration")
+        raise ModelRetry(
+            "Your response was not a valid JSON object for the required schema. "
+            "Respond again with only the JSON object."
+        )
+
+    if outcome != "valid":
+        metrics.inc("rag_output_repaired_total", model=model_name, method=outcome)
+        logger.info(f"Repaired output from {model_name} without regeneration ({outcome})")
+    return response
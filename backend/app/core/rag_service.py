@@ -1,45 +1,407 @@
+import asyncio
 import logging
+import os
+import random
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import nullcontext
+from functools import partial
 from typing import Any
 
-from .agent_factory import get_rag_agent
-from .model_router import FAST_MODEL, REASONING_MODEL
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart
+from pydantic_ai.run import AgentRunResult
+from pydantic_ai.usage import RunUsage
+
+from .agent_factory import DEFAULT_OUTPUT_MODE, OutputMode, get_rag_agent
+from .circuit_breaker import CircuitOpenError, admit, record_outcome
+from .executors import on_loop_stage, run_cpu
+from .json_stream import JsonObjectTracker, JsonStringFieldStream
+from .metrics import metrics
+from .model_router import get_fallback_model, get_model_for_query
+from .output_repair import repair_rag_output
+from .sessions import Session, sessions, turn_request
 
 logger = logging.getLogger(__name__)
 
+# Stop reading (and cancel the Ollama generation) once the RagResponse JSON object closes and validates
+STREAM_EARLY_STOP = os.getenv("RAG_STREAM_EARLY_STOP", "true").lower() in ("1", "true", "yes")
+# Fraction of streams read to the end anyway, to measure what early stopping saves per model
+STREAM_TAIL_SAMPLE_RATE = float(os.getenv("RAG_STREAM_TAIL_SAMPLE_RATE", "0.05"))
+
+
+def build_rag_prompt(user_query: str, context: str) -> str:
+    """Render the user turn sent to the model (same layout as the golden-set evals)."""
+    return f"""
+    Context:
+    {context}
+
+    Question:
+    {user_query}
+    """
+
+
+def _session_turn(session: Session | None, user_query: str, context: str) -> tuple[list[ModelMessage] | None, str]:
+    """
+    Message history and user turn for a request.
+
+    Follow-ups keep the session's history untouched (the cached prefix) and only carry passages the
+    session has not sent yet. A turn that would exceed ``SESSION_MAX_PROMPT_TOKENS`` starts the session over.
+    """
+    if session is not None and session.messages:
+        new_context = session.new_context(context) or "(No new passages; use the context from earlier turns.)"
+        prompt = build_rag_prompt(user_query, new_context)
+        if session.fits(prompt):
+            return session.messages, prompt
+        logger.info(f"Session {session.session_id} history exceeds the prompt budget; starting over")
+        session.reset()
+    return None, build_rag_prompt(user_query, context)
+
+
+def _record_session_turn(
+    session: Session,
+    turn: str,
+    model_name: str,
+    context: str,
+    new_messages: list[ModelMessage],
+    output_text: str,
+    duration: float,
+) -> None:
+    """Append a successful turn to the session and record first-turn vs follow-up latency."""
+    session.record_turn(model_name, context, turn_request(new_messages), output_text)
+    sessions.update()
+    metrics.inc("rag_session_turns_total", turn=turn, model=model_name)
+    metrics.observe("rag_session_turn_seconds", duration, turn=turn, model=model_name)
+    response = next((m for m in reversed(new_messages) if isinstance(m, ModelResponse)), None)
+    if response is not None and response.usage.input_tokens:
+        # Ollama reports the prompt tokens it evaluated; a prefix served from its cache is not re-evaluated
+        metrics.observe("rag_session_prompt_tokens", response.usage.input_tokens, turn=turn, model=model_name)
+
+
+async def _run_and_record(
+    agent: Agent,
+    model_name: str,
+    output_mode: OutputMode,
+    prompt: str,
+    message_history: list[ModelMessage] | None = None,
+) -> AgentRunResult:
+    """
+    Run one agent attempt and record request/retry counts and latency for this model and output mode.
+    The caller reports the outcome to the circuit breaker.
+
+    Every model request beyond the first is a validation retry (a full extra generation), so
+    ``rag_output_retries_total / rag_runs_total`` is the retry rate and ``rag_retry_overhead_seconds``
+    approximates the latency those retries added.
+    """
+    usage = RunUsage()
+    labels = {"model": model_name, "output_mode": output_mode}
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await agent.run(prompt, usage=usage, message_history=message_history)
+        outcome = "ok"
+        return result
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        retries = max(0, usage.requests - 1)
+        metrics.inc("rag_runs_total", model=model_name, output_mode=output_mode, outcome=outcome)
+        metrics.inc("rag_model_requests_total", usage.requests, **labels)
+        metrics.inc("rag_output_retries_total", retries, **labels)
+        metrics.observe("rag_run_seconds", duration, **labels)
+        if usage.requests:
+            metrics.observe("rag_retry_overhead_seconds", duration * retries / usage.requests, **labels)
 
-async def run_agent_with_fallback(user_query: str, context: str) -> Any:
+
+async def run_agent_with_fallback(
+    user_query: str, context: str, output_mode: OutputMode = None, session_id: str | None = None
+) -> Any:
     """
     Executes the RAG agent with a fallback mechanism.
-    If the first model fails (e.g., validation error), it retries with the alternate model.
+    If the first model fails (e.g., validation error), it retries with the alternate model. Models whose
+    circuit breaker is open are skipped without being called.
 
     Args:
         user_query (str): The user's question.
         context (str): The retrieved context from technical books.
+        output_mode (OutputMode, optional): PROMPTED or NATIVE; defaults to ``RAG_OUTPUT_MODE``.
+        session_id (str, optional): Conversation to continue. Its earlier turns are resent unchanged
+            (Ollama reuses their cached prompt evaluation) and it stays on the model that answered them.
 
     Returns:
         Any: The validated RagResponse object.
+
+    Raises:
+        CircuitOpenError: Both models' breakers are open.
     """
 
-    # Get agent (routing happens inside factory)
-    agent = get_rag_agent(user_query=user_query)
-    primary_model = agent.model_name
+    output_mode = OutputMode(output_mode or DEFAULT_OUTPUT_MODE)
+    session = sessions.get(session_id) if session_id else None
 
-    try:
-        logger.info(f"Executing primary model: {primary_model}")
-        result = await agent.run(user_query, deps=context)
-        return result.data
-
-    except Exception as e:
-        logger.warning(f"Primary model {primary_model} failed: {e}. Attempting fallback...")
-
-        # Determine fallback model
-        fallback_model = REASONING_MODEL if primary_model == FAST_MODEL else FAST_MODEL
-
-        try:
-            logger.info(f"Executing fallback model: {fallback_model}")
-            fallback_agent = get_rag_agent(model_name=fallback_model)
-            result = await fallback_agent.run(user_query, deps=context)
-            return result.data
-        except Exception as fallback_error:
-            logger.error(f"Fallback model {fallback_model} also failed: {fallback_error}")
-            raise fallback_error
+    # Turns of one session run one at a time so each extends the history the previous one left
+    async with session.lock if session is not None else nullcontext():
+        history, prompt = _session_turn(session, user_query, context)
+        turn = "follow_up" if history else "first"
+
+        primary_model = get_model_for_query(user_query)
+        if history and session.model_name:
+            primary_model = session.model_name
+        fallback_model = get_fallback_model(user_query, primary_model)
+        last_error: Exception | None = None
+
+        for model_name in (primary_model, fallback_model):
+            admission = admit(model_name)
+            if admission is None:
+                logger.warning(f"Circuit open for {model_name}; skipping it")
+                continue
+
+            # The admission may hold a half-open probe slot, so every exit below reports back to the breaker
+            start = None
+            ok = None  # no verdict unless the model was called and the run finished (not cancelled)
+            try:
+                if model_name == primary_model:
+                    logger.info(f"Executing primary model: {primary_model} (output mode: {output_mode})")
+                else:
+                    reason = "error" if last_error is not None else "circuit_open"
+                    metrics.inc("rag_fallbacks_total", primary=primary_model, fallback=fallback_model, reason=reason)
+                    logger.info(f"Executing fallback model: {fallback_model}")
+                agent = get_rag_agent(model_name=model_name, output_mode=output_mode)
+                start = time.perf_counter()
+                result = await _run_and_record(agent, model_name, output_mode, prompt, history)
+                ok = True
+            except Exception as e:
+                if start is not None:
+                    ok = False
+                last_error = e
+                if model_name == primary_model:
+                    logger.warning(f"Primary model {primary_model} failed: {e}. Attempting fallback...")
+                else:
+                    logger.error(f"Fallback model {fallback_model} also failed: {e}")
+                continue
+            finally:
+                record_outcome(model_name, admission, ok, time.perf_counter() - start if start is not None else 0.0)
+
+            if session is not None:
+                new_messages = result.new_messages()
+                output_text = "".join(p.content for p in new_messages[-1].parts if isinstance(p, TextPart))
+                duration = time.perf_counter() - start
+                _record_session_turn(session, turn, model_name, context, new_messages, output_text, duration)
+            return result.output
+
+        if last_error is None:
+            raise CircuitOpenError([primary_model, fallback_model])
+        raise last_error
+
+
+async def _text_deltas(result: Any, output_mode: OutputMode) -> AsyncIterator[str]:
+    """
+    Raw text deltas of a ``run_stream`` result.
+
+    PROMPTED runs are streamed with ``output_type=str``; NATIVE runs keep the agent's ``NativeOutput`` so
+    the schema is still sent as ``format``, and ``stream_text`` is unavailable, so new text is taken from
+    the growing response's text parts.
+    """
+    if output_mode is not OutputMode.NATIVE:
+        async for delta in result.stream_text(delta=True, debounce_by=None):
+            yield delta
+        return
+    seen: dict[int, int] = {}
+    async for response, _last in result.stream_responses(debounce_by=None):
+        for i, part in enumerate(response.parts):
+            if isinstance(part, TextPart) and len(part.content) > seen.get(i, 0):
+                yield part.content[seen.get(i, 0) :]
+                seen[i] = len(part.content)
+
+
+def _record_stream_savings(model_name: str, early_stopped: bool, tail: tuple[int, float] | None) -> None:
+    """
+    Output generated after the JSON object closed cannot be observed once we cancel, so sampled
+    full-length streams measure the tail per model and each early stop is credited with that average.
+
+    The tail is counted in stream deltas (text chunks as Ollama sends them, usually about one token each);
+    the usage of an early-stopped run only covers what was generated before the cancel.
+    """
+    if tail is not None:
+        tail_deltas, tail_sec = tail
+        metrics.observe("rag_stream_tail_deltas", tail_deltas, model=model_name)
+        metrics.observe("rag_stream_tail_seconds", tail_sec, model=model_name)
+
+    if not early_stopped:
+        return
+    metrics.inc("rag_stream_early_stops_total", model=model_name)
+    tail_deltas_summary = metrics.get_summary("rag_stream_tail_deltas", model=model_name)
+    tail_sec_summary = metrics.get_summary("rag_stream_tail_seconds", model=model_name)
+    if tail_deltas_summary and tail_sec_summary:
+        metrics.inc(
+            "rag_stream_saved_deltas_estimate_total",
+            tail_deltas_summary["sum"] / tail_deltas_summary["count"],
+            model=model_name,
+        )
+        metrics.inc(
+            "rag_stream_saved_seconds_estimate_total",
+            tail_sec_summary["sum"] / tail_sec_summary["count"],
+            model=model_name,
+        )
+
+
+async def _stream_model(
+    model_name: str,
+    prompt: str,
+    started: float,
+    history: list[ModelMessage] | None = None,
+    on_turn: Callable[[list[ModelMessage], str, float], None] | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Stream one model's output, yielding ``answer_delta`` events and finally a ``final`` or ``failed`` event.
+
+    Leaving the ``run_stream`` context early closes the HTTP stream, which makes Ollama abort the
+    generation and free its slot. ``on_turn(new_messages, generated_text, duration)`` is called before
+    ``final`` so a session can append the turn.
+    """
+    model_started = time.perf_counter()
+    output_mode = DEFAULT_OUTPUT_MODE
+    agent = get_rag_agent(model_name=model_name, output_mode=output_mode, repair=True)
+    # NATIVE keeps the agent's schema output so Ollama constrains decoding; PROMPTED is parsed by our repair
+    run_output_type = None if output_mode is OutputMode.NATIVE else str
+    tracker = JsonObjectTracker()
+    answer_stream = JsonStringFieldStream("answer")
+    measure_tail = random.random() < STREAM_TAIL_SAMPLE_RATE
+    parts: list[str] = []
+    sent_answer = False
+    deltas = 0
+    ttft = None
+    response = None
+    outcome = "unrepairable"
+    closed_at: tuple[int, float] | None = None
+    early_stopped = False
+
+    async with agent.run_stream(prompt, output_type=run_output_type, message_history=history) as result:
+        async for delta in _text_deltas(result, output_mode):
+            deltas += 1
+            if ttft is None:
+                ttft = time.perf_counter() - started
+                metrics.observe("rag_stream_ttft_seconds", ttft, model=model_name)
+                if on_turn is not None:
+                    # Mostly prompt evaluation: the follow-up vs first-turn gap is what the cached prefix saves
+                    turn = "follow_up" if history else "first"
+                    metrics.observe(
+                        "rag_session_ttft_seconds", time.perf_counter() - model_started, turn=turn, model=model_name
+                    )
+            parts.append(delta)
+            if closed_at is not None:
+                continue
+
+            with on_loop_stage("stream_parse"):
+                closed = tracker.feed(delta) is not None
+                answer_delta = answer_stream.feed(delta)
+            if answer_delta:
+                yield {"type": "answer_delta", "text": answer_delta}
+                sent_answer = True
+
+            if closed:
+                text = "".join(parts)
+                response, outcome = await run_cpu("repair_output", repair_rag_output, text[tracker.start : tracker.end])
+                if response is not None:
+                    closed_at = (deltas, time.perf_counter())
+                    if STREAM_EARLY_STOP and not measure_tail:
+                        early_stopped = True
+                        break
+        new_messages = result.new_messages()
+
+    tail = None
+    if closed_at is not None and not early_stopped:
+        tail = (deltas - closed_at[0], time.perf_counter() - closed_at[1])
+    if response is None:
+        response, outcome = await run_cpu("repair_output", repair_rag_output, "".join(parts))
+    _record_stream_savings(model_name, early_stopped, tail)
+    metrics.inc("rag_output_parse_total", model=model_name, outcome=outcome)
+
+    if response is None:
+        yield {"type": "failed", "model": model_name}
+        return
+
+    if not sent_answer:
+        # Plain-text or normalized answers never appeared as a JSON ``answer`` field while streaming
+        yield {"type": "answer_delta", "text": response.answer}
+    if on_turn is not None:
+        # The text as generated (up to an early stop) is what the model's cache now holds
+        on_turn(new_messages, "".join(parts), time.perf_counter() - model_started)
+    yield {
+        "type": "final",
+        "model": model_name,
+        "response": response.model_dump(),
+        "ttft": ttft,
+        "duration": time.perf_counter() - started,
+        "early_stop": early_stopped,
+    }
+
+
+async def stream_agent_response(
+    user_query: str, context: str, session_id: str | None = None
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Streaming counterpart of ``run_agent_with_fallback``.
+
+    Yields ``answer_delta`` events as the answer grows, then one ``final`` event with the validated
+    ``RagResponse``. If the primary model's output cannot be repaired, or its circuit breaker is open, a
+    ``fallback`` event is emitted and the alternate model is streamed; an ``error`` event ends the stream
+    if both fail or are open.
+
+    Args:
+        user_query (str): The user's question.
+        context (str): The retrieved context from technical books.
+        session_id (str, optional): Conversation to continue (see ``run_agent_with_fallback``).
+
+    Yields:
+        dict: Stream events (JSON-serializable).
+    """
+    session = sessions.get(session_id) if session_id else None
+
+    async with session.lock if session is not None else nullcontext():
+        history, prompt = _session_turn(session, user_query, context)
+        turn = "follow_up" if history else "first"
+        primary_model = get_model_for_query(user_query)
+        if history and session.model_name:
+            primary_model = session.model_name
+        fallback_model = get_fallback_model(user_query, primary_model)
+        started = time.perf_counter()
+        attempted = False
+
+        for model_name in (primary_model, fallback_model):
+            admission = admit(model_name)
+            if admission is None:
+                logger.warning(f"Circuit open for {model_name}; skipping it")
+                continue
+
+            model_started = time.perf_counter()
+            ok = None  # stays None if the client disconnects mid-stream: no verdict for the breaker
+            try:
+                if model_name == fallback_model:
+                    reason = "error" if attempted else "circuit_open"
+                    metrics.inc("rag_fallbacks_total", primary=primary_model, fallback=fallback_model, reason=reason)
+                    yield {"type": "fallback", "model": fallback_model, "reason": reason}
+
+                attempted = True
+                on_turn = partial(_record_session_turn, session, turn, model_name, context) if session else None
+                async for event in _stream_model(model_name, prompt, started, history, on_turn):
+                    if event["type"] == "failed":
+                        ok = False
+                        break
+                    if event["type"] == "final":
+                        ok = True
+                        yield event
+                        return
+                    yield event
+            except Exception as e:
+                ok = False
+                logger.warning(f"Streaming with {model_name} failed: {e}")
+            finally:
+                record_outcome(model_name, admission, ok, time.perf_counter() - model_started)
+
+        if not attempted:
+            error = CircuitOpenError([primary_model, fallback_model])
+            yield {"type": "error", "detail": f"{error}; retry in {error.retry_after_sec:.0f}s."}
+            return
+        yield {"type": "error", "detail": "No model produced a valid response."}
@@ -0,0 +1,202 @@
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from collections.abc import Awaitable
+from typing import Any
+
+import httpx
+
+from .embeddings import ollama_api_base
+from .executors import run_cpu
+from .metrics import metrics
+from .model_router import routed_models
+
+logger = logging.getLogger(__name__)
+
+# Modules kept off the import path of app.main; warm-up imports them in a worker thread after startup
+HEAVY_MODULES = ("app.core.rag_service", "app.core.retrieval")
+READY_CHECK_TIMEOUT_SEC = float(os.getenv("READY_CHECK_TIMEOUT_SEC", "2"))
+# Load the routed models into Ollama during warm-up, so the first request does not pay the cold load
+WARM_MODELS = os.getenv("READY_WARM_MODELS", "true").lower() in ("1", "true", "yes")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Minimum gap between background reloads of unloaded models, so a server that cannot hold every routed
+# model at once (OLLAMA_MAX_LOADED_MODELS) is not made to swap them on every probe
+READY_REWARM_INTERVAL_SEC = float(os.getenv("READY_REWARM_INTERVAL_SEC", "300"))
+
+
+def _ollama_name(model_name: str) -> str:
+    """``ollama:qwen2.5:3b`` -> ``qwen2.5:3b`` (Ollama reports untagged models as ``:latest``)."""
+    name = model_name.removeprefix("ollama:")
+    return name if ":" in name else f"{name}:latest"
+
+
+def required_models() -> list[str]:
+    """Ollama models that must be available for readiness (``READY_MODELS``, default: every routed model)."""
+    configured = os.getenv("READY_MODELS")
+    names = configured.split(",") if configured else routed_models()
+    return sorted({_ollama_name(n.strip()) for n in names if n.strip()})
+
+
+class StartupState:
+    """Startup timeline: per-step durations of the warm-up and when the replica first became ready."""
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.steps: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.ready_after_sec: float | None = None
+        # Routed models have been loaded once (by the warm-up step or a later retry); until then /ready fails
+        # so a replica does not get traffic while it is still cold-loading them
+        self.models_warm = not WARM_MODELS
+
+    def record(self, step: str, seconds: float) -> None:
+        self.steps[step] = seconds
+        metrics.set_gauge("startup_step_seconds", seconds, step=step)
+        logger.info(f"Startup step {step} took {seconds * 1000:.0f}ms")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"steps": self.steps, "errors": self.errors, "ready_after_sec": self.ready_after_sec}
+
+
+startup = StartupState()
+
+
+async def _timed_step(name: str, coro: Awaitable[Any]) -> bool:
+    start = time.perf_counter()
+    try:
+        await coro
+    except Exception as e:
+        startup.errors[name] = str(e)
+        logger.warning(f"Startup step {name} failed: {e}")
+        return False
+    startup.errors.pop(name, None)
+    startup.record(name, time.perf_counter() - start)
+    return True
+
+
+async def _import_heavy_modules() -> None:
+    for module in HEAVY_MODULES:
+        await asyncio.to_thread(importlib.import_module, module)
+
+
+async def _open_retriever() -> None:
+    from .retrieval import get_retrieval_service
+
+    # First library_version() call opens a pooled DB connection (or maps the NumPy index)
+    await asyncio.to_thread(get_retrieval_service().retriever.library_version)
+
+
+async def _load_models(names: list[str] | None = None) -> None:
+    async with httpx.AsyncClient(base_url=ollama_api_base(), timeout=None) as client:
+        for name in names if names is not None else required_models():
+            response = await client.post("/api/generate", json={"model": name, "keep_alive": OLLAMA_KEEP_ALIVE})
+            response.raise_for_status()
+
+
+_rewarm_task: asyncio.Task | None = None
+_last_rewarm = float("-inf")
+
+
+async def _rewarm(names: list[str]) -> None:
+    try:
+        await _load_models(names)
+        metrics.inc("ready_model_rewarms_total")
+        startup.models_warm = True
+    except Exception as e:
+        logger.warning(f"Re-warming {', '.join(names)} failed: {e}")
+
+
+def _schedule_rewarm(names: list[str]) -> None:
+    """Reload models Ollama unloaded (keep-alive expiry, eviction) in the background, one batch at a time."""
+    global _rewarm_task, _last_rewarm
+    if not WARM_MODELS or (_rewarm_task is not None and not _rewarm_task.done()):
+        return
+    if time.monotonic() - _last_rewarm < READY_REWARM_INTERVAL_SEC:
+        return
+    _last_rewarm = time.monotonic()
+    logger.info(f"Re-warming unloaded models: {', '.join(names)}")
+    _rewarm_task = asyncio.create_task(_rewarm(names))
+
+
+async def warm_up() -> None:
+    """
+    Run after the server is accepting connections: import the agent stack, start the CPU executor, open
+    the retriever and load the routed models. Failures are recorded and left to ``/ready`` to report.
+    """
+    await _timed_step("import_agent_stack", _import_heavy_modules())
+    # Spawning process-pool workers takes hundreds of ms; pay it here rather than on the first request
+    await _timed_step("start_cpu_executor", run_cpu("warm_up", int))
+    await _timed_step("open_retriever", _open_retriever())
+    if WARM_MODELS:
+        startup.models_warm = await _timed_step("load_models", _load_models())
+    await check_ready()
+
+
+async def _check_retriever() -> str:
+    if "app.core.retrieval" not in sys.modules:
+        return "not imported"
+    from .retrieval import get_retrieval_service
+
+    await asyncio.wait_for(
+        asyncio.to_thread(get_retrieval_service().retriever.library_version), READY_CHECK_TIMEOUT_SEC
+    )
+    return "ok"
+
+
+async def _check_models() -> str:
+    """
+    The routed models are installed in Ollama (``/api/tags``) and, with ``READY_WARM_MODELS``, were loaded
+    once at startup: until the warm-up's ``load_models`` step succeeds the check fails. After that, being
+    loaded is not required: keep-alive expiry or ``OLLAMA_MAX_LOADED_MODELS`` eviction only costs a cold
+    load, so unloaded models are re-warmed in the background instead of failing readiness.
+    """
+    async with httpx.AsyncClient(base_url=ollama_api_base(), timeout=READY_CHECK_TIMEOUT_SEC) as client:
+        tags = await client.get("/api/tags")
+        tags.raise_for_status()
+        ps = await client.get("/api/ps")
+        ps.raise_for_status()
+    required = required_models()
+    installed = {m["name"] for m in tags.json().get("models", [])}
+    missing = [m for m in required if m not in installed]
+    if missing:
+        return f"not available: {', '.join(missing)}"
+    loaded = {m["name"] for m in ps.json().get("models", [])}
+    unloaded = [m for m in required if m not in loaded]
+    metrics.set_gauge("ready_models_unloaded", len(unloaded))
+    if not startup.models_warm:
+        if "load_models" not in startup.errors:
+            return "loading"  # the warm-up is loading them; a second load would only compete with it
+        # The warm-up load failed: retry it in the background (rate-limited) and stay unready meanwhile
+        _schedule_rewarm(required)
+        return f"warm-up failed: {startup.errors['load_models']}"
+    if unloaded:
+        _schedule_rewarm(unloaded)
+    return "ok"
+
+
+async def check_ready() -> dict[str, Any]:
+    """
+    Readiness: agent stack imported, retriever reachable (DB pool or NumPy index) and routed models available.
+
+    Returns:
+        dict: ``ready`` flag, per-check status and the startup timeline.
+    """
+    checks: dict[str, str] = {
+        "agent_stack": "ok" if all(m in sys.modules for m in HEAVY_MODULES) else "not imported",
+    }
+    for name, check in (("retriever", _check_retriever), ("models", _check_models)):
+        try:
+            checks[name] = await check()
+        except Exception as e:
+            checks[name] = f"error: {type(e).__name__}: {e}"
+
+    ready = all(status == "ok" for status in checks.values())
+    if ready and startup.ready_after_sec is None:
+        startup.ready_after_sec = time.perf_counter() - startup.started_at
+        metrics.set_gauge("startup_ready_seconds", startup.ready_after_sec)
+        logger.info(f"Replica ready {startup.ready_after_sec:.2f}s after startup")
+    metrics.set_gauge("ready", 1 if ready else 0)
+    return {"ready": ready, "checks": checks, "startup": startup.snapshot()}
@@ -0,0 +1,172 @@
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Sequence
+from typing import Protocol
+
+from app.schemas.retrieval import RetrievedChunk
+
+from .metrics import metrics
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RERANKER = os.getenv("RERANKER", "off")  # off | lexical | cross-encoder
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "4"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+CROSS_ENCODER_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+_TOKEN_RE = re.compile(r"[\w.]+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by de del el en es for from how in is it la las los of on or que the to un una what "
+    "when where which who why with y".split()
+)
+
+
+class Reranker(Protocol):
+    def score(self, query: str, passages: Sequence[str]) -> list[float]:
+        """Relevance score per passage (higher is better); scores must be comparable across calls."""
+        ...
+
+
+class LexicalReranker:
+    """
+    BM25-style term-frequency scoring of query terms in each passage, pure Python.
+
+    Uses a fixed average document length instead of per-batch statistics, so scores from different
+    batches stay comparable when the budget cuts scoring short.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_len: float = 200.0) -> None:
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = avg_doc_len
+
+    @staticmethod
+    def _terms(text: str) -> list[str]:
+        return [t for t in _TOKEN_RE.findall(text.casefold()) if t not in _STOPWORDS]
+
+    def score(self, query: str, passages: Sequence[str]) -> list[float]:
+        q_terms = set(self._terms(query))
+        if not q_terms:
+            return [0.0] * len(passages)
+
+        scores = []
+        for passage in passages:
+            terms = self._terms(passage)
+            tf = Counter(terms)
+            norm = self.k1 * (1 - self.b + self.b * len(terms) / self.avg_doc_len)
+            score = 0.0
+            for t in q_terms:
+                f = tf.get(t, 0)
+                if f:
+                    # Longer terms (identifiers, error codes) are rarer and more discriminative
+                    score += (1 + math.log(len(t))) * f * (self.k1 + 1) / (f + norm)
+            scores.append(score)
+        return scores
+
+
+class CrossEncoderReranker:
+    """Cross-encoder scoring on CPU (requires the optional ``sentence-transformers`` package)."""
+
+    def __init__(self, model_name: str = CROSS_ENCODER_MODEL, batch_size: int = RERANK_BATCH_SIZE) -> None:
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "RERANKER=cross-encoder requires `sentence-transformers` (uv add sentence-transformers)"
+            ) from e
+        self._model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def score(self, query: str, passages: Sequence[str]) -> list[float]:
+        pairs = [(query, p) for p in passages]
+        return [float(s) for s in self._model.predict(pairs, batch_size=self.batch_size)]
+
+
+class BudgetedRerank:
+    """
+    Rerank candidates within a deadline, keeping only the best ``top_n``.
+
+    The per-candidate cost is tracked as a moving average, so the number of candidates scored adapts to
+    the time left before the deadline. Candidates that do not fit in the budget keep their retrieval
+    order behind the scored ones. Safe to share between the threads that run concurrent requests.
+    """
+
+    def __init__(self, reranker: Reranker, name: str, batch_size: int = RERANK_BATCH_SIZE) -> None:
+        self.reranker = reranker
+        self.name = name
+        self.batch_size = batch_size
+        self._sec_per_candidate = 0.0005  # prior, replaced by measurements
+        self._lock = threading.Lock()
+
+    def rerank(
+        self, query: str, candidates: list[RetrievedChunk], top_n: int, deadline: float | None = None
+    ) -> list[RetrievedChunk]:
+        """
+        Args:
+            query (str): The user's question.
+            candidates (list[RetrievedChunk]): Retrieval output, best first.
+            top_n (int): Number of chunks to pass on to the agent.
+            deadline (float, optional): ``time.monotonic()`` instant by which the request needs reranking
+                finished. Reranking stops at this or at now + ``RERANK_BUDGET_MS``, whichever comes first.
+
+        Returns:
+            list[RetrievedChunk]: At most ``top_n`` chunks, best first.
+        """
+        if len(candidates) <= top_n:
+            return candidates
+
+        start = time.monotonic()
+        budget_end = start + RERANK_BUDGET_MS / 1000
+        deadline = budget_end if deadline is None else min(deadline, budget_end)
+        with self._lock:
+            sec_per_candidate = self._sec_per_candidate
+        affordable = int(max(0.0, deadline - start) / sec_per_candidate)
+        # Scoring fewer than top_n cannot change which chunks are kept
+        limit = min(len(candidates), affordable) if affordable > top_n else 0
+
+        scored: list[tuple[float, RetrievedChunk]] = []
+        for i in range(0, limit, self.batch_size):
+            if i and time.monotonic() >= deadline:
+                break
+            batch = candidates[i : min(i + self.batch_size, limit)]
+            batch_start = time.monotonic()
+            scores = self.reranker.score(query, [c.content for c in batch])
+            per_candidate = (time.monotonic() - batch_start) / len(batch)
+            with self._lock:
+                self._sec_per_candidate = 0.7 * self._sec_per_candidate + 0.3 * max(per_candidate, 1e-6)
+            scored.extend(zip(scores, batch, strict=True))
+
+        ranked = [c for _, c in sorted(scored, key=lambda sc: sc[0], reverse=True)]
+        kept = (ranked + candidates[len(scored) :])[:top_n]
+
+        elapsed = time.monotonic() - start
+        saved_tokens = sum(estimate_tokens(c.content) for c in candidates) - sum(
+            estimate_tokens(c.content) for c in kept
+        )
+        metrics.observe("rerank_seconds", elapsed, reranker=self.name)
+        metrics.observe("rerank_candidates_scored", len(scored), reranker=self.name)
+        metrics.observe("rerank_prompt_tokens_saved", saved_tokens, reranker=self.name)
+        if len(scored) < len(candidates):
+            metrics.inc("rerank_budget_truncations_total", reranker=self.name)
+        logger.info(
+            f"Reranked {len(scored)}/{len(candidates)} candidates with {self.name} in {elapsed * 1000:.1f}ms "
+            f"(~{saved_tokens} prompt tokens dropped)"
+        )
+        return kept
+
+
+def reranker_from_env() -> BudgetedRerank | None:
+    """Build the configured rerank stage, or None when ``RERANKER=off``."""
+    if RERANKER == "lexical":
+        return BudgetedRerank(LexicalReranker(), name="lexical")
+    if RERANKER == "cross-encoder":
+        return BudgetedRerank(CrossEncoderReranker(), name="cross-encoder")
+    return None
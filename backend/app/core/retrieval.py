@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Protocol
+
+from sqlalchemy import Engine, text
+
+from app.schemas.retrieval import RetrievedChunk
+
+from .db import get_engine
+from .embeddings import embed_texts
+from .entity_graph import EntityGraph, graph_from_env, should_expand
+from .executors import on_loop_stage, run_cpu
+from .metrics import metrics
+from .reranker import RERANK_CANDIDATES, RERANK_TOP_N, BudgetedRerank, reranker_from_env
+from .retrieval_cache import RetrievalCache, cache_from_env, normalize_query
+from .vector_index import EMBEDDING_DIM, StorageMode, ann_order_by
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+# How long a library version read is trusted before asking the backend again
+VERSION_CHECK_INTERVAL_SEC = float(os.getenv("RETRIEVAL_VERSION_CHECK_SEC", "5"))
+VECTOR_STORAGE_MODE = StorageMode(os.getenv("VECTOR_STORAGE_MODE", StorageMode.FULL))
+# Quantized modes fetch k * factor ANN candidates, then re-score them against the float32 column
+RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "pgvector")  # pgvector | numpy
+
+
+class Retriever(Protocol):
+    """Vector search backend. Implementations must be swappable behind ``RetrievalService``."""
+
+    def search(self, query_embedding: Sequence[float], k: int) -> list[RetrievedChunk]:
+        """Top-``k`` chunks by cosine similarity, best first."""
+        ...
+
+    def library_version(self) -> str:
+        """Opaque version of the indexed library; changes whenever chunks are (re)ingested."""
+        ...
+
+
+def _vector_literal(embedding: Sequence[float]) -> str:
+    return "[" + ",".join(f"{x:.7g}" for x in embedding) + "]"
+
+
+class PgVectorRetriever:
+    """
+    Cosine top-k over ``chunks.embedding`` using a pgvector HNSW index.
+
+    In ``halfvec`` / ``binary`` storage modes the ANN pass runs on the quantized index and a second pass
+    re-scores ``k * rescore_factor`` candidates at full precision.
+    """
+
+    def __init__(
+        self,
+        engine: Engine | None = None,
+        storage_mode: StorageMode = VECTOR_STORAGE_MODE,
+        rescore_factor: int = RESCORE_FACTOR,
+        dim: int = EMBEDDING_DIM,
+        table: str = "chunks",
+    ) -> None:
+        self._engine = engine
+        self.table = table
+        self.storage_mode = StorageMode(storage_mode)
+        self.rescore_factor = rescore_factor
+        self.dim = dim
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            self._engine = get_engine()
+        return self._engine
+
+    def search(self, query_embedding: Sequence[float], k: int) -> list[RetrievedChunk]:
+        if self.storage_mode is StorageMode.FULL:
+            candidates = k
+            sql = text(
+                f"""
+                SELECT id, book_id, seq, content, metadata, 1 - (embedding <=> CAST(:q AS vector)) AS score
+                FROM {self.table}
+                ORDER BY embedding <=> CAST(:q AS vector)
+                LIMIT :k
+                """
+            )
+        else:
+            candidates = k * self.rescore_factor
+            sql = text(
+                f"""
+                SELECT id, book_id, seq, content, metadata, 1 - (embedding <=> CAST(:q AS vector)) AS score
+                FROM (
+                    SELECT id, book_id, seq, content, metadata, embedding
+                    FROM {self.table}
+                    ORDER BY {ann_order_by(self.storage_mode, self.dim)}
+                    LIMIT :candidates
+                ) AS ann
+                ORDER BY embedding <=> CAST(:q AS vector)
+                LIMIT :k
+                """
+            )
+        params = {"q": _vector_literal(query_embedding), "k": k, "candidates": candidates}
+        with self.engine.begin() as conn:
+            # HNSW returns at most ef_search rows; make sure the candidate pass is not cut short
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, candidates)}"))
+            rows = conn.execute(sql, params).mappings().all()
+        return [
+            RetrievedChunk(
+                chunk_id=r["id"],
+                book_id=r["book_id"],
+                seq=r["seq"],
+                content=r["content"],
+                score=float(r["score"]),
+                metadata=r["metadata"] or {},
+            )
+            for r in rows
+        ]
+
+    def library_version(self) -> str:
+        with self.engine.connect() as conn:
+            return str(conn.execute(text("SELECT version FROM library_state")).scalar_one())
+
+
+class RetrievalService:
+    """
+    Query-side retrieval: cache lookup, query embedding, vector search and optional reranking.
+
+    The exact-key cache check happens before the embedding call, so repeated questions cost neither an
+    embedding nor a search; paraphrases are caught by the embedding nearest-neighbour lookup. With a
+    reranker, a wider candidate set is fetched (and cached) and only the best ``k`` are returned.
+
+    With an entity graph, queries that ``should_expand`` get up to ``GRAPH_MAX_CHUNKS`` graph neighbours
+    appended after the vector hits (``metadata["via"] == "graph"``); they are cached with them and, with a
+    reranker, compete for the final ``k``.
+    """
+
+    def __init__(
+        self,
+        retriever: Retriever,
+        cache: RetrievalCache | None = None,
+        embed: Callable[[list[str]], Awaitable[list[list[float]]]] = embed_texts,
+        reranker: BudgetedRerank | None = None,
+        rerank_candidates: int = RERANK_CANDIDATES,
+        graph: EntityGraph | None = None,
+    ) -> None:
+        self.retriever = retriever
+        self.cache = cache
+        self.reranker = reranker
+        self.graph = graph
+        self.rerank_candidates = rerank_candidates
+        self._embed = embed
+        self._version: str | None = None
+        self._version_checked_at = 0.0
+
+    async def library_version(self) -> str:
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at > VERSION_CHECK_INTERVAL_SEC:
+            self._version = await asyncio.to_thread(self.retriever.library_version)
+            self._version_checked_at = now
+        return self._version
+
+    async def retrieve(self, query: str, k: int | None = None, deadline: float | None = None) -> list[RetrievedChunk]:
+        """
+        Top-``k`` chunks for ``query``.
+
+        Args:
+            query (str): The user's question.
+            k (int, optional): Number of chunks to return. Defaults to ``RERANK_TOP_N`` when reranking,
+                else ``RETRIEVAL_TOP_K``.
+            deadline (float, optional): ``time.monotonic()`` instant the request needs retrieval done by;
+                reranking scores fewer candidates when little time is left.
+
+        Returns:
+            list[RetrievedChunk]: Best chunks first.
+        """
+        if self.reranker is None:
+            return await self._candidates(query, k or DEFAULT_TOP_K)
+        k = k or RERANK_TOP_N
+        candidates = await self._candidates(query, max(k, self.rerank_candidates))
+        # Thread pool even in process mode: a cross-encoder model does not pickle
+        return await run_cpu("rerank", self.reranker.rerank, query, candidates, k, deadline, process_safe=False)
+
+    async def _candidates(self, query: str, k: int) -> list[RetrievedChunk]:
+        start = time.perf_counter()
+        version = await self.library_version()
+        key = f"{normalize_query(query)}|k={k}"
+
+        if self.cache is not None:
+            cached = self.cache.get_exact(version, key)
+            if cached is not None:
+                metrics.observe("retrieval_seconds", time.perf_counter() - start, source="cache_exact")
+                return cached
+
+        [embedding] = await self._embed([query])
+
+        if self.cache is not None:
+            with on_loop_stage("cache_lookup"):
+                cached = self.cache.get_nearest(version, embedding, min_results=k)
+            if cached is not None:
+                metrics.observe("retrieval_seconds", time.perf_counter() - start, source="cache_semantic")
+                # The paraphrase may have been cached with a larger k, or expanded when this query would not;
+                # store what this key returns
+                results = _take(cached, k, graph=self.graph is not None and should_expand(query))
+                self.cache.put(version, key, embedding, results)
+                return results
+
+        results = await asyncio.to_thread(self.retriever.search, embedding, k)
+        if self.graph is not None and should_expand(query):
+            results += await self.graph.neighbours(query, embedding, results)
+        if self.cache is not None:
+            self.cache.put(version, key, embedding, results)
+        metrics.observe("retrieval_seconds", time.perf_counter() - start, source="search")
+        return results
+
+
+def _take(chunks: list[RetrievedChunk], k: int, graph: bool = True) -> list[RetrievedChunk]:
+    """First ``k`` vector hits of a cached list, plus the graph neighbours stored with them when ``graph``."""
+    neighbours = [c for c in chunks if c.metadata.get("via") == "graph"] if graph else []
+    return [c for c in chunks if c.metadata.get("via") != "graph"][:k] + neighbours
+
+
+def format_context(chunks: list[RetrievedChunk]) -> str:
+    """Join retrieved chunks into the context block sent to the agent."""
+    return "\n\n---\n\n".join(c.content for c in chunks)
+
+
+_service: RetrievalService | None = None
+
+
+def retriever_from_env() -> Retriever:
+    """Search backend selected by ``RETRIEVER_BACKEND``: pgvector (default) or the in-process NumPy index."""
+    if RETRIEVER_BACKEND == "numpy":
+        from .numpy_retriever import NumpyRetriever
+
+        return NumpyRetriever()
+    return PgVectorRetriever()
+
+
+def get_retrieval_service() -> RetrievalService:
+    """Process-wide service with backend, cache and reranker configured from the environment."""
+    global _service
+    if _service is None:
+        cache = cache_from_env() if os.getenv("RETRIEVAL_CACHE", "true").lower() in ("1", "true", "yes") else None
+        _service = RetrievalService(
+            retriever_from_env(), cache=cache, reranker=reranker_from_env(), graph=graph_from_env()
+        )
+    return _service
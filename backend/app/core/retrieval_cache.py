@@ -0,0 +1,180 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.schemas.retrieval import RetrievedChunk
+
+from .metrics import metrics
+
+# Rough per-object overhead used when estimating entry sizes (dict/model bookkeeping)
+_CHUNK_OVERHEAD_BYTES = 200
+
+
+def normalize_query(query: str) -> str:
+    """Exact-key form of a query: case-folded, whitespace-collapsed, trailing punctuation dropped."""
+    return " ".join(query.casefold().split()).rstrip("?!.¿¡ ")
+
+
+@dataclass
+class _CacheEntry:
+    results: list[RetrievedChunk]
+    embedding: np.ndarray | None  # unit-normalized float32, None when stored without an embedding
+    size_bytes: int
+
+
+class RetrievalCache:
+    """
+    Bounded LRU cache of retrieval results, scoped to a library version.
+
+    Lookups go exact-key first (normalized query text, no embedding call needed), then optionally
+    nearest-neighbour on the query embedding (paraphrases above ``similarity_threshold``). When the
+    library version changes (re-ingestion), every entry is dropped on the next access. Accesses with an
+    older version than the cache holds (a request that read the version before the change) miss and
+    store nothing, so they cannot wipe or repopulate the cache with stale results.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        similarity_threshold: float | None = 0.97,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._version: str | None = None
+        self._lock = threading.Lock()
+        # Stacked embeddings for NN lookup, rebuilt lazily after inserts/evictions
+        self._matrix: np.ndarray | None = None
+        self._matrix_keys: list[str] = []
+
+    def _check_version(self, version: str) -> bool:
+        """Move to ``version`` if it differs and is not older; False if it is older than the cached one."""
+        if self._version == version:
+            return True
+        if self._version is not None and _is_older(version, self._version):
+            metrics.inc("retrieval_cache_stale_version_total")
+            return False
+        if self._entries:
+            metrics.inc("retrieval_cache_invalidations_total")
+        self._entries.clear()
+        self._bytes = 0
+        self._matrix = None
+        self._version = version
+        return True
+
+    def _record(self, result: str) -> None:
+        metrics.inc("retrieval_cache_lookups_total", result=result)
+
+    def get_exact(self, version: str, key: str) -> list[RetrievedChunk] | None:
+        with self._lock:
+            if not self._check_version(version):
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._record("exact_hit")
+            return entry.results
+
+    def get_nearest(self, version: str, embedding: list[float], min_results: int = 0) -> list[RetrievedChunk] | None:
+        """
+        Return the results of the most similar cached query, if its cosine similarity clears the threshold
+        and it holds at least ``min_results`` vector hits (graph neighbours stored with them do not count).
+        """
+        with self._lock:
+            if not self._check_version(version) or self.similarity_threshold is None:
+                self._record("miss")
+                return None
+
+            if self._matrix is None:
+                self._matrix_keys = [k for k, e in self._entries.items() if e.embedding is not None]
+                self._matrix = (
+                    np.stack([self._entries[k].embedding for k in self._matrix_keys]) if self._matrix_keys else None
+                )
+            if self._matrix is None:
+                self._record("miss")
+                return None
+
+            query = _unit(embedding)
+            if query.shape[0] != self._matrix.shape[1]:
+                self._record("miss")
+                return None
+            sims = self._matrix @ query
+            best = int(np.argmax(sims))
+            key = self._matrix_keys[best]
+            if sims[best] < self.similarity_threshold or _vector_hits(self._entries[key].results) < min_results:
+                self._record("miss")
+                return None
+
+            self._entries.move_to_end(key)
+            self._record("semantic_hit")
+            return self._entries[key].results
+
+    def put(self, version: str, key: str, embedding: list[float] | None, results: list[RetrievedChunk]) -> None:
+        vec = _unit(embedding) if embedding is not None else None
+        size = sum(len(c.content) + _CHUNK_OVERHEAD_BYTES for c in results) + (vec.nbytes if vec is not None else 0)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if not self._check_version(version):
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size_bytes
+            self._entries[key] = _CacheEntry(results=results, embedding=vec, size_bytes=size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size_bytes
+                metrics.inc("retrieval_cache_evictions_total")
+            self._matrix = None
+            metrics.set_gauge("retrieval_cache_entries", len(self._entries))
+            metrics.set_gauge("retrieval_cache_bytes", self._bytes)
+
+    def stats(self) -> dict[str, float]:
+        """Entry count, memory estimate and hit rate since process start."""
+        hits = metrics.get_counter("retrieval_cache_lookups_total", result="exact_hit") + metrics.get_counter(
+            "retrieval_cache_lookups_total", result="semantic_hit"
+        )
+        misses = metrics.get_counter("retrieval_cache_lookups_total", result="miss")
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+
+
+def _vector_hits(results: list[RetrievedChunk]) -> int:
+    return sum(1 for c in results if c.metadata.get("via") != "graph")
+
+
+def _is_older(version: str, current: str) -> bool:
+    """Whether ``version`` precedes ``current``; versions are compared as integers when both are numeric."""
+    try:
+        return int(version) < int(current)
+    except ValueError:
+        return False
+
+
+def _unit(embedding: list[float]) -> np.ndarray:
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+def cache_from_env() -> RetrievalCache:
+    """Build the cache from ``RETRIEVAL_CACHE_*`` variables (similarity 0 disables NN lookup)."""
+    similarity = float(os.getenv("RETRIEVAL_CACHE_SIMILARITY", "0.97"))
+    return RetrievalCache(
+        max_entries=int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(float(os.getenv("RETRIEVAL_CACHE_MAX_MB", "32")) * 1024 * 1024),
+        similarity_threshold=similarity if similarity > 0 else None,
+    )
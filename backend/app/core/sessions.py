@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+from .metrics import metrics
+from .tokens import estimate_tokens
+
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "256"))
+# Total characters of history held across all sessions (roughly bytes for the mostly-ASCII prompts)
+SESSION_MAX_CHARS = int(os.getenv("SESSION_MAX_MB", "64")) * 2**20
+SESSION_TTL_SEC = float(os.getenv("SESSION_TTL_SEC", "1800"))
+# Context window Ollama runs the models with: its default (4096 in current releases) unless the server sets
+# OLLAMA_CONTEXT_LENGTH. The OpenAI-compatible API the agent talks to cannot pass num_ctx per request, so
+# this describes the server rather than configuring it
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+# Part of the window kept free for the answer (plus chat-template tokens and estimate error)
+SESSION_ANSWER_RESERVE_TOKENS = int(os.getenv("SESSION_ANSWER_RESERVE_TOKENS", "1024"))
+# A turn that would push the history past this starts the session over. Beyond num_ctx Ollama drops the
+# front of the prompt (system prompt and output instructions), losing the cached prefix and the schema
+SESSION_MAX_PROMPT_TOKENS = int(
+    os.getenv("SESSION_MAX_PROMPT_TOKENS", str(OLLAMA_NUM_CTX - SESSION_ANSWER_RESERVE_TOKENS))
+)
+
+# Separator between retrieved passages (``format_context``)
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+@dataclass
+class Session:
+    """
+    One conversation: the exact messages already sent to (and generated by) its model.
+
+    Follow-up turns append to ``messages`` without rewriting anything before them, so the prompt Ollama
+    sees starts with the tokens still in its KV cache from the previous turn and only the new turn is
+    evaluated.
+    """
+
+    session_id: str
+    model_name: str | None = None
+    messages: list[ModelMessage] = field(default_factory=list)
+    seen_passages: set[int] = field(default_factory=set)
+    chars: int = 0
+    tokens: int = 0
+    turns: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def turn_kind(self) -> str:
+        return "follow_up" if self.messages else "first"
+
+    def new_context(self, context: str) -> str:
+        """Passages of ``context`` this session has not sent yet (earlier ones are already in the history)."""
+        passages = [p for p in context.split(CONTEXT_SEPARATOR) if hash(p) not in self.seen_passages]
+        return CONTEXT_SEPARATOR.join(passages)
+
+    def record_turn(self, model_name: str, context: str, request: ModelRequest, output_text: str) -> None:
+        """Append a completed turn: the request as sent and the raw text the model generated."""
+        self.model_name = model_name
+        self.messages += [request, ModelResponse(parts=[TextPart(output_text)], model_name=model_name)]
+        self.seen_passages.update(hash(p) for p in context.split(CONTEXT_SEPARATOR))
+        texts = [
+            part.content for m in self.messages for part in m.parts if isinstance(getattr(part, "content", None), str)
+        ]
+        self.chars = sum(len(t) for t in texts)
+        self.tokens = sum(estimate_tokens(t) for t in texts)
+        self.turns += 1
+
+    def fits(self, prompt: str) -> bool:
+        """Whether ``prompt`` can be appended without exceeding ``SESSION_MAX_PROMPT_TOKENS``."""
+        return self.tokens + estimate_tokens(prompt) <= SESSION_MAX_PROMPT_TOKENS
+
+    def reset(self) -> None:
+        """Drop the history; the next turn is a first turn again (same model)."""
+        self.messages = []
+        self.seen_passages = set()
+        self.chars = self.tokens = 0
+        metrics.inc("rag_session_resets_total")
+
+
+def turn_request(messages: list[ModelMessage]) -> ModelRequest:
+    """
+    The request a run added for this turn: the first one after the prior history, which holds the system
+    prompt on a first turn and the user prompt. Validation retries that followed are not kept, so the next
+    turn's prefix is the canonical exchange.
+    """
+    for message in messages:
+        if isinstance(message, ModelRequest) and any(isinstance(p, UserPromptPart) for p in message.parts):
+            return message
+    raise ValueError("run produced no user request")
+
+
+class SessionStore:
+    """
+    In-process LRU of sessions, bounded by count (``SESSION_MAX_COUNT``), total history size
+    (``SESSION_MAX_MB``) and idle time (``SESSION_TTL_SEC``).
+    """
+
+    def __init__(
+        self, max_count: int = SESSION_MAX_COUNT, max_chars: int = SESSION_MAX_CHARS, ttl_sec: float = SESSION_TTL_SEC
+    ) -> None:
+        self.max_count = max_count
+        self.max_chars = max_chars
+        self.ttl_sec = ttl_sec
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session:
+        """Existing session (marked most recently used) or a new empty one."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                session = Session(session_id)
+            session.last_used = time.monotonic()
+            self._sessions[session_id] = session
+            self._evict()
+            return session
+
+    def update(self) -> None:
+        """Re-apply the memory bound after a session's history grew."""
+        with self._lock:
+            self._evict()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_sec
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= cutoff:
+                break
+            self._drop(oldest.session_id, "ttl")
+
+    def _evict(self) -> None:
+        while len(self._sessions) > self.max_count:
+            self._drop(next(iter(self._sessions)), "count")
+        while len(self._sessions) > 1 and sum(s.chars for s in self._sessions.values()) > self.max_chars:
+            self._drop(next(iter(self._sessions)), "memory")
+        metrics.set_gauge("rag_sessions_active", len(self._sessions))
+        metrics.set_gauge("rag_sessions_chars", sum(s.chars for s in self._sessions.values()))
+
+    def _drop(self, session_id: str, reason: str) -> None:
+        del self._sessions[session_id]
+        metrics.inc("rag_session_evictions_total", reason=reason)
+
+
+sessions = SessionStore()
@@ -0,0 +1,3 @@
+def estimate_tokens(text: str) -> int:
+    """Cheap prompt-token estimate (~4 characters per token for English/Spanish technical prose)."""
+    return max(1, len(text) // 4)
@@ -0,0 +1,48 @@
+import os
+from enum import StrEnum
+
+from sqlalchemy import Engine, text
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+
+
+class StorageMode(StrEnum):
+    """Representation indexed by HNSW; the float32 ``embedding`` column is always kept for re-scoring."""
+
+    FULL = "full"  # vector(d), 4 bytes/dim
+    HALFVEC = "halfvec"  # halfvec(d), 2 bytes/dim
+    BINARY = "binary"  # bit(d) via binary_quantize, 1 bit/dim, Hamming distance
+
+
+def ann_index_name(mode: StorageMode, table: str = "chunks") -> str:
+    return f"{table}_embedding_{mode}_hnsw"
+
+
+def ann_index_ddl(mode: StorageMode, table: str = "chunks", dim: int = EMBEDDING_DIM) -> str:
+    """``CREATE INDEX`` statement for the HNSW index of a storage mode (expression index, no extra column)."""
+    name = ann_index_name(mode, table)
+    if mode is StorageMode.HALFVEC:
+        expr, ops = f"(embedding::halfvec({dim}))", "halfvec_cosine_ops"
+    elif mode is StorageMode.BINARY:
+        expr, ops = f"(binary_quantize(embedding)::bit({dim}))", "bit_hamming_ops"
+    else:
+        expr, ops = "embedding", "vector_cosine_ops"
+    return f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING hnsw ({expr} {ops})"
+
+
+def ann_order_by(mode: StorageMode, dim: int = EMBEDDING_DIM) -> str:
+    """``ORDER BY`` expression that lets the planner use the mode's index (``:q`` is the query vector text)."""
+    if mode is StorageMode.HALFVEC:
+        return f"embedding::halfvec({dim}) <=> CAST(:q AS halfvec({dim}))"
+    if mode is StorageMode.BINARY:
+        return f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize(CAST(:q AS vector({dim})))"
+    return "embedding <=> CAST(:q AS vector)"
+
+
+def rebuild_ann_index(engine: Engine, mode: StorageMode, table: str = "chunks", dim: int = EMBEDDING_DIM) -> None:
+    """Create the index for ``mode`` and drop the other modes' indexes (only one is kept in memory)."""
+    with engine.begin() as conn:
+        for other in StorageMode:
+            if other is not mode:
+                conn.execute(text(f"DROP INDEX IF EXISTS {ann_index_name(other, table)}"))
+        conn.execute(text(ann_index_ddl(mode, table, dim)))
@@ -1,12 +1,50 @@
+import asyncio
+import json
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+# logfire registers a pydantic plugin entry point that pydantic loads (importing all of logfire) the first
+# time FastAPI builds a model; the app does not use it, so keep it off the startup path. Must be set before
+# pydantic loads plugins; set PYDANTIC_DISABLE_PLUGINS= (empty) to re-enable.
+os.environ.setdefault("PYDANTIC_DISABLE_PLUGINS", "logfire-plugin")
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.executors import LoopLagMonitor, shutdown_executors
+from app.core.metrics import metrics
+from app.core.readiness import check_ready, warm_up
+from app.schemas.ask import AskRequest
+from app.schemas.ingestion import IngestionJob, IngestRequest
+from app.schemas.rag_response import RagResponse
+
+# The agent stack (pydantic_ai, provider SDKs) and retrieval (SQLAlchemy, NumPy) are imported inside the
+# handlers and by the post-startup warm-up, so the server binds its port without waiting for them.
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Time from entering /ask or /ask/stream by which retrieval, reranking included, should be done; the
+# reranker scores only as many candidates as fit in what is left (and at most RERANK_BUDGET_MS)
+RETRIEVAL_DEADLINE_MS = float(os.getenv("RETRIEVAL_DEADLINE_MS", "500"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    warm_up_task.cancel()
+    lag_monitor.stop()
+    shutdown_executors()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/")
@@ -16,4 +54,102 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    """Liveness: the process is up and serving. Says nothing about the DB or models."""
     return {"status": "ok, PepoRAG backend is running"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness: 200 once the agent stack is imported, the retriever is reachable and the routed models are
+    installed and were loaded by the startup warm-up (later unloads are re-warmed in the background).
+    """
+    result = await check_ready()
+    return JSONResponse(result, status_code=200 if result["ready"] else 503)
+
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
+
+def _request_deadline() -> float:
+    """``time.monotonic()`` instant retrieval for the request being handled must finish by."""
+    return time.monotonic() + RETRIEVAL_DEADLINE_MS / 1000
+
+
+async def _resolve_context(request: AskRequest, deadline: float) -> str:
+    if request.context is not None:
+        return request.context
+    from app.core.retrieval import format_context, get_retrieval_service
+
+    chunks = await get_retrieval_service().retrieve(request.question, deadline=deadline)
+    return format_context(chunks)
+
+
+@app.post("/ask", response_model=RagResponse)
+async def ask(request: AskRequest):
+    deadline = _request_deadline()
+    from app.core.rag_service import run_agent_with_fallback
+
+    context = await _resolve_context(request, deadline)
+    try:
+        return await run_agent_with_fallback(request.question, context, session_id=request.session_id)
+    except CircuitOpenError as e:
+        logger.warning(f"Query rejected: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="All models are temporarily unavailable.",
+            headers={"Retry-After": str(max(1, round(e.retry_after_sec)))},
+        ) from e
+    except Exception as e:
+        logger.error(f"Query failed: {e}")
+        raise HTTPException(status_code=502, detail="No model produced a valid response.") from e
+
+
+@app.post("/ask/stream")
+async def ask_stream(request: AskRequest):
+    """Newline-delimited JSON events: ``answer_delta`` chunks, then ``final`` (or ``error``)."""
+    deadline = _request_deadline()
+    from app.core.rag_service import stream_agent_response
+
+    context = await _resolve_context(request, deadline)
+
+    async def events():
+        async for event in stream_agent_response(request.question, context, session_id=request.session_id):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.post("/ingest", response_model=IngestionJob, status_code=202)
+async def ingest(request: IngestRequest):
+    """Queue a library book for ingestion; a worker (``scripts/ingest_worker.py``) picks it up."""
+    from app.core.ingestion import IngestionError, JobInProgressError, enqueue_book
+
+    try:
+        return await asyncio.to_thread(enqueue_book, request.path, request.title, request.author)
+    except JobInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except IngestionError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+
+@app.get("/ingest/jobs", response_model=list[IngestionJob])
+async def ingestion_jobs(status: str | None = None, limit: int = 50):
+    from app.core.ingestion import JobStatus, list_jobs
+
+    if status is not None and status not in list(JobStatus):
+        raise HTTPException(status_code=422, detail=f"Unknown status {status!r}")
+    return await asyncio.to_thread(list_jobs, status, min(limit, 500))
+
+
+@app.get("/ingest/jobs/{job_id}", response_model=IngestionJob)
+async def ingestion_job(job_id: int):
+    """Per-book progress: chunks committed, total, throughput and ETA of the running attempt."""
+    from app.core.ingestion import get_job
+
+    job = await asyncio.to_thread(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No ingestion job {job_id}")
+    return job
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+
+class AskRequest(BaseModel):
+    """
+    Request body for the query endpoints.
+    When ``context`` is omitted, passages are retrieved from the indexed library.
+    """
+
+    question: str = Field(..., min_length=1, description="The user's question.")
+    context: str | None = Field(None, description="Explicit passages to ground the answer on (skips retrieval).")
+    session_id: str | None = Field(
+        None,
+        max_length=128,
+        description="Client-chosen conversation id. Follow-ups reuse the model's cached prompt from earlier turns.",
+    )
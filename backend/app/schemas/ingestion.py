@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class IngestRequest(BaseModel):
+    """Request body for queueing a book that is already in the library directory."""
+
+    path: str = Field(..., min_length=1, description="Book file path relative to INGEST_LIBRARY_DIR (.md or .txt).")
+    title: str | None = Field(None, description="Display title (defaults to the file name).")
+    author: str | None = Field(None, description="Book author.")
+
+
+class IngestionJob(BaseModel):
+    """Progress of one book's ingestion job."""
+
+    job_id: int
+    book_id: int
+    title: str
+    path: str
+    status: str = Field(..., description="queued, running, done or failed.")
+    chunks_done: int = Field(..., description="Chunks committed so far (a resumed job keeps them).")
+    total_chunks: int | None = Field(None, description="Known once a worker has chunked the book.")
+    percent: float | None = None
+    chunks_per_sec: float | None = Field(None, description="Throughput of the current attempt while running.")
+    eta_sec: float | None = Field(None, description="Remaining chunks at the current throughput.")
+    attempts: int = Field(0, description="Failed attempts so far.")
+    retry_at: datetime | None = Field(None, description="A job requeued after a failure is not retried before this.")
+    worker_id: str | None = None
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
@@ -0,0 +1,14 @@
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class RetrievedChunk(BaseModel):
+    """A chunk returned by a retriever, with its similarity score (higher is better)."""
+
+    chunk_id: int = Field(..., description="Primary key of the chunk.")
+    book_id: int = Field(..., description="Book the chunk belongs to.")
+    seq: int = Field(..., description="Position of the chunk within its book.")
+    content: str = Field(..., description="Chunk text passed to the model as context.")
+    score: float = Field(..., description="Cosine similarity to the query embedding.")
+    metadata: dict[str, Any] = Field(default_factory=dict, description="Headings, page numbers, etc.")
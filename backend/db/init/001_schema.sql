@@ -0,0 +1,36 @@
+-- PepoRAG core schema. Mounted into the db container's /docker-entrypoint-initdb.d, so it runs once
+-- on an empty data volume; statements are idempotent so it can also be applied by hand with psql.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS books (
+    id          SERIAL PRIMARY KEY,
+    title       TEXT NOT NULL,
+    author      TEXT,
+    path        TEXT NOT NULL UNIQUE,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- One row per chunk; embeddings from nomic-embed-text (768 dimensions)
+CREATE TABLE IF NOT EXISTS chunks (
+    id          BIGSERIAL PRIMARY KEY,
+    book_id     INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    seq         INTEGER NOT NULL,
+    content     TEXT NOT NULL,
+    metadata    JSONB NOT NULL DEFAULT '{}'::jsonb,
+    embedding   vector(768) NOT NULL,
+    UNIQUE (book_id, seq)
+);
+
+-- Full-precision HNSW index. For VECTOR_STORAGE_MODE=halfvec|binary, app.core.vector_index.rebuild_ann_index
+-- swaps it for an expression index on the quantized form; this column stays float32 for re-scoring.
+CREATE INDEX IF NOT EXISTS chunks_embedding_full_hnsw ON chunks USING hnsw (embedding vector_cosine_ops);
+
+-- Single-row library version; ingestion bumps it so query-side caches invalidate automatically
+CREATE TABLE IF NOT EXISTS library_state (
+    id          BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version     BIGINT NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO library_state DEFAULT VALUES ON CONFLICT DO NOTHING;
@@ -0,0 +1,33 @@
+-- Entity graph for multi-hop retrieval (ADR-006 Phase 3), filled offline by scripts/build_entity_graph.py.
+-- Idempotent like 001_schema.sql; apply by hand with psql on an existing volume.
+
+-- Entities extracted from chunks; name is the normalized (lower-case, trimmed) surface form
+CREATE TABLE IF NOT EXISTS entities (
+    id           SERIAL PRIMARY KEY,
+    name         TEXT NOT NULL UNIQUE,
+    kind         TEXT,
+    chunk_count  INTEGER NOT NULL DEFAULT 0
+);
+
+-- Entity ids mentioned by each chunk; NULL means not extracted yet (the build job resumes from these)
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS entity_ids INTEGER[];
+-- Relations extracted from each chunk as an n x 2 array of entity ids
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS relation_pairs INTEGER[];
+
+-- Build-time edge list, recomputed from the chunks above on every build (co-occurrence within a chunk
+-- plus extracted relations, weights summed per pair, hub entities left out), so deleted chunks drop out
+CREATE TABLE IF NOT EXISTS entity_edges (
+    src     INTEGER NOT NULL REFERENCES entities (id) ON DELETE CASCADE,
+    dst     INTEGER NOT NULL REFERENCES entities (id) ON DELETE CASCADE,
+    weight  REAL NOT NULL,
+    PRIMARY KEY (src, dst)
+);
+
+-- Query-time form: one row per entity, its strongest neighbours and the chunks mentioning it as
+-- parallel arrays sorted by weight, so a one-hop expansion reads a handful of rows
+CREATE TABLE IF NOT EXISTS entity_adjacency (
+    entity_id  INTEGER PRIMARY KEY REFERENCES entities (id) ON DELETE CASCADE,
+    neighbors  INTEGER[] NOT NULL,
+    weights    REAL[] NOT NULL,
+    chunk_ids  BIGINT[] NOT NULL
+);
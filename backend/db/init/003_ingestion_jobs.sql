@@ -0,0 +1,46 @@
+-- Ingestion job queue, drained by scripts/ingest_worker.py (app.core.ingestion).
+-- Idempotent like 001_schema.sql; apply by hand with psql on an existing volume.
+
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id                BIGSERIAL PRIMARY KEY,
+    book_id           INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    status            TEXT NOT NULL DEFAULT 'queued'
+                      CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    -- sha256 of the file at enqueue time; a resumed job whose file changed starts over
+    checksum          TEXT NOT NULL,
+    total_chunks      INTEGER,
+    -- Highest chunk seq committed so far; a reclaimed job continues after it
+    committed_seq     INTEGER NOT NULL DEFAULT -1,
+    -- Lease: the worker holding the job and its last sign of life
+    worker_id         TEXT,
+    heartbeat_at      TIMESTAMPTZ,
+    -- Failed attempts (errors and lost workers); a job handed back on shutdown does not count
+    attempts          INTEGER NOT NULL DEFAULT 0,
+    -- Retry backoff: a job requeued after a failed attempt is not claimed before this time
+    not_before        TIMESTAMPTZ,
+    -- Progress of the current attempt, for throughput and ETA
+    run_started_at    TIMESTAMPTZ,
+    run_start_seq     INTEGER NOT NULL DEFAULT -1,
+    error             TEXT,
+    created_at        TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at       TIMESTAMPTZ
+);
+
+-- At most one pending or running job per book
+CREATE UNIQUE INDEX IF NOT EXISTS ingestion_jobs_active_book
+    ON ingestion_jobs (book_id) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS ingestion_jobs_queued ON ingestion_jobs (created_at) WHERE status = 'queued';
+
+-- Volumes created before the retry backoff existed
+ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS not_before TIMESTAMPTZ;
+
+-- A job's chunks are written here and replace the book's rows in chunks in the job's final transaction, so a
+-- re-ingested book keeps serving its previous version until the new one is complete
+CREATE TABLE IF NOT EXISTS chunks_staging (
+    book_id     INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    seq         INTEGER NOT NULL,
+    content     TEXT NOT NULL,
+    metadata    JSONB NOT NULL DEFAULT '{}'::jsonb,
+    embedding   vector(768) NOT NULL,
+    PRIMARY KEY (book_id, seq)
+);
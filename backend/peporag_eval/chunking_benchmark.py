@@ -0,0 +1,116 @@
+"""
+Compare the structure-aware chunker with naive fixed-size splitting on Markdown/text documents.
+
+For each strategy reports chunks/sec, the chunk-size distribution, how many chunks fall below the
+minimum size (each one still costs an embedding and an index entry), how many cut a code fence in
+half, and the tracemalloc peak while streaming the input.
+"""
+
+import datetime
+import json
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from app.core.chunker import Chunk, ChunkStats, chunk_text
+from app.core.tokens import estimate_tokens
+from peporag_eval.paths import benchmark_output_dir, repo_root
+
+
+def naive_chunks(lines: Iterable[str], max_tokens: int, overlap_tokens: int) -> Iterator[Chunk]:
+    """Fixed-size character windows with overlap, ignoring document structure (the baseline)."""
+    size, overlap = max_tokens * 4, overlap_tokens * 4
+    buf = ""
+    seq = 0
+    for line in lines:
+        buf += line if line.endswith("\n") else line + "\n"
+        while len(buf) >= size:
+            text = buf[:size]
+            yield Chunk(seq, text, estimate_tokens(text), (), ("text",))
+            seq += 1
+            buf = buf[size - overlap :]
+    if buf.strip():
+        yield Chunk(seq, buf, estimate_tokens(buf), (), ("text",))
+
+
+def _open_lines(paths: list[Path], repeat: int) -> Iterator[str]:
+    for _ in range(repeat):
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                yield from f
+
+
+def run_strategy(
+    name: str, chunker: Callable[[Iterable[str]], Iterator[Chunk]], paths: list[Path], repeat: int, min_tokens: int
+) -> dict[str, Any]:
+    stats = ChunkStats()
+    below_min = 0
+    split_fences = 0
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for chunk in chunker(_open_lines(paths, repeat)):
+        stats.add(chunk)
+        below_min += chunk.tokens < min_tokens
+        split_fences += sum(line.lstrip().startswith(("```", "~~~")) for line in chunk.text.splitlines()) % 2
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "strategy": name,
+        **stats.summary(elapsed),
+        "seconds": elapsed,
+        "below_min_tokens": below_min,
+        "split_code_fences": split_fences,
+        "peak_memory_bytes": peak,
+    }
+    print(
+        f"  {name:<10} {stats.count:>7} chunks  {result['chunks_per_sec']:>10,.0f} chunks/s  "
+        f"p50 {result['p50_tokens']:>4}  p95 {result['p95_tokens']:>4}  max {stats.max_tokens:>4} tokens  "
+        f"<min {below_min:>5}  split fences {split_fences:>4}  peak {peak / 1024:>8.1f} KiB"
+    )
+    return result
+
+
+def default_corpus() -> list[Path]:
+    """Markdown shipped with the repo, used when no book paths are given."""
+    return sorted((repo_root() / "docs").rglob("*.md")) + [repo_root() / "README.md"]
+
+
+def main(
+    paths: list[Path] | None = None,
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+    min_tokens: int = 128,
+    repeat: int = 1,
+) -> None:
+    paths = paths or default_corpus()
+    size = sum(p.stat().st_size for p in paths) * repeat
+    print(f"Chunking {len(paths)} file(s) x{repeat} ({size / 2**20:.1f} MiB), budget {max_tokens} tokens")
+
+    strategies = {
+        "structure": lambda lines: chunk_text(lines, max_tokens, overlap_tokens, min_tokens),
+        "naive": lambda lines: naive_chunks(lines, max_tokens, overlap_tokens),
+    }
+    results = [run_strategy(name, fn, paths, repeat, min_tokens) for name, fn in strategies.items()]
+
+    ts = datetime.datetime.now()
+    output_file = benchmark_output_dir() / f"chunking_{ts.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "timestamp": ts.isoformat(),
+                "inputs": [str(p) for p in paths],
+                "input_bytes": size,
+                "max_tokens": max_tokens,
+                "overlap_tokens": overlap_tokens,
+                "min_tokens": min_tokens,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults saved in {output_file}")
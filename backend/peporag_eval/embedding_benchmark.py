@@ -0,0 +1,216 @@
+"""
+Ollama /api/embed benchmark: texts/sec and latency per model, batch size, input length and concurrency.
+
+Inputs are chunks of the repo docs cut by the production chunker at each target length, so the numbers
+match what ingestion (large batches of ``CHUNK_MAX_TOKENS`` chunks) and query embedding (one short text)
+send. The summary picks, per model, the batch size and concurrency with the best ingestion throughput
+and the single-query latency, to choose ``EMBEDDING_MODEL`` and ``INGEST_BATCH_SIZE`` from data.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import requests
+
+from app.core.chunker import chunk_text
+from app.core.tokens import estimate_tokens
+from peporag_eval.chunking_benchmark import default_corpus
+from peporag_eval.ollama_benchmark import OLLAMA_API_URL, REQUEST_TIMEOUT_SEC
+from peporag_eval.paths import embedding_benchmark_results_path
+
+OLLAMA_EMBED_URL = os.getenv("OLLAMA_EMBED_URL", OLLAMA_API_URL.rsplit("/api/", 1)[0] + "/api/embed")
+EMBED_MODELS = ["nomic-embed-text", "mxbai-embed-large", "all-minilm"]
+EMBED_BATCH_SIZES = (1, 8, 16, 32, 64)
+# Target chunk sizes; 512 is the default CHUNK_MAX_TOKENS, 32 a typical question
+EMBED_INPUT_TOKENS = (32, 128, 512)
+EMBED_CONCURRENCY = (1, 2, 4)
+# Requests per concurrent client per point
+EMBED_ITERATIONS = 3
+
+
+def input_pool(target_tokens: int, chunks: list[str], size: int) -> list[str]:
+    """``size`` texts of about ``target_tokens`` each, from the corpus chunked at that budget."""
+    texts = []
+    for text in chunks:
+        for chunk in chunk_text(text.splitlines(), target_tokens, 0, target_tokens // 2):
+            if chunk.tokens >= target_tokens // 2:
+                texts.append(chunk.text)
+        if len(texts) >= size:
+            break
+    if not texts:
+        raise ValueError(f"Corpus has no passages of about {target_tokens} tokens")
+    return (texts * (size // len(texts) + 1))[:size]
+
+
+def _timed_embed(model: str, texts: list[str]) -> dict[str, float]:
+    start = time.perf_counter()
+    response = requests.post(OLLAMA_EMBED_URL, json={"model": model, "input": texts}, timeout=REQUEST_TIMEOUT_SEC)
+    response.raise_for_status()
+    latency = time.perf_counter() - start
+    body = response.json()
+    if len(body.get("embeddings", [])) != len(texts):
+        raise RuntimeError(f"{model} returned {len(body.get('embeddings', []))} embeddings for {len(texts)} inputs")
+    return {
+        "latency": latency,
+        "load": body.get("load_duration", 0) / 1e9,
+        "server": body.get("total_duration", 0) / 1e9,
+        "tokens": body.get("prompt_eval_count", 0),
+    }
+
+
+def _run_point(
+    model: str, pool: list[str], batch_size: int, concurrency: int, iterations: int
+) -> tuple[list[dict[str, float]], float]:
+    """``concurrency`` clients each send ``iterations`` batches, every batch a different slice of ``pool``."""
+
+    def client(index: int) -> list[dict[str, float]]:
+        samples = []
+        for i in range(iterations):
+            offset = ((index * iterations + i) * batch_size) % len(pool)
+            batch = (pool[offset:] + pool)[:batch_size]
+            samples.append(_timed_embed(model, batch))
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool_executor:
+        samples = [s for batch in pool_executor.map(client, range(concurrency)) for s in batch]
+    return samples, time.perf_counter() - start
+
+
+def _summarize(samples: list[dict[str, float]], wall: float, batch_size: int) -> dict[str, float]:
+    latencies = [s["latency"] for s in samples]
+    texts = len(samples) * batch_size
+    return {
+        "requests": len(samples),
+        "texts_per_sec": texts / wall if wall else 0.0,
+        "tokens_per_sec": sum(s["tokens"] for s in samples) / wall if wall else 0.0,
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p95": float(np.percentile(latencies, 95)),
+        "ms_per_text_p50": float(np.percentile(latencies, 50)) * 1000 / batch_size,
+        # Client latency Ollama did not account for: waiting for a free slot plus transport
+        "queue_p95": float(np.percentile([max(0.0, s["latency"] - s["server"]) for s in samples], 95)),
+    }
+
+
+def recommend(points: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Per model: the batch size / concurrency with the highest texts/sec at the longest input (ingestion), and
+    p50/p95 latency of one text at the shortest input and concurrency 1 (query embedding).
+    """
+    summary = {}
+    for model in dict.fromkeys(p["model"] for p in points):
+        mine = [p for p in points if p["model"] == model]
+        longest = max(p["input_tokens"] for p in mine)
+        best = max((p for p in mine if p["input_tokens"] == longest), key=lambda p: p["texts_per_sec"])
+        shortest = min(p["input_tokens"] for p in mine)
+        query = [p for p in mine if p["input_tokens"] == shortest and p["batch_size"] == 1 and p["concurrency"] == 1]
+        summary[model] = {
+            "ingest": {
+                "input_tokens": longest,
+                "batch_size": best["batch_size"],
+                "concurrency": best["concurrency"],
+                "texts_per_sec": best["texts_per_sec"],
+            },
+            "query": (
+                {
+                    "input_tokens": shortest,
+                    "latency_p50": query[0]["latency_p50"],
+                    "latency_p95": query[0]["latency_p95"],
+                }
+                if query
+                else None
+            ),
+        }
+    return summary
+
+
+def main(
+    models: list[str] | None = None,
+    batch_sizes: tuple[int, ...] = EMBED_BATCH_SIZES,
+    input_tokens: tuple[int, ...] = EMBED_INPUT_TOKENS,
+    concurrency: tuple[int, ...] = EMBED_CONCURRENCY,
+    iterations: int = EMBED_ITERATIONS,
+    corpus: list[Path] | None = None,
+) -> Path:
+    """Run the grid and write ``docs/embedding_benchmark_results.json`` (next to ``benchmark_results.json``)."""
+    models = models or EMBED_MODELS
+    documents = []
+    for path in corpus or default_corpus():
+        with open(path, encoding="utf-8", errors="replace") as f:
+            documents.append(f.read())
+    pool_size = max(batch_sizes) * max(concurrency) * iterations
+    pools = {n: input_pool(n, documents, pool_size) for n in input_tokens}
+    print(
+        f"Embedding benchmark against {OLLAMA_EMBED_URL}: {len(models)} model(s) x "
+        f"{len(batch_sizes) * len(input_tokens) * len(concurrency)} point(s), {iterations} request(s) per client"
+    )
+
+    points, loads = [], []
+    for model in models:
+        try:
+            warm = _timed_embed(model, ["warm-up"])
+        except Exception as e:
+            print(f"  {model}: warm-up failed ({e}); skipping")
+            continue
+        loads.append({"model": model, "load_sec": warm["load"]})
+        print(f"\n=== {model} (loaded in {warm['load']:.2f}s) ===")
+        print(
+            f"  {'input':>5} {'est_tok':>7} {'batch':>5} {'conc':>4}  {'texts/s':>8} {'tok/s':>8}  "
+            f"{'lat50':>7} {'lat95':>7} {'ms/text':>7} {'queue95':>7}"
+        )
+        for tokens, batch_size, conc in product(input_tokens, batch_sizes, concurrency):
+            try:
+                samples, wall = _run_point(model, pools[tokens], batch_size, conc, iterations)
+            except Exception as e:
+                print(f"  {tokens:>5} batch {batch_size} x{conc}: {e}")
+                continue
+            point = {
+                "model": model,
+                "input_tokens": tokens,
+                "estimated_tokens": float(np.mean([estimate_tokens(t) for t in pools[tokens]])),
+                "batch_size": batch_size,
+                "concurrency": conc,
+                **_summarize(samples, wall, batch_size),
+            }
+            points.append(point)
+            print(
+                f"  {tokens:>5} {point['estimated_tokens']:>7.0f} {batch_size:>5} {conc:>4}  "
+                f"{point['texts_per_sec']:>8.1f} {point['tokens_per_sec']:>8.0f}  {point['latency_p50']:>7.3f} "
+                f"{point['latency_p95']:>7.3f} {point['ms_per_text_p50']:>7.1f} {point['queue_p95']:>7.3f}",
+                flush=True,
+            )
+
+    summary = recommend(points) if points else {}
+    for model, rec in summary.items():
+        ingest = rec["ingest"]
+        line = (
+            f"  {model}: ingest {ingest['texts_per_sec']:.1f} texts/s at batch {ingest['batch_size']} "
+            f"x{ingest['concurrency']} ({ingest['input_tokens']}-token inputs)"
+        )
+        if rec["query"]:
+            line += f"; query p50 {rec['query']['latency_p50'] * 1000:.0f}ms"
+        print(line)
+
+    output_file = embedding_benchmark_results_path()
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "iterations": iterations,
+                "loads": loads,
+                "points": points,
+                "summary": summary,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nEmbedding benchmark results saved in {output_file}")
+    return output_file
@@ -0,0 +1,164 @@
+"""
+Measure what query-time entity-graph expansion costs on top of vector search.
+
+Queries are the golden questions (their text seeds entities by name) paired with embeddings of random
+chunks that already have entities, so no Ollama is needed. For each query the vector top-k is taken from
+``PgVectorRetriever`` and ``EntityGraph.expand`` is then timed for every combination of fanout, entity and
+chunk limits, with a generous statement timeout so the true cost is visible. Reports p50/p95/max latency,
+how often the production budget (``GRAPH_BUDGET_MS``) would be exceeded and how many chunks the graph adds.
+"""
+
+import datetime
+import json
+import time
+from itertools import product
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Engine, text
+
+from app.core.db import get_engine
+from app.core.entity_graph import GRAPH_BUDGET_SEC, GRAPH_MAX_SEEDS, EntityGraph
+from app.core.retrieval import PgVectorRetriever
+from peporag_eval.paths import benchmark_output_dir, golden_questions_path
+
+FANOUTS = (4, 8, 16)
+MAX_ENTITIES = (16, 32, 64)
+MAX_CHUNKS = (4, 8)
+# Statement timeout while measuring; high enough that no point is cut short
+MEASURE_BUDGET_SEC = 5.0
+
+
+def load_queries(engine: Engine, n: int, seed: int = 0) -> list[tuple[str, list[float]]]:
+    """``n`` (question text, chunk embedding) pairs; embeddings come from chunks with extracted entities."""
+    with open(golden_questions_path()) as f:
+        questions = [q["question"] for q in json.load(f)]
+    with engine.connect() as conn:
+        conn.execute(text("SELECT setseed(:s)"), {"s": seed / 10})
+        rows = conn.execute(
+            text(
+                """
+                SELECT embedding::text FROM chunks
+                WHERE cardinality(entity_ids) > 0
+                ORDER BY random() LIMIT :n
+                """
+            ),
+            {"n": n},
+        ).scalars()
+        embeddings = [json.loads(r) for r in rows]
+    return [(questions[i % len(questions)], e) for i, e in enumerate(embeddings)]
+
+
+def graph_stats(engine: Engine) -> dict[str, Any]:
+    with engine.connect() as conn:
+        return dict(
+            conn.execute(
+                text(
+                    """
+                    SELECT count(*) AS entities,
+                           coalesce(sum(cardinality(neighbors)), 0) AS edges,
+                           coalesce(avg(cardinality(chunk_ids)), 0)::float AS avg_postings,
+                           pg_total_relation_size('entity_adjacency') AS bytes
+                    FROM entity_adjacency
+                    """
+                )
+            )
+            .mappings()
+            .one()
+        )
+
+
+def _summary(latencies: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "max_ms": float(max(latencies) * 1000),
+    }
+
+
+def bench_point(graph: EntityGraph, queries: list[tuple[str, list[float]]], seeds: list[list[int]]) -> dict[str, Any]:
+    for (query, embedding), chunk_ids in list(zip(queries, seeds, strict=True))[:5]:  # warm-up
+        graph.expand(query, embedding, chunk_ids)
+
+    latencies = []
+    added = []
+    for (query, embedding), chunk_ids in zip(queries, seeds, strict=True):
+        t0 = time.perf_counter()
+        extra = graph.expand(query, embedding, chunk_ids)
+        latencies.append(time.perf_counter() - t0)
+        added.append(len(extra))
+
+    result = {
+        "fanout": graph.fanout,
+        "max_entities": graph.max_entities,
+        "max_chunks": graph.max_chunks,
+        **_summary(latencies),
+        "over_budget": sum(t > GRAPH_BUDGET_SEC for t in latencies) / len(latencies),
+        "chunks_added_mean": float(np.mean(added)),
+        "empty_rate": sum(n == 0 for n in added) / len(added),
+    }
+    print(
+        f"  fanout {graph.fanout:>3}  entities {graph.max_entities:>3}  chunks {graph.max_chunks:>2}  "
+        f"p50 {result['p50_ms']:>7.2f}ms  p95 {result['p95_ms']:>7.2f}ms  max {result['max_ms']:>7.2f}ms  "
+        f"over budget {result['over_budget']:>6.1%}  +{result['chunks_added_mean']:.1f} chunks"
+    )
+    return result
+
+
+def main(
+    n_queries: int = 200,
+    k: int = 5,
+    fanouts: tuple[int, ...] = FANOUTS,
+    max_entities: tuple[int, ...] = MAX_ENTITIES,
+    max_chunks: tuple[int, ...] = MAX_CHUNKS,
+) -> None:
+    engine = get_engine()
+    stats = graph_stats(engine)
+    if not stats["entities"]:
+        raise SystemExit("entity_adjacency is empty; run scripts/build_entity_graph.py first.")
+    queries = load_queries(engine, n_queries)
+    print(
+        f"Graph: {stats['entities']} entities, {stats['edges']} edges, "
+        f"{stats['bytes'] / 2**20:.1f} MiB; {len(queries)} queries, k={k}"
+    )
+
+    retriever = PgVectorRetriever(engine=engine)
+    vector_latencies = []
+    seeds = []
+    for _, embedding in queries:
+        t0 = time.perf_counter()
+        results = retriever.search(embedding, k)
+        vector_latencies.append(time.perf_counter() - t0)
+        seeds.append([r.chunk_id for r in results])
+    vector = _summary(vector_latencies)
+    print(f"  vector search  p50 {vector['p50_ms']:>7.2f}ms  p95 {vector['p95_ms']:>7.2f}ms (reference)")
+
+    results = []
+    for fanout, entities, chunks in product(fanouts, max_entities, max_chunks):
+        graph = EntityGraph(
+            engine=engine,
+            budget_sec=MEASURE_BUDGET_SEC,
+            max_seeds=GRAPH_MAX_SEEDS,
+            fanout=fanout,
+            max_entities=entities,
+            max_chunks=chunks,
+        )
+        results.append(bench_point(graph, queries, seeds))
+
+    ts = datetime.datetime.now()
+    output_file = benchmark_output_dir() / f"graph_expansion_{ts.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "timestamp": ts.isoformat(),
+                "queries": len(queries),
+                "k": k,
+                "budget_ms": GRAPH_BUDGET_SEC * 1000,
+                "graph": stats,
+                "vector_search": vector,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults saved in {output_file}")
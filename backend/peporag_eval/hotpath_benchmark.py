@@ -0,0 +1,206 @@
+"""Offline CPU microbenchmarks for per-request Python hot paths (no Ollama, no Postgres)."""
+
+import datetime
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.core.agent_factory import get_rag_agent
+from app.core.model_router import get_model_for_query
+from app.core.output_repair import repair_rag_output
+from app.schemas.rag_response import RagResponse
+from peporag_eval.paths import benchmark_output_dir, golden_questions_path, rag_eval_output_dir
+from peporag_eval.rag_normalize import normalize_payload, normalize_text_output
+
+MIN_RUN_SEC = 0.5
+ALLOC_SAMPLE_CALLS = 200
+DEFAULT_MAX_REGRESSION = 0.20
+
+
+def load_fixtures() -> dict[str, list[Any]]:
+    """
+    Collect recorded inputs from the golden set and every saved RAG eval output.
+
+    Returns:
+        dict: ``queries`` (str), ``parsed_json`` (dict), ``raw_outputs`` (str) and
+        ``canonical_payloads`` (dict already valid for ``RagResponse``).
+    """
+    with open(golden_questions_path()) as f:
+        golden = json.load(f)
+
+    queries = [q["question"] for q in golden]
+    parsed_json: list[dict[str, Any]] = []
+    raw_outputs: list[str] = []
+    canonical_payloads: list[dict[str, Any]] = []
+
+    for path in sorted(rag_eval_output_dir().glob("*.json")):
+        with open(path) as f:
+            runs = json.load(f)
+        for run in runs:
+            for detail in run.get("details", []):
+                if isinstance(detail.get("parsed_json"), dict):
+                    parsed_json.append(detail["parsed_json"])
+                if detail.get("raw_output"):
+                    raw_outputs.append(detail["raw_output"])
+                if isinstance(detail.get("response"), dict):
+                    canonical_payloads.append(detail["response"])
+
+    return {
+        "queries": queries,
+        "parsed_json": parsed_json,
+        "raw_outputs": raw_outputs,
+        "canonical_payloads": canonical_payloads,
+    }
+
+
+def build_cases(fixtures: dict[str, list[Any]]) -> dict[str, tuple[Callable[[Any], Any], list[Any]]]:
+    """Map benchmark name -> (function under test, list of recorded inputs)."""
+    # ``get_rag_agent`` builds an Ollama provider, which only needs a base URL (no connection is made).
+    os.environ.setdefault("OLLAMA_BASE_URL", "http://localhost:11434/v1")
+    responses = [RagResponse.model_validate(p) for p in fixtures["canonical_payloads"]]
+    return {
+        "get_model_for_query": (get_model_for_query, fixtures["queries"]),
+        "get_rag_agent": (lambda q: get_rag_agent(user_query=q), fixtures["queries"]),
+        "normalize_payload": (normalize_payload, fixtures["parsed_json"]),
+        "normalize_text_output": (normalize_text_output, fixtures["raw_outputs"]),
+        "repair_rag_output": (repair_rag_output, fixtures["raw_outputs"]),
+        "RagResponse.model_validate": (RagResponse.model_validate, fixtures["canonical_payloads"]),
+        "RagResponse.model_dump": (lambda r: r.model_dump(), responses),
+    }
+
+
+def _measure_throughput(func: Callable[[Any], Any], inputs: list[Any]) -> tuple[int, float]:
+    """Call ``func`` over ``inputs`` in rounds until ``MIN_RUN_SEC`` elapses; returns (calls, seconds)."""
+    for item in inputs:  # warm-up (imports, caches, pydantic core schema)
+        func(item)
+
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < MIN_RUN_SEC:
+        for item in inputs:
+            func(item)
+        calls += len(inputs)
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+def _measure_allocations(func: Callable[[Any], Any], inputs: list[Any]) -> tuple[float, float]:
+    """
+    Per-call allocation profile via ``tracemalloc``.
+
+    Returns:
+        tuple: (mean peak bytes allocated during one call, mean allocated blocks still alive after one call).
+    """
+    peak_total = 0
+    blocks_total = 0
+    tracemalloc.start()
+    try:
+        for i in range(ALLOC_SAMPLE_CALLS):
+            item = inputs[i % len(inputs)]
+            tracemalloc.reset_peak()
+            before_snapshot = tracemalloc.take_snapshot()
+            base, _ = tracemalloc.get_traced_memory()
+            result = func(item)
+            _, peak = tracemalloc.get_traced_memory()
+            after_snapshot = tracemalloc.take_snapshot()
+            peak_total += max(0, peak - base)
+            blocks_total += sum(
+                max(0, stat.count_diff) for stat in after_snapshot.compare_to(before_snapshot, "filename")
+            )
+            del result
+    finally:
+        tracemalloc.stop()
+    return peak_total / ALLOC_SAMPLE_CALLS, blocks_total / ALLOC_SAMPLE_CALLS
+
+
+def run_case(name: str, func: Callable[[Any], Any], inputs: list[Any]) -> dict[str, Any] | None:
+    if not inputs:
+        print(f"  {name}: skipped (no recorded fixtures)")
+        return None
+
+    calls, elapsed = _measure_throughput(func, inputs)
+    ops_per_sec = calls / elapsed
+    peak_bytes, blocks = _measure_allocations(func, inputs)
+    result = {
+        "name": name,
+        "fixtures": len(inputs),
+        "calls": calls,
+        "ops_per_sec": ops_per_sec,
+        "mean_us": 1e6 / ops_per_sec,
+        "alloc_peak_bytes_per_call": peak_bytes,
+        "alloc_blocks_per_call": blocks,
+    }
+    print(
+        f"  {name:<28} {ops_per_sec:>12,.0f} ops/s  {result['mean_us']:>9.2f} µs/call  "
+        f"{peak_bytes / 1024:>8.2f} KiB peak  {blocks:>6.1f} blocks"
+    )
+    return result
+
+
+def compare_to_baseline(
+    current: list[dict[str, Any]], baseline_file: Path, max_regression: float
+) -> list[dict[str, Any]]:
+    """
+    Compare ops/sec against a previous run.
+
+    Returns:
+        list: One entry per benchmark slower than ``baseline * (1 - max_regression)``.
+    """
+    with open(baseline_file) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\n--- Comparison vs {baseline_file.name} ---")
+    for res in current:
+        base = baseline.get(res["name"])
+        if base is None:
+            print(f"  {res['name']:<28} (new, no baseline)")
+            continue
+        ratio = res["ops_per_sec"] / base["ops_per_sec"]
+        flag = "REGRESSION" if ratio < 1 - max_regression else "ok"
+        print(f"  {res['name']:<28} {ratio:>6.2f}x baseline  {flag}")
+        if flag == "REGRESSION":
+            regressions.append({"name": res["name"], "ratio": ratio})
+    return regressions
+
+
+def main(baseline: Path | None = None, max_regression: float = DEFAULT_MAX_REGRESSION) -> int:
+    fixtures = load_fixtures()
+    print(
+        f"Fixtures: {len(fixtures['queries'])} queries, {len(fixtures['parsed_json'])} parsed JSON, "
+        f"{len(fixtures['raw_outputs'])} raw outputs, {len(fixtures['canonical_payloads'])} canonical payloads"
+    )
+
+    results = []
+    for name, (func, inputs) in build_cases(fixtures).items():
+        res = run_case(name, func, inputs)
+        if res:
+            results.append(res)
+
+    ts = datetime.datetime.now()
+    output_file = benchmark_output_dir() / f"hotpath_{ts.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "timestamp": ts.isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults saved in {output_file}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(results, baseline, max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} hot path(s) regressed more than {max_regression:.0%}.")
+            return 1
+    return 0
@@ -0,0 +1,430 @@
+"""Local stand-in for the Ollama HTTP API with configurable latency, throughput and failure profiles."""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+_TOKEN_RE = re.compile(r"\s*\S+")
+MALFORMED_KINDS = ("truncated", "prose", "wrong_shape")
+
+
+class ModelProfile(BaseModel):
+    """Latency/throughput behavior of one fake model."""
+
+    ttft_mean_sec: float = Field(0.3, ge=0.0, description="Base time to first token (excludes prompt eval).")
+    ttft_jitter_sec: float = Field(0.1, ge=0.0, description="Std-dev of the TTFT distribution.")
+    prompt_tps: float = Field(400.0, gt=0.0, description="Prompt-eval speed, adds prompt_tokens / prompt_tps.")
+    tps_mean: float = Field(20.0, gt=0.0, description="Mean generation speed (tokens/sec).")
+    tps_jitter: float = Field(4.0, ge=0.0, description="Std-dev of generation speed per request.")
+    cold_load_sec: float = Field(2.0, ge=0.0, description="Delay when the model is not resident.")
+    output_tokens: int = Field(80, ge=1, description="Approximate length of the generated answer.")
+    malformed_rate: float = Field(0.0, ge=0.0, le=1.0, description="Probability of a non-RagResponse output.")
+    trailing_text_rate: float = Field(0.0, ge=0.0, le=1.0, description="Probability of prose after the JSON.")
+    embedding_dim: int = Field(768, ge=1)
+    embed_sec_per_input: float = Field(0.01, ge=0.0)
+
+
+class MockOllamaConfig(BaseModel):
+    """Server-wide settings; ``models`` overrides ``default_profile`` per model name."""
+
+    default_profile: ModelProfile = Field(default_factory=ModelProfile)
+    models: dict[str, ModelProfile] = Field(default_factory=dict)
+    max_concurrency: int = Field(1, ge=1, description="Like OLLAMA_NUM_PARALLEL; extra requests queue.")
+    max_loaded_models: int = Field(1, ge=1, description="Like OLLAMA_MAX_LOADED_MODELS; LRU eviction.")
+    prompt_cache: bool = Field(
+        True, description="Like Ollama's KV cache: a prefix matching the last request is not re-evaluated."
+    )
+    seed: int | None = None
+
+    def profile_for(self, model: str) -> ModelProfile:
+        return self.models.get(model) or self.models.get(model.split(":")[0]) or self.default_profile
+
+
+def load_config(path: Path | None) -> MockOllamaConfig:
+    if path is None:
+        return MockOllamaConfig()
+    with open(path) as f:
+        return MockOllamaConfig.model_validate(json.load(f))
+
+
+class MockOllamaState:
+    """Shared state across handler threads: concurrency slots, resident models and RNG."""
+
+    def __init__(self, config: MockOllamaConfig) -> None:
+        self.config = config
+        self.slots = threading.BoundedSemaphore(config.max_concurrency)
+        self._loaded: OrderedDict[str, float] = OrderedDict()
+        # model -> text of its last request plus the generated output (a single cache slot per model)
+        self._cached_text: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+
+    def sample(self, mean: float, jitter: float, minimum: float = 0.0) -> float:
+        with self._lock:
+            return max(minimum, self._rng.gauss(mean, jitter))
+
+    def chance(self, rate: float) -> bool:
+        with self._lock:
+            return self._rng.random() < rate
+
+    def choice(self, options: tuple[str, ...]) -> str:
+        with self._lock:
+            return self._rng.choice(options)
+
+    def ensure_loaded(self, model: str, profile: ModelProfile) -> float:
+        """Simulate a cold load if needed; returns the load duration in seconds."""
+        with self._lock:
+            if model in self._loaded:
+                self._loaded.move_to_end(model)
+                return 0.0
+        time.sleep(profile.cold_load_sec)
+        with self._lock:
+            self._loaded[model] = time.time()
+            while len(self._loaded) > self.config.max_loaded_models:
+                evicted, _ = self._loaded.popitem(last=False)
+                self._cached_text.pop(evicted, None)
+        return profile.cold_load_sec
+
+    def cached_prefix_tokens(self, model: str, prompt: str) -> int:
+        """Tokens at the start of ``prompt`` still in the model's cache from its previous request."""
+        if not self.config.prompt_cache:
+            return 0
+        with self._lock:
+            cached = self._cached_text.get(model, "")
+        return _count_tokens(prompt[: len(os.path.commonprefix([cached, prompt]))])
+
+    def remember(self, model: str, text: str) -> None:
+        with self._lock:
+            self._cached_text[model] = text
+
+    def loaded_models(self) -> list[str]:
+        with self._lock:
+            return list(self._loaded)
+
+
+def _count_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+def _answer_text(n_tokens: int) -> str:
+    base = (
+        "Based on the provided context, the component isolates state and exposes a narrow interface, "
+        "which keeps coupling low and makes the behavior easier to test."
+    ).split()
+    return " ".join(base[i % len(base)] for i in range(max(1, n_tokens)))
+
+
+def build_output(state: MockOllamaState, profile: ModelProfile, constrained: bool = False) -> str:
+    """
+    Generate the fake model text: a valid ``RagResponse`` JSON unless a failure is injected.
+
+    ``constrained`` mirrors Ollama structured outputs (``format`` / ``response_format`` JSON schema):
+    decoding is grammar-bound, so malformed shapes and trailing prose are never injected.
+    """
+    answer = _answer_text(profile.output_tokens)
+    payload = {
+        "answer": answer,
+        "confidence_score": 0.8,
+        "key_terms": ["coupling", "interface"],
+        "sources_used": True,
+        "reasoning": "Derived from the context.",
+    }
+    text = json.dumps(payload)
+
+    if constrained:
+        return text
+
+    if state.chance(profile.malformed_rate):
+        kind = state.choice(MALFORMED_KINDS)
+        if kind == "truncated":
+            text = text[: len(text) // 2]
+        elif kind == "prose":
+            text = answer
+        else:
+            text = json.dumps({"response": {"utterance": answer}, "confidence": 0.7})
+
+    if state.chance(profile.trailing_text_rate):
+        text += "\n\nI hope this helps! Let me know if you have more questions. " + _answer_text(
+            profile.output_tokens // 2
+        )
+    return text
+
+
+def _embedding(text: str, dim: int) -> list[float]:
+    """Deterministic unit vector derived from the text hash (same input -> same vector)."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+    rng = random.Random(seed)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vec) ** 0.5 or 1.0
+    return [v / norm for v in vec]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockOllama/0.1"
+    protocol_version = "HTTP/1.1"
+    state: MockOllamaState  # injected by make_server
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 (stdlib signature)
+        pass
+
+    # --- plumbing ---------------------------------------------------------------------------
+
+    def _read_json(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, body: dict[str, Any], status: int = 200) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    # --- routing ----------------------------------------------------------------------------
+
+    def do_GET(self) -> None:
+        if self.path == "/api/tags":
+            names = sorted(set(self.state.config.models) | set(self.state.loaded_models()))
+            self._send_json({"models": [{"name": n, "model": n} for n in names]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [{"name": n, "model": n} for n in self.state.loaded_models()]})
+        elif self.path in ("/", "/api/version"):
+            self._send_json({"version": "mock"})
+        else:
+            self._send_json({"error": f"unknown path {self.path}"}, status=404)
+
+    def do_POST(self) -> None:
+        try:
+            body = self._read_json()
+        except json.JSONDecodeError as e:
+            self._send_json({"error": f"invalid JSON body: {e}"}, status=400)
+            return
+
+        if self.path == "/api/generate" and not body.get("prompt"):
+            self._handle_load(body)
+        elif self.path == "/api/generate":
+            self._handle_generation(body, prompt=body.get("prompt", ""), style="generate")
+        elif self.path == "/api/chat":
+            prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            self._handle_generation(body, prompt=prompt, style="chat")
+        elif self.path == "/v1/chat/completions":
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+            self._handle_generation(body, prompt=prompt, style="openai")
+        elif self.path == "/api/embed":
+            self._handle_embed(body)
+        else:
+            self._send_json({"error": f"unknown path {self.path}"}, status=404)
+
+    # --- endpoints --------------------------------------------------------------------------
+
+    def _handle_embed(self, body: dict[str, Any]) -> None:
+        model = body.get("model", "")
+        inputs = body.get("input", "")
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        profile = self.state.config.profile_for(model)
+
+        start = time.perf_counter()
+        with self.state.slots:
+            load_sec = self.state.ensure_loaded(model, profile)
+            time.sleep(profile.embed_sec_per_input * len(texts))
+        self._send_json(
+            {
+                "model": model,
+                "embeddings": [_embedding(t, profile.embedding_dim) for t in texts],
+                "total_duration": int((time.perf_counter() - start) * 1e9),
+                "load_duration": int(load_sec * 1e9),
+                "prompt_eval_count": sum(_count_tokens(t) for t in texts),
+            }
+        )
+
+    def _handle_load(self, body: dict[str, Any]) -> None:
+        """Ollama loads the model without generating when ``/api/generate`` has no prompt."""
+        model = body.get("model", "")
+        with self.state.slots:
+            load_sec = self.state.ensure_loaded(model, self.state.config.profile_for(model))
+        self._send_json(
+            {
+                "model": model,
+                "created_at": _now(),
+                "response": "",
+                "done": True,
+                "done_reason": "load",
+                "load_duration": int(load_sec * 1e9),
+            }
+        )
+
+    def _handle_generation(self, body: dict[str, Any], prompt: str, style: str) -> None:
+        model = body.get("model", "")
+        profile = self.state.config.profile_for(model)
+        options = body.get("options") or {}
+        num_predict = options.get("num_predict") or body.get("max_tokens")
+        stream = body.get("stream", style != "openai")
+
+        start = time.perf_counter()
+        with self.state.slots:
+            load_sec = self.state.ensure_loaded(model, profile)
+
+            # Like Ollama, only the tokens after the cached prefix are evaluated (and counted)
+            prompt_tokens = _count_tokens(prompt) - self.state.cached_prefix_tokens(model, prompt)
+            prompt_eval_sec = prompt_tokens / profile.prompt_tps
+            ttft = self.state.sample(profile.ttft_mean_sec, profile.ttft_jitter_sec) + prompt_eval_sec
+            tps = self.state.sample(profile.tps_mean, profile.tps_jitter, minimum=0.1)
+
+            response_format = body.get("response_format") or {}
+            constrained = isinstance(body.get("format"), dict) or response_format.get("type") == "json_schema"
+            tokens = _TOKEN_RE.findall(build_output(self.state, profile, constrained=constrained))
+            if num_predict and num_predict > 0:
+                tokens = tokens[:num_predict]
+
+            time.sleep(ttft)
+            gen_start = time.perf_counter()
+            if stream:
+                completed = self._stream_tokens(model, style, tokens, tps)
+            else:
+                time.sleep(len(tokens) / tps)
+                completed = True
+            eval_sec = time.perf_counter() - gen_start
+            self.state.remember(model, prompt + "\n" + "".join(tokens) if completed else prompt)
+
+        if not completed:
+            return  # client went away: generation cancelled, slot already released
+
+        final = {
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "load_duration": int(load_sec * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval_sec * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int(eval_sec * 1e9),
+        }
+        text = "".join(tokens)
+        if style == "openai":
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            }
+            if stream:
+                self._write_chunk(self._openai_sse(model, None, finish_reason="stop", usage=usage))
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._end_stream()
+            else:
+                self._send_json(
+                    {
+                        "id": "chatcmpl-mock",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": text},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": usage,
+                    }
+                )
+            return
+
+        done = {"model": model, "created_at": _now(), "done": True, "done_reason": "stop", **final}
+        if style == "chat":
+            done["message"] = {"role": "assistant", "content": "" if stream else text}
+        else:
+            done["response"] = "" if stream else text
+        if stream:
+            self._write_chunk(json.dumps(done).encode() + b"\n")
+            self._end_stream()
+        else:
+            self._send_json(done)
+
+    def _stream_tokens(self, model: str, style: str, tokens: list[str], tps: float) -> bool:
+        """Emit one chunk per token at ``tps``; returns False if the client disconnected."""
+        self._start_stream("text/event-stream" if style == "openai" else "application/x-ndjson")
+        delay = 1.0 / tps
+        try:
+            for token in tokens:
+                time.sleep(delay)
+                if style == "openai":
+                    self._write_chunk(self._openai_sse(model, token))
+                    continue
+                chunk: dict[str, Any] = {"model": model, "created_at": _now(), "done": False}
+                if style == "chat":
+                    chunk["message"] = {"role": "assistant", "content": token}
+                else:
+                    chunk["response"] = token
+                self._write_chunk(json.dumps(chunk).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            return False
+        return True
+
+    @staticmethod
+    def _openai_sse(
+        model: str, token: str | None, finish_reason: str | None = None, usage: dict[str, int] | None = None
+    ) -> bytes:
+        delta = {"role": "assistant", "content": token} if token is not None else {}
+        chunk: dict[str, Any] = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        if usage is not None:
+            chunk["usage"] = usage
+        return f"data: {json.dumps(chunk)}\n\n".encode()
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+def make_server(config: MockOllamaConfig, host: str = "127.0.0.1", port: int = 11434) -> ThreadingHTTPServer:
+    """Build (but do not start) a threaded mock server; use ``serve_forever()`` or run it in a thread."""
+    handler = type("MockOllamaHandler", (_Handler,), {"state": MockOllamaState(config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(config_path: Path | None = None, host: str = "127.0.0.1", port: int = 11434) -> None:
+    config = load_config(config_path)
+    server = make_server(config, host=host, port=port)
+    print(
+        f"Mock Ollama listening on http://{host}:{port} "
+        f"(concurrency={config.max_concurrency}, profiles={sorted(config.models) or ['default']})",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,16 +1,35 @@
-"""Streamed Ollama /api/generate benchmark: TTFT, TPS, and JSON aggregates."""
+"""
+Streamed Ollama /api/generate benchmark: TTFT, TPS, and JSON aggregates.
+
+``main`` times one short prompt per model. ``run_sweep`` varies RAG context length, ``num_ctx``,
+``num_predict``, concurrency and model, splitting each request into prompt eval and generation with
+Ollama's ``prompt_eval_duration`` / ``eval_duration``, and derives the latency curves used to pick
+context budgets and concurrency limits.
+"""
 
 import json
+import os
 import statistics
 import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import product
+from pathlib import Path
+from typing import Any
 
+import numpy as np
 import requests
 
-from peporag_eval.paths import benchmark_results_path
+from app.core.chunker import chunk_text
+from app.core.rag_service import build_rag_prompt
+from app.core.tokens import estimate_tokens
+from peporag_eval.chunking_benchmark import default_corpus
+from peporag_eval.paths import benchmark_output_dir, benchmark_results_path
 
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
+# Override to target another Ollama (e.g. ``scripts/mock_ollama.py``) without editing this module.
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
 MODELS_TO_TEST = [
     "qwen2.5:3b",
     "qwen3.5:2b",
@@ -23,6 +42,14 @@ ITERATIONS = 5
 REQUEST_TIMEOUT_SEC = (30, 600)
 HEARTBEAT_INTERVAL_SEC = 10.0
 
+# Sweep grid defaults; points whose context does not fit in ``num_ctx`` are skipped (Ollama would truncate)
+SWEEP_CONTEXT_TOKENS = (512, 1024, 2048, 4096)
+SWEEP_NUM_CTX = (2048, 4096, 8192)
+SWEEP_NUM_PREDICT = (128, 512)
+SWEEP_CONCURRENCY = (1, 2, 4)
+SWEEP_ITERATIONS = 2
+SWEEP_QUESTION = "Summarize the main design decisions described in the context and the trade-offs behind them."
+
 
 class _OllamaWaitHeartbeat:
     """Prints periodic timestamps until stop() — use while waiting on stream/read."""
@@ -187,3 +214,258 @@ def main() -> None:
         json.dump(results, f, indent=4)
 
     print(f"\nBenchmarking completed. Results saved in {output_file}")
+
+
+def sweep_context(target_tokens: int, chunks: list[str]) -> str:
+    """Retrieved-context block of about ``target_tokens``, joined like ``format_context``."""
+    picked, total = [], 0
+    for chunk in chunks:
+        if total >= target_tokens:
+            break
+        picked.append(chunk)
+        total += estimate_tokens(chunk)
+    if total < target_tokens and picked:
+        # Small corpus: repeat it rather than undershoot the point being measured
+        return sweep_context(target_tokens, chunks * (target_tokens // max(total, 1) + 1))
+    return "\n\n---\n\n".join(picked)
+
+
+def _timed_generate(model: str, prompt: str, options: dict[str, Any]) -> dict[str, Any]:
+    """One streamed /api/generate call: client-side TTFT/latency plus Ollama's own timings (seconds)."""
+    start = time.perf_counter()
+    ttft = None
+    with requests.post(
+        OLLAMA_API_URL,
+        json={"model": model, "prompt": prompt, "stream": True, "options": options},
+        stream=True,
+        timeout=REQUEST_TIMEOUT_SEC,
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if ttft is None and chunk.get("response"):
+                ttft = time.perf_counter() - start
+            if chunk.get("done"):
+                latency = time.perf_counter() - start
+                timings = {
+                    "load": chunk.get("load_duration", 0) / 1e9,
+                    "prompt_eval": chunk.get("prompt_eval_duration", 0) / 1e9,
+                    "eval": chunk.get("eval_duration", 0) / 1e9,
+                }
+                return {
+                    "ttft": ttft if ttft is not None else latency,
+                    "latency": latency,
+                    # Latency not spent loading, evaluating or generating: waiting behind other requests
+                    # (beyond OLLAMA_NUM_PARALLEL) plus scheduling and transport overhead
+                    "queue": max(0.0, latency - sum(timings.values())),
+                    "prompt_tokens": chunk.get("prompt_eval_count", 0),
+                    "eval_tokens": chunk.get("eval_count", 0),
+                    **timings,
+                }
+    raise RuntimeError("Stream ended without a final `done` chunk")
+
+
+def _run_point(
+    model: str, context: str, options: dict[str, Any], concurrency: int, iterations: int
+) -> tuple[list[dict[str, Any]], float]:
+    """``concurrency`` clients each send ``iterations`` requests back to back; returns samples and wall time."""
+
+    def client(_: int) -> list[dict[str, Any]]:
+        # A unique first line defeats Ollama's prompt-prefix cache, so every request pays full prompt eval
+        return [
+            _timed_generate(
+                model, f"[run {uuid.uuid4().hex[:8]}]\n{build_rag_prompt(SWEEP_QUESTION, context)}", options
+            )
+            for _ in range(iterations)
+        ]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        samples = [s for batch in pool.map(client, range(concurrency)) for s in batch]
+    return samples, time.perf_counter() - start
+
+
+def _summarize(samples: list[dict[str, Any]], wall: float) -> dict[str, float]:
+    def pct(key: str, q: float) -> float:
+        return float(np.percentile([s[key] for s in samples], q))
+
+    prompt_tokens = sum(s["prompt_tokens"] for s in samples)
+    prompt_sec = sum(s["prompt_eval"] for s in samples)
+    eval_tokens = sum(s["eval_tokens"] for s in samples)
+    eval_sec = sum(s["eval"] for s in samples)
+    return {
+        "requests": len(samples),
+        "prompt_tokens": prompt_tokens / len(samples),
+        "prompt_eval_sec": prompt_sec / len(samples),
+        "prompt_tps": prompt_tokens / prompt_sec if prompt_sec else 0.0,
+        "eval_tokens": eval_tokens / len(samples),
+        "eval_sec": eval_sec / len(samples),
+        "eval_tps": eval_tokens / eval_sec if eval_sec else 0.0,
+        "ttft_p50": pct("ttft", 50),
+        "ttft_p95": pct("ttft", 95),
+        "latency_p50": pct("latency", 50),
+        "latency_p95": pct("latency", 95),
+        "queue_p95": pct("queue", 95),
+        # Generated tokens per second across all concurrent clients
+        "aggregate_tps": eval_tokens / wall if wall else 0.0,
+    }
+
+
+def latency_curves(points: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Per-model curves derived from the sweep.
+
+    ``prompt_eval``: least-squares fit of prompt-eval seconds against prompt tokens at concurrency 1, so
+    ``intercept + slope * tokens`` predicts the TTFT cost of a context budget. ``concurrency``: latency
+    p95 and aggregate throughput per level at the largest context measured, to find where extra
+    parallel requests only add queueing.
+    """
+    curves = {}
+    for model in dict.fromkeys(p["model"] for p in points):
+        mine = [p for p in points if p["model"] == model]
+        serial = [p for p in mine if p["concurrency"] == 1]
+        fit = None
+        if len({p["prompt_tokens"] for p in serial}) >= 2:
+            slope, intercept = statistics.linear_regression(
+                [p["prompt_tokens"] for p in serial], [p["prompt_eval_sec"] for p in serial]
+            )
+            fit = {"sec_per_1k_tokens": slope * 1000, "intercept_sec": intercept}
+
+        largest = max(p["context_tokens"] for p in mine)
+        by_level: dict[int, list[dict[str, Any]]] = {}
+        for p in mine:
+            if p["context_tokens"] == largest:
+                by_level.setdefault(p["concurrency"], []).append(p)
+        concurrency = [
+            {
+                "concurrency": level,
+                "latency_p95": max(p["latency_p95"] for p in group),
+                "queue_p95": max(p["queue_p95"] for p in group),
+                "aggregate_tps": statistics.fmean(p["aggregate_tps"] for p in group),
+            }
+            for level, group in sorted(by_level.items())
+        ]
+        curves[model] = {
+            "prompt_eval": fit,
+            "eval_tps": statistics.median(p["eval_tps"] for p in serial or mine),
+            "concurrency": concurrency,
+        }
+    return curves
+
+
+def _print_tables(points: list[dict[str, Any]], curves: dict[str, dict[str, Any]]) -> None:
+    header = (
+        f"  {'num_ctx':>7} {'context':>7} {'prompt':>6} {'predict':>7} {'conc':>4}  {'pe_s':>6} {'pe_tps':>7}  "
+        f"{'gen_s':>6} {'gen_tps':>7}  {'ttft50':>6} {'ttft95':>6}  "
+        f"{'lat50':>6} {'lat95':>6} {'queue95':>7} {'agg_tps':>7}"
+    )
+    for model, curve in curves.items():
+        print(f"\n=== {model} ===")
+        print(header)
+        for p in (p for p in points if p["model"] == model):
+            print(
+                f"  {p['num_ctx']:>7} {p['context_tokens']:>7} {p['prompt_tokens']:>6.0f} {p['num_predict']:>7} "
+                f"{p['concurrency']:>4}  {p['prompt_eval_sec']:>6.2f} {p['prompt_tps']:>7.0f}  "
+                f"{p['eval_sec']:>6.2f} {p['eval_tps']:>7.1f}  {p['ttft_p50']:>6.2f} {p['ttft_p95']:>6.2f}  "
+                f"{p['latency_p50']:>6.2f} {p['latency_p95']:>6.2f} {p['queue_p95']:>7.2f} {p['aggregate_tps']:>7.1f}"
+            )
+        if curve["prompt_eval"]:
+            fit = curve["prompt_eval"]
+            print(
+                f"  prompt eval ~ {fit['intercept_sec']:.2f}s + {fit['sec_per_1k_tokens']:.2f}s per 1k tokens; "
+                f"generation ~ {curve['eval_tps']:.1f} tokens/s"
+            )
+        for row in curve["concurrency"]:
+            print(
+                f"  concurrency {row['concurrency']}: latency p95 {row['latency_p95']:.2f}s, "
+                f"queue p95 {row['queue_p95']:.2f}s, aggregate {row['aggregate_tps']:.1f} tokens/s"
+            )
+
+
+def run_sweep(
+    models: list[str] | None = None,
+    context_tokens: tuple[int, ...] = SWEEP_CONTEXT_TOKENS,
+    num_ctx: tuple[int, ...] = SWEEP_NUM_CTX,
+    num_predict: tuple[int, ...] = SWEEP_NUM_PREDICT,
+    concurrency: tuple[int, ...] = SWEEP_CONCURRENCY,
+    iterations: int = SWEEP_ITERATIONS,
+    corpus: list[Path] | None = None,
+) -> Path:
+    """
+    Sweep the grid and write ``docs/evaluations/benchmarks/ollama_sweep_<timestamp>.json``.
+
+    ``num_ctx`` is the outer loop per model because changing it makes Ollama reload the model; each new
+    value gets an untimed warm-up request whose ``load_duration`` is reported separately. Concurrency
+    above the server's ``OLLAMA_NUM_PARALLEL`` shows up as queue time.
+    """
+    models = models or MODELS_TO_TEST
+    chunks = []
+    for path in corpus or default_corpus():
+        with open(path, encoding="utf-8", errors="replace") as f:
+            chunks.extend(c.text for c in chunk_text(f))
+    contexts = {n: sweep_context(n, chunks) for n in context_tokens}
+
+    grid = [
+        (ctx, n_ctx, predict, conc)
+        for n_ctx, ctx, predict, conc in product(num_ctx, context_tokens, num_predict, concurrency)
+        # Prompt plus answer must fit in the window; leave room for the template around the context
+        if ctx + predict + 128 <= n_ctx
+    ]
+    print(f"Sweeping {len(models)} model(s) x {len(grid)} point(s), {iterations} request(s) per client")
+
+    points, loads = [], []
+    for model in models:
+        current_ctx = None
+        failed_ctx: set[int] = set()
+        for ctx, n_ctx, predict, conc in grid:
+            if n_ctx in failed_ctx:
+                continue
+            if n_ctx != current_ctx:
+                current_ctx = n_ctx
+                try:
+                    warm = _timed_generate(model, "Say OK.", {"num_ctx": n_ctx, "num_predict": 1})
+                except Exception as e:
+                    # Every point at this num_ctx needs the same load; skip them instead of retrying each
+                    print(f"  {model} num_ctx={n_ctx}: warm-up failed ({e}); skipping its points")
+                    failed_ctx.add(n_ctx)
+                    continue
+                loads.append({"model": model, "num_ctx": n_ctx, "load_sec": warm["load"]})
+                print(f"  {model} num_ctx={n_ctx}: loaded in {warm['load']:.2f}s")
+
+            options = {"num_ctx": n_ctx, "num_predict": predict}
+            try:
+                samples, wall = _run_point(model, contexts[ctx], options, conc, iterations)
+            except Exception as e:
+                print(f"  {model} ctx={ctx} num_ctx={n_ctx} predict={predict} x{conc}: {e}")
+                continue
+            point = {
+                "model": model,
+                "context_tokens": ctx,
+                "num_ctx": n_ctx,
+                "num_predict": predict,
+                "concurrency": conc,
+                **_summarize(samples, wall),
+            }
+            points.append(point)
+            print(
+                f"  ctx {ctx:>5} num_ctx {n_ctx:>5} predict {predict:>4} x{conc}: prompt eval "
+                f"{point['prompt_eval_sec']:.2f}s, generation {point['eval_sec']:.2f}s, "
+                f"latency p95 {point['latency_p95']:.2f}s",
+                flush=True,
+            )
+
+    curves = latency_curves(points) if points else {}
+    _print_tables(points, curves)
+
+    ts = datetime.now()
+    output_file = benchmark_output_dir() / f"ollama_sweep_{ts.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(
+            {"timestamp": ts.isoformat(), "iterations": iterations, "loads": loads, "points": points, "curves": curves},
+            f,
+            indent=2,
+        )
+    print(f"\nSweep results saved in {output_file}")
+    return output_file
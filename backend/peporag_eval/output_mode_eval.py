@@ -0,0 +1,94 @@
+"""Golden-set comparison of PROMPTED vs NATIVE (schema-constrained) output modes: retries and latency."""
+
+import datetime
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from pydantic_ai.usage import RunUsage
+
+from app.core.agent_factory import OutputMode, get_rag_agent
+from app.core.rag_service import build_rag_prompt
+from peporag_eval.paths import golden_questions_path, rag_eval_output_dir
+from peporag_eval.rag_eval_runner import DEFAULT_MODELS
+
+
+async def evaluate_output_mode(model_name: str, mode: OutputMode, questions: list[dict[str, Any]]) -> dict[str, Any]:
+    print(f"Starting evaluation for model: {model_name} (output mode: {mode})")
+    agent = get_rag_agent(model_name=model_name, output_mode=mode)
+
+    details = []
+    for q in questions:
+        print(f"  - Testing question: {q['id']}...")
+        usage = RunUsage()
+        start_time = time.perf_counter()
+        error = None
+        try:
+            await agent.run(build_rag_prompt(q["question"], q["context"]), usage=usage)
+        except Exception as e:
+            error = str(e)
+        duration = time.perf_counter() - start_time
+        retries = max(0, usage.requests - 1)
+        details.append(
+            {
+                "question_id": q["id"],
+                "success": error is None,
+                "duration": duration,
+                "model_requests": usage.requests,
+                "retries": retries,
+                "retry_overhead": duration * retries / usage.requests if usage.requests else 0.0,
+                "output_tokens": usage.output_tokens,
+                "error": error,
+            }
+        )
+
+    n = len(details)
+    ok = [d for d in details if d["success"]]
+    return {
+        "model": model_name,
+        "eval_mode": "output_modes",
+        "output_mode": str(mode),
+        "success_rate": (len(ok) / n) * 100,
+        "retry_rate": (sum(1 for d in details if d["retries"] > 0) / n) * 100,
+        "avg_model_requests": sum(d["model_requests"] for d in details) / n,
+        "avg_latency": sum(d["duration"] for d in details) / n,
+        "avg_latency_success": sum(d["duration"] for d in ok) / len(ok) if ok else 0,
+        "avg_retry_overhead": sum(d["retry_overhead"] for d in details) / n,
+        "details": details,
+    }
+
+
+def _print_summary(all_results: list[dict[str, Any]]) -> None:
+    print("\n--- SUMMARY ---")
+    for res in all_results:
+        print(f"Model: {res['model']} [{res['output_mode']}]")
+        print(f"  Success Rate (RagResponse): {res['success_rate']:.1f}%")
+        print(f"  Retry Rate (>=1 extra generation): {res['retry_rate']:.1f}%")
+        print(f"  Avg Model Requests: {res['avg_model_requests']:.2f}")
+        print(f"  Avg Latency: {res['avg_latency']:.2f}s (retry overhead {res['avg_retry_overhead']:.2f}s)")
+        print("----------------")
+
+
+async def run_output_mode_eval(models: list[str] | None = None, modes: list[OutputMode] | None = None) -> Path | None:
+    golden = golden_questions_path()
+    if not golden.exists():
+        print(f"Error: Dataset not found at {golden}")
+        return None
+
+    with open(golden) as f:
+        questions = json.load(f)
+
+    all_results = []
+    for model in models if models is not None else DEFAULT_MODELS:
+        for mode in modes if modes is not None else list(OutputMode):
+            all_results.append(await evaluate_output_mode(model, mode, questions))
+
+    ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = rag_eval_output_dir() / f"output_modes_{ts}.json"
+    with open(output_file, "w") as f:
+        json.dump(all_results, f, indent=2)
+
+    print(f"\nEvaluation complete. Results saved to {output_file}")
+    _print_summary(all_results)
+    return output_file
@@ -16,7 +16,17 @@ def benchmark_results_path() -> Path:
     return repo_root() / "docs" / "benchmark_results.json"
 
 
+def embedding_benchmark_results_path() -> Path:
+    return repo_root() / "docs" / "embedding_benchmark_results.json"
+
+
 def rag_eval_output_dir() -> Path:
     out = repo_root() / "docs" / "evaluations" / "rag"
     out.mkdir(parents=True, exist_ok=True)
     return out
+
+
+def benchmark_output_dir() -> Path:
+    out = repo_root() / "docs" / "evaluations" / "benchmarks"
+    out.mkdir(parents=True, exist_ok=True)
+    return out
@@ -291,6 +291,9 @@ async def evaluate_model(model_name: str, questions: list[dict[str, Any]], mode:
         canonical_valid_rate = (canonical_ok_count / n) * 100
         return {
             "model": model_name,
+            "eval_mode": str(mode),
+            # One text generation per question parsed with the PROMPTED-mode normalizers, no retries
+            "output_mode": "prompted",
             "json_parse_rate": json_parse_rate,
             "native_schema_valid_rate": native_schema_valid_rate,
             "normalized_json_schema_valid_rate": normalized_json_schema_valid_rate,
@@ -307,6 +310,7 @@ async def evaluate_model(model_name: str, questions: list[dict[str, Any]], mode:
     normalized_schema_valid_rate = (normalized_schema_ok_count / n) * 100
     return {
         "model": model_name,
+        "eval_mode": str(mode),
         "json_parse_rate": json_parse_rate,
         "native_schema_valid_rate": native_schema_valid_rate,
         "normalized_schema_valid_rate": normalized_schema_valid_rate,
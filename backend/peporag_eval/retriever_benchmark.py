@@ -0,0 +1,140 @@
+"""
+Benchmark the in-process NumPy retriever against pgvector on the same vectors and queries.
+
+Both backends are queried through the ``Retriever`` interface used by ``RetrievalService``. NumPy is
+also measured with batched queries (``search_batch``), which pgvector has no equivalent for.
+"""
+
+import datetime
+import json
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.db import get_engine
+from app.core.numpy_retriever import NumpyRetriever, write_numpy_index
+from app.core.retrieval import PgVectorRetriever, Retriever
+from app.core.vector_index import EMBEDDING_DIM, StorageMode, rebuild_ann_index
+from peporag_eval.paths import benchmark_output_dir
+from peporag_eval.vector_storage_benchmark import (
+    BENCH_TABLE,
+    exact_top_k,
+    load_bench_table,
+    load_chunk_vectors,
+    make_queries,
+    synthetic_vectors,
+)
+
+
+def _latency_summary(latencies: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "qps": len(latencies) / sum(latencies),
+    }
+
+
+def bench_single(name: str, retriever: Retriever, queries: np.ndarray, truth: list[set[int]], k: int) -> dict:
+    for q in queries[: min(10, len(queries))]:  # warm-up (page cache, shared buffers)
+        retriever.search(q.tolist(), k)
+
+    latencies = []
+    hits = 0
+    for q, expected in zip(queries, truth, strict=True):
+        t0 = time.perf_counter()
+        results = retriever.search(q.tolist(), k)
+        latencies.append(time.perf_counter() - t0)
+        hits += len(expected & {r.chunk_id for r in results})
+
+    result = {"backend": name, "batch_size": 1, **_latency_summary(latencies), f"recall@{k}": hits / (k * len(queries))}
+    print(
+        f"  {name:<10} batch    1  p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+        f"{result['qps']:>9.1f} q/s  recall@{k} {result[f'recall@{k}']:.3f}"
+    )
+    return result
+
+
+def bench_batched(retriever: NumpyRetriever, queries: np.ndarray, k: int, batch_size: int) -> dict[str, Any]:
+    latencies = []
+    for start in range(0, len(queries), batch_size):
+        batch = queries[start : start + batch_size]
+        t0 = time.perf_counter()
+        retriever.search_batch(batch, k)
+        latencies.append(time.perf_counter() - t0)
+
+    total = sum(latencies)
+    result = {
+        "backend": "numpy",
+        "batch_size": batch_size,
+        "batch_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "qps": len(queries) / total,
+    }
+    print(
+        f"  {'numpy':<10} batch {batch_size:>4}  per batch p50 {result['batch_p50_ms']:>8.2f}ms  "
+        f"{result['qps']:>9.1f} q/s"
+    )
+    return result
+
+
+def main(
+    source: str = "synthetic",
+    n_vectors: int = 50_000,
+    n_queries: int = 200,
+    k: int = 5,
+    batch_sizes: list[int] | None = None,
+    pgvector: bool = True,
+) -> None:
+    dim = EMBEDDING_DIM
+    engine = get_engine() if pgvector or source == "chunks" else None
+    vectors = load_chunk_vectors(engine, n_vectors) if source == "chunks" else synthetic_vectors(n_vectors, dim)
+    if len(vectors) <= k:
+        raise SystemExit(f"Need more than k={k} vectors, got {len(vectors)} from {source}.")
+    queries = make_queries(vectors, n_queries)
+    truth = exact_top_k(vectors, queries, k)
+    results = []
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        # Ids 1..n, same as the pgvector scratch table and ``exact_top_k``
+        chunks = (
+            {"chunk_id": i, "book_id": 0, "seq": i, "content": "", "metadata": {}} for i in range(1, len(vectors) + 1)
+        )
+        start = time.perf_counter()
+        write_numpy_index(index_dir, vectors, chunks, version="bench")
+        numpy_retriever = NumpyRetriever(index_dir)
+        print(f"NumPy index: {len(vectors)} x {dim} written and loaded in {time.perf_counter() - start:.2f}s")
+
+        results.append(bench_single("numpy", numpy_retriever, queries, truth, k))
+        for batch_size in batch_sizes or [8, 32, 128]:
+            results.append(bench_batched(numpy_retriever, queries, k, batch_size))
+
+    if pgvector:
+        print(f"Loading vectors into {BENCH_TABLE} for pgvector...")
+        load_bench_table(engine, vectors)
+        try:
+            rebuild_ann_index(engine, StorageMode.FULL, table=BENCH_TABLE, dim=dim)
+            pg_retriever = PgVectorRetriever(engine=engine, storage_mode=StorageMode.FULL, dim=dim, table=BENCH_TABLE)
+            results.append(bench_single("pgvector", pg_retriever, queries, truth, k))
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+
+    ts = datetime.datetime.now()
+    output_file = benchmark_output_dir() / f"retrievers_{ts.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "timestamp": ts.isoformat(),
+                "source": source,
+                "vectors": len(vectors),
+                "dim": dim,
+                "queries": n_queries,
+                "k": k,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults saved in {output_file}")
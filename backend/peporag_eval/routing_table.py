@@ -0,0 +1,216 @@
+"""
+Build the model routing table from golden-set eval results.
+
+Only single-attempt samples are used: ``eval_rag_quality.py --mode full`` runs (tagged
+``eval_mode: full``), where each question is one generation. RAW_QWEN diagnostics measure a different
+success criterion and ``eval_output_modes.py`` durations include retries, so those runs and untagged
+legacy files are skipped.
+
+Each eval detail (``question_id``, ``success``, ``duration``) is assigned to the router's feature bucket
+of its golden question. Per bucket, every (primary, fallback) model pair is scored by expected latency.
+A model gets up to ``n = AGENT_RETRIES + 1`` attempts, each succeeding with its single-attempt rate ``p``:
+
+    E[model] = sum_{i<n} (1 - p)^i * (p * latency_ok + (1 - p) * latency_fail)
+    E[latency] = E[primary] + (1 - p_primary)^n * E[fallback]
+
+Pairs whose combined success rate ``1 - (1 - p_primary)^n * (1 - p_fallback)^n`` is below
+``min_success`` are skipped.
+"""
+
+import datetime
+import json
+import statistics
+from collections import defaultdict
+from itertools import permutations
+from pathlib import Path
+from typing import Any
+
+from app.core.agent_factory import AGENT_RETRIES, DEFAULT_OUTPUT_MODE
+from app.core.model_router import query_bucket
+from peporag_eval.paths import golden_questions_path, rag_eval_output_dir
+
+DEFAULT_MIN_SUCCESS = 0.9
+DEFAULT_MIN_SAMPLES = 3
+
+
+def default_table_path() -> Path:
+    return rag_eval_output_dir().parent / "routing_table.json"
+
+
+# Runs measured one generation per question, the unit the expected-latency model is built on
+SINGLE_ATTEMPT_EVAL_MODE = "full"
+
+
+def load_samples(result_files: list[Path], output_mode: str) -> list[dict[str, Any]]:
+    """
+    Flatten single-attempt eval runs into ``{model, question_id, success, duration}`` samples.
+
+    Only runs tagged ``eval_mode: full`` with the requested ``output_mode`` are used; other kinds and
+    untagged runs (legacy files predate the tags) are skipped and reported.
+    """
+    samples = []
+    skipped: dict[str, int] = defaultdict(int)
+    for path in result_files:
+        with open(path) as f:
+            runs = json.load(f)
+        for run in runs:
+            kind = run.get("eval_mode")
+            if kind != SINGLE_ATTEMPT_EVAL_MODE or run.get("output_mode") != output_mode:
+                skipped[f"{path.name} ({kind or 'untagged'}, {run.get('output_mode') or 'no output mode'})"] += 1
+                continue
+            for detail in run.get("details", []):
+                if "question_id" not in detail:
+                    continue
+                samples.append(
+                    {
+                        "model": run["model"],
+                        "question_id": detail["question_id"],
+                        "success": bool(detail["success"]),
+                        "duration": float(detail["duration"]),
+                    }
+                )
+    for source, count in sorted(skipped.items()):
+        print(f"  skipped {count} run(s) from {source}")
+    return samples
+
+
+def model_stats(samples: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """Per-model success rate and mean latency of successful, failed and all attempts."""
+    by_model: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for s in samples:
+        by_model[s["model"]].append(s)
+
+    stats = {}
+    for model, runs in by_model.items():
+        ok = [r["duration"] for r in runs if r["success"]]
+        failed = [r["duration"] for r in runs if not r["success"]]
+        overall = statistics.fmean(r["duration"] for r in runs)
+        stats[model] = {
+            "samples": len(runs),
+            "success_rate": len(ok) / len(runs),
+            "latency_ok": statistics.fmean(ok) if ok else overall,
+            "latency_fail": statistics.fmean(failed) if failed else overall,
+            "latency": overall,
+        }
+    return stats
+
+
+def _model_cost(stats: dict[str, float], attempts: int) -> tuple[float, float]:
+    """Expected latency of up to ``attempts`` tries of one model, and the probability that all of them fail."""
+    p_ok = stats["success_rate"]
+    per_attempt = p_ok * stats["latency_ok"] + (1 - p_ok) * stats["latency_fail"]
+    expected = sum((1 - p_ok) ** i * per_attempt for i in range(attempts))
+    return expected, (1 - p_ok) ** attempts
+
+
+def choose_route(
+    stats: dict[str, dict[str, float]], min_success: float, attempts: int = AGENT_RETRIES + 1
+) -> dict[str, Any] | None:
+    """
+    Lowest expected-latency (primary, fallback) pair meeting ``min_success``, else the most reliable pair.
+    Each model gets up to ``attempts`` generations (the agent's validation retries) before moving on.
+    """
+    candidates = []
+    for primary, fallback in permutations(stats, 2):
+        primary_cost, p_fallback = _model_cost(stats[primary], attempts)
+        fallback_cost, p_fallback_fails = _model_cost(stats[fallback], attempts)
+        candidates.append(
+            {
+                "primary": primary,
+                "fallback": fallback,
+                "expected_latency_sec": primary_cost + p_fallback * fallback_cost,
+                "p_fallback": p_fallback,
+                "success_rate": 1 - p_fallback * p_fallback_fails,
+                "samples": stats[primary]["samples"],
+            }
+        )
+    if not candidates:
+        return None
+
+    eligible = [c for c in candidates if c["success_rate"] >= min_success]
+    if eligible:
+        best = min(eligible, key=lambda c: c["expected_latency_sec"])
+    else:
+        best = max(candidates, key=lambda c: (c["success_rate"], -c["expected_latency_sec"]))
+    ranked = sorted(candidates, key=lambda c: c["expected_latency_sec"])
+    return {**best, "candidates": ranked}
+
+
+def build_table(
+    samples: list[dict[str, Any]],
+    questions: list[dict[str, Any]],
+    min_success: float = DEFAULT_MIN_SUCCESS,
+    min_samples: int = DEFAULT_MIN_SAMPLES,
+) -> dict[str, Any]:
+    """
+    Routing table keyed by ``query_bucket``; golden categories are reported alongside for inspection.
+
+    Buckets where any model has fewer than ``min_samples`` attempts are left out, so the router keeps
+    using the heuristics for them.
+    """
+    by_id = {q["id"]: q for q in questions}
+    grouped: dict[str, dict[str, list[dict[str, Any]]]] = {"bucket": defaultdict(list), "category": defaultdict(list)}
+    for s in samples:
+        question = by_id.get(s["question_id"])
+        if question is None:
+            continue
+        grouped["bucket"][query_bucket(question["question"])].append(s)
+        grouped["category"][question.get("category", "uncategorized")].append(s)
+
+    sections: dict[str, dict[str, Any]] = {"bucket": {}, "category": {}}
+    skipped = []
+    for kind, groups in grouped.items():
+        for key, group in sorted(groups.items()):
+            stats = model_stats(group)
+            route = choose_route(stats, min_success)
+            if route is None:
+                continue
+            if kind == "bucket" and min(s["samples"] for s in stats.values()) < min_samples:
+                skipped.append(key)
+                continue
+            sections[kind][key] = {**route, "models": stats}
+
+    return {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "min_success": min_success,
+        "min_samples": min_samples,
+        "buckets": sections["bucket"],
+        "categories": sections["category"],
+        "skipped_buckets": skipped,
+    }
+
+
+def main(
+    result_files: list[Path] | None = None,
+    output: Path | None = None,
+    min_success: float = DEFAULT_MIN_SUCCESS,
+    min_samples: int = DEFAULT_MIN_SAMPLES,
+    output_mode: str = DEFAULT_OUTPUT_MODE,
+) -> Path:
+    result_files = result_files or sorted(rag_eval_output_dir().glob("*.json"))
+    with open(golden_questions_path()) as f:
+        questions = json.load(f)
+
+    samples = load_samples(result_files, output_mode)
+    print(f"{len(samples)} samples from {len(result_files)} result file(s) (output mode {output_mode})")
+    table = build_table(samples, questions, min_success, min_samples)
+    table["sources"] = [str(p) for p in result_files]
+    table["output_mode"] = str(output_mode)
+    table["attempts_per_model"] = AGENT_RETRIES + 1
+
+    for kind in ("buckets", "categories"):
+        print(f"\n--- {kind} ---")
+        for key, entry in table[kind].items():
+            print(
+                f"  {key:<24} {entry['primary']:<28} -> {entry['fallback']:<28} "
+                f"E[latency] {entry['expected_latency_sec']:>6.2f}s  p_fallback {entry['p_fallback']:.2f}  "
+                f"success {entry['success_rate']:.2f}"
+            )
+    if table["skipped_buckets"]:
+        print(f"\nHeuristics kept for (fewer than {min_samples} samples): {', '.join(table['skipped_buckets'])}")
+
+    output = output or default_table_path()
+    with open(output, "w") as f:
+        json.dump(table, f, indent=2)
+    print(f"\nRouting table saved in {output} (set ROUTING_TABLE_PATH to use it)")
+    return output
@@ -0,0 +1,141 @@
+"""
+Import-time and startup-time profile of the backend.
+
+Import costs come from ``python -X importtime`` in fresh interpreters: ``app.main`` (what uvicorn waits
+for before binding the port) and the heavy modules the warm-up imports afterwards. Startup timings come
+from launching uvicorn and polling ``/health`` (liveness) and ``/ready`` (readiness).
+"""
+
+import datetime
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.core.readiness import HEAVY_MODULES
+from peporag_eval.paths import benchmark_output_dir
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+def import_profile(module: str, top: int = 15) -> dict[str, Any]:
+    """
+    Import ``module`` in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        dict: ``total_ms`` (cumulative for ``module``) and the ``top`` direct dependencies by cumulative time.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, len(indent), int(self_us), int(cumulative_us)))
+
+    # importtime prints children before their parent, indented deeper: walk back from ``module``'s line
+    root = max(i for i, entry in enumerate(entries) if entry[0] == module)
+    _, root_depth, _, total_us = entries[root]
+    subtree = []
+    for name, depth, _, cumulative_us in reversed(entries[:root]):
+        if depth <= root_depth:
+            break
+        subtree.append((name, depth, cumulative_us))
+    child_depth = min((depth for _, depth, _ in subtree), default=0)
+    direct = sorted(
+        ((name, c) for name, depth, c in subtree if depth == child_depth), key=lambda item: item[1], reverse=True
+    )
+    return {
+        "module": module,
+        "total_ms": total_us / 1000,
+        "top_imports": [{"module": name, "cumulative_ms": c / 1000} for name, c in direct[:top]],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(client: httpx.Client, path: str, deadline: float) -> tuple[float | None, dict[str, Any] | None]:
+    """Poll ``path`` until it returns 200; returns (monotonic time of success, body) or (None, last body)."""
+    body = None
+    while time.monotonic() < deadline:
+        try:
+            response = client.get(path)
+            body = response.json()
+            if response.status_code == 200:
+                return time.monotonic(), body
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    return None, body
+
+
+def startup_profile(ready_timeout_sec: float) -> dict[str, Any]:
+    """Launch uvicorn and measure time to liveness and readiness from process spawn."""
+    port = _free_port()
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_ROOT,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_ROOT)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            live_at, _ = _wait_for(client, "/health", started + 60)
+            ready_at, ready_body = _wait_for(client, "/ready", started + ready_timeout_sec)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    return {
+        "live_after_sec": live_at - started if live_at else None,
+        "ready_after_sec": ready_at - started if ready_at else None,
+        "ready": ready_body,
+    }
+
+
+def main(repeat: int = 3, ready_timeout_sec: float = 120.0, skip_server: bool = False) -> None:
+    imports = []
+    for module in ("app.main", *HEAVY_MODULES):
+        runs = [import_profile(module) for _ in range(repeat)]
+        median = statistics.median(r["total_ms"] for r in runs)
+        imports.append({**runs[-1], "total_ms": median, "runs_ms": [r["total_ms"] for r in runs]})
+        print(f"  import {module:<24} {median:>8.1f} ms (median of {repeat})")
+        for dep in runs[-1]["top_imports"][:5]:
+            print(f"      {dep['module']:<40} {dep['cumulative_ms']:>8.1f} ms")
+
+    startup = None
+    if not skip_server:
+        startup = startup_profile(ready_timeout_sec)
+        live, ready = startup["live_after_sec"], startup["ready_after_sec"]
+        print(f"\n  live  (/health 200) after {live:.2f}s" if live else "\n  never became live")
+        print(f"  ready (/ready 200)  after {ready:.2f}s" if ready else f"  not ready within {ready_timeout_sec:.0f}s")
+        if startup["ready"]:
+            print(f"  checks: {startup['ready'].get('checks')}")
+            print(f"  warm-up steps: {startup['ready'].get('startup', {}).get('steps')}")
+
+    ts = datetime.datetime.now()
+    output_file = benchmark_output_dir() / f"startup_{ts.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump({"timestamp": ts.isoformat(), "imports": imports, "startup": startup}, f, indent=2)
+    print(f"\nResults saved in {output_file}")
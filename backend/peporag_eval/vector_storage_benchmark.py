@@ -0,0 +1,173 @@
+"""
+Compare pgvector storage modes (float32, halfvec, binary quantization + re-score) on one Postgres instance.
+
+Vectors are copied into a scratch table shaped like ``chunks`` (real embeddings from ``chunks`` or a
+synthetic clustered set), then for each mode the HNSW index is rebuilt and we record build time, index
+size, query latency through ``PgVectorRetriever`` and recall@k against exact NumPy brute force.
+"""
+
+import datetime
+import io
+import json
+import time
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Engine, text
+
+from app.core.db import get_engine
+from app.core.retrieval import PgVectorRetriever, _vector_literal
+from app.core.vector_index import EMBEDDING_DIM, StorageMode, ann_index_name, rebuild_ann_index
+from peporag_eval.paths import benchmark_output_dir
+
+BENCH_TABLE = "vector_storage_bench"
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Unit vectors around ``clusters`` random centroids (closer to real embeddings than uniform noise)."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centroids[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_chunk_vectors(engine: Engine, limit: int) -> np.ndarray:
+    """Embeddings already ingested into ``chunks`` (pgvector returns them as ``[x,y,...]`` text)."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT embedding::text FROM chunks ORDER BY id LIMIT :n"), {"n": limit}).scalars()
+        vectors = np.array([json.loads(r) for r in rows], dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors: np.ndarray, n: int, noise: float = 0.3, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of random corpus vectors, so each query has a meaningful neighbourhood."""
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), n)]
+    queries = picks + noise * rng.standard_normal(picks.shape, dtype=np.float32) / np.sqrt(vectors.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    """Ground-truth neighbour ids (row index + 1, matching the scratch table ids) by cosine similarity."""
+    sims = queries @ vectors.T
+    top = np.argpartition(-sims, k, axis=1)[:, :k]
+    return [{int(i) + 1 for i in row} for row in top]
+
+
+def load_bench_table(engine: Engine, vectors: np.ndarray) -> None:
+    """(Re)create the scratch table and bulk-load ``vectors`` with COPY."""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        conn.execute(text(f"CREATE TABLE {BENCH_TABLE} (LIKE chunks INCLUDING DEFAULTS)"))
+
+    buf = io.StringIO()
+    for i, vec in enumerate(vectors, start=1):
+        buf.write(f"{i}\t0\t{i}\t\t{{}}\t{_vector_literal(vec)}\n")
+    buf.seek(0)
+
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.copy_expert(f"COPY {BENCH_TABLE} (id, book_id, seq, content, metadata, embedding) FROM STDIN", buf)
+        raw.commit()
+    finally:
+        raw.close()
+
+    with engine.begin() as conn:
+        conn.execute(text(f"ANALYZE {BENCH_TABLE}"))
+
+
+def bench_mode(
+    engine: Engine,
+    mode: StorageMode,
+    queries: np.ndarray,
+    truth: list[set[int]],
+    k: int,
+    rescore_factor: int,
+    dim: int,
+) -> dict[str, Any]:
+    start = time.perf_counter()
+    rebuild_ann_index(engine, mode, table=BENCH_TABLE, dim=dim)
+    build_sec = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        index_bytes = conn.execute(
+            text("SELECT pg_relation_size(CAST(:name AS regclass))"), {"name": ann_index_name(mode, BENCH_TABLE)}
+        ).scalar_one()
+
+    retriever = PgVectorRetriever(
+        engine=engine, storage_mode=mode, rescore_factor=rescore_factor, dim=dim, table=BENCH_TABLE
+    )
+    for q in queries[: min(10, len(queries))]:  # warm the index into shared buffers
+        retriever.search(q.tolist(), k)
+
+    latencies = []
+    hits = 0
+    for q, expected in zip(queries, truth, strict=True):
+        t0 = time.perf_counter()
+        results = retriever.search(q.tolist(), k)
+        latencies.append(time.perf_counter() - t0)
+        hits += len(expected & {r.chunk_id for r in results})
+
+    result = {
+        "mode": mode.value,
+        "build_sec": build_sec,
+        "index_bytes": index_bytes,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p95_ms": float(np.percentile(latencies, 95) * 1000),
+        f"recall@{k}": hits / (k * len(queries)),
+    }
+    print(
+        f"  {mode.value:<8} build {build_sec:>7.2f}s  index {index_bytes / 2**20:>8.1f} MiB  "
+        f"p50 {result['query_p50_ms']:>7.2f}ms  p95 {result['query_p95_ms']:>7.2f}ms  "
+        f"recall@{k} {result[f'recall@{k}']:.3f}"
+    )
+    return result
+
+
+def main(
+    source: str = "synthetic",
+    n_vectors: int = 50_000,
+    n_queries: int = 200,
+    k: int = 5,
+    rescore_factor: int = 4,
+    modes: list[StorageMode] | None = None,
+) -> None:
+    engine = get_engine()
+    dim = EMBEDDING_DIM
+    vectors = load_chunk_vectors(engine, n_vectors) if source == "chunks" else synthetic_vectors(n_vectors, dim)
+    if len(vectors) <= k:
+        raise SystemExit(f"Need more than k={k} vectors, got {len(vectors)} from {source}.")
+
+    queries = make_queries(vectors, n_queries)
+    truth = exact_top_k(vectors, queries, k)
+
+    print(f"Loading {len(vectors)} {source} vectors (dim {dim}) into {BENCH_TABLE}...")
+    load_bench_table(engine, vectors)
+
+    results = []
+    try:
+        for mode in modes or list(StorageMode):
+            results.append(bench_mode(engine, mode, queries, truth, k, rescore_factor, dim))
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+
+    ts = datetime.datetime.now()
+    output_file = benchmark_output_dir() / f"vector_storage_{ts.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "timestamp": ts.isoformat(),
+                "source": source,
+                "vectors": len(vectors),
+                "dim": dim,
+                "queries": n_queries,
+                "k": k,
+                "rescore_factor": rescore_factor,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults saved in {output_file}")
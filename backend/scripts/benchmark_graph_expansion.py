@@ -0,0 +1,50 @@
+"""
+Benchmark query-time entity-graph expansion (latency, budget overruns, chunks added).
+
+Times ``EntityGraph.expand`` over a grid of fanout / entity / chunk limits, using golden-question text and
+real chunk embeddings as queries, with plain vector search as the reference. Writes
+``docs/evaluations/benchmarks/graph_expansion_<timestamp>.json``.
+
+Needs the Postgres from docker-compose with the graph built (``scripts/build_entity_graph.py``).
+
+Examples::
+
+    cd backend
+    uv run python scripts/benchmark_graph_expansion.py
+    uv run python scripts/benchmark_graph_expansion.py --queries 500 --fanout 8 16 32 --max-chunks 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from peporag_eval.graph_benchmark import FANOUTS, MAX_CHUNKS, MAX_ENTITIES, main
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Entity-graph expansion cost on top of vector search.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5, help="vector results the expansion starts from")
+    parser.add_argument("--fanout", nargs="+", type=int, default=FANOUTS)
+    parser.add_argument("--max-entities", nargs="+", type=int, default=MAX_ENTITIES)
+    parser.add_argument("--max-chunks", nargs="+", type=int, default=MAX_CHUNKS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    os.chdir(_BACKEND_ROOT)
+    main(
+        n_queries=args.queries,
+        k=args.k,
+        fanouts=tuple(args.fanout),
+        max_entities=tuple(args.max_entities),
+        max_chunks=tuple(args.max_chunks),
+    )
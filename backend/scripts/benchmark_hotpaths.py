@@ -0,0 +1,50 @@
+"""
+Offline CPU microbenchmarks for the Python code we own on every request.
+
+Measures ``get_model_for_query``, ``get_rag_agent``, ``normalize_payload``, ``repair_rag_output``,
+``normalize_text_output``, ``RagResponse.model_validate`` and ``RagResponse.model_dump``
+on recorded fixtures (golden questions + saved outputs under ``docs/evaluations/rag/``).
+Reports ops/sec and per-call allocations (``tracemalloc``) and writes
+``docs/evaluations/benchmarks/hotpath_<timestamp>.json``.
+
+No Ollama or Postgres needed. Pass ``--baseline`` to fail (exit 1) when any hot path
+drops below ``(1 - max_regression)`` of the baseline ops/sec.
+
+Examples::
+
+    cd backend
+    uv run python scripts/benchmark_hotpaths.py
+    uv run python scripts/benchmark_hotpaths.py --baseline ../docs/evaluations/benchmarks/hotpath_20260320_101500.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from peporag_eval.hotpath_benchmark import DEFAULT_MAX_REGRESSION, main
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline hot-path microbenchmarks (ops/sec + allocations).")
+    parser.add_argument("--baseline", type=Path, default=None, help="previous hotpath_*.json to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=DEFAULT_MAX_REGRESSION,
+        help=f"allowed ops/sec drop vs baseline as a fraction (default {DEFAULT_MAX_REGRESSION})",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    baseline = args.baseline.resolve() if args.baseline else None
+    os.chdir(_BACKEND_ROOT)
+    sys.exit(main(baseline=baseline, max_regression=args.max_regression))
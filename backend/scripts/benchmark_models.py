@@ -4,16 +4,34 @@ Local Ollama throughput/latency benchmark (TPS, TTFT).
 Calls ``POST /api/generate`` with streaming, several iterations per model, and writes
 aggregates to ``docs/benchmark_results.json`` at the **repository** root.
 
+``--sweep`` instead measures how latency scales with real RAG prompts: context length (built from
+repo docs with the production chunker), ``num_ctx``, ``num_predict``, concurrency and model. Each point
+reports prompt-eval and generation time separately (Ollama's ``prompt_eval_duration`` /
+``eval_duration``), and the run ends with latency-curve tables (prompt-eval seconds per 1k context
+tokens, p95 latency and aggregate throughput per concurrency level). Writes
+``docs/evaluations/benchmarks/ollama_sweep_<timestamp>.json``.
+
+``--embed`` benchmarks ``POST /api/embed`` instead: texts/sec and latency per embedding model, batch size,
+input length (corpus chunks cut at ``--input-tokens``) and concurrency, plus the best ingestion batch
+size and single-query latency per model. Writes ``docs/embedding_benchmark_results.json``.
+
 Prerequisites: ``ollama serve`` and models listed in ``peporag_eval.ollama_benchmark``.
 
 Example::
 
     cd backend
     uv run python scripts/benchmark_models.py
+    uv run python scripts/benchmark_models.py --sweep --models qwen2.5:3b granite3-dense:2b
+    uv run python scripts/benchmark_models.py --sweep --context-tokens 1000 3000 6000 --num-ctx 8192 \\
+        --num-predict 256 --concurrency 1 2 4 8
+    uv run python scripts/benchmark_models.py --embed
+    uv run python scripts/benchmark_models.py --embed --models nomic-embed-text --batch-sizes 16 32 64 128 \\
+        --input-tokens 256 512 --concurrency 1 2
 """
 
 from __future__ import annotations
 
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -22,8 +40,65 @@ _BACKEND_ROOT = Path(__file__).resolve().parent.parent
 if str(_BACKEND_ROOT) not in sys.path:
     sys.path.insert(0, str(_BACKEND_ROOT))
 
-from peporag_eval.ollama_benchmark import main
+from peporag_eval import embedding_benchmark
+from peporag_eval.ollama_benchmark import (
+    SWEEP_CONCURRENCY,
+    SWEEP_CONTEXT_TOKENS,
+    SWEEP_ITERATIONS,
+    SWEEP_NUM_CTX,
+    SWEEP_NUM_PREDICT,
+    main,
+    run_sweep,
+)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ollama generation benchmark.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sweep", action="store_true", help="latency sweep instead of the single-prompt run")
+    mode.add_argument("--embed", action="store_true", help="/api/embed throughput/latency grid")
+    parser.add_argument(
+        "--models", nargs="+", default=None, help="models to sweep (default: MODELS_TO_TEST, or EMBED_MODELS)"
+    )
+    parser.add_argument("--context-tokens", nargs="+", type=int, default=SWEEP_CONTEXT_TOKENS)
+    parser.add_argument("--num-ctx", nargs="+", type=int, default=SWEEP_NUM_CTX)
+    parser.add_argument("--num-predict", nargs="+", type=int, default=SWEEP_NUM_PREDICT)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=embedding_benchmark.EMBED_BATCH_SIZES)
+    parser.add_argument("--input-tokens", nargs="+", type=int, default=embedding_benchmark.EMBED_INPUT_TOKENS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=None, help="default: 1 2 4")
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=None,
+        help=f"requests per concurrent client per point (default {SWEEP_ITERATIONS}, "
+        f"{embedding_benchmark.EMBED_ITERATIONS} with --embed)",
+    )
+    parser.add_argument("--corpus", nargs="+", type=Path, default=None, help="context source (default: repo docs)")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
+    args = _parse_args()
+    corpus = [p.resolve() for p in args.corpus] if args.corpus else None
     os.chdir(_BACKEND_ROOT)
-    main()
+    if args.sweep:
+        run_sweep(
+            models=args.models,
+            context_tokens=tuple(args.context_tokens),
+            num_ctx=tuple(args.num_ctx),
+            num_predict=tuple(args.num_predict),
+            concurrency=tuple(args.concurrency or SWEEP_CONCURRENCY),
+            iterations=args.iterations or SWEEP_ITERATIONS,
+            corpus=corpus,
+        )
+    elif args.embed:
+        embedding_benchmark.main(
+            models=args.models,
+            batch_sizes=tuple(args.batch_sizes),
+            input_tokens=tuple(args.input_tokens),
+            concurrency=tuple(args.concurrency or embedding_benchmark.EMBED_CONCURRENCY),
+            iterations=args.iterations or embedding_benchmark.EMBED_ITERATIONS,
+            corpus=corpus,
+        )
+    else:
+        main()
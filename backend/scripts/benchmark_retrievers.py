@@ -0,0 +1,61 @@
+"""
+Benchmark the in-process NumPy retriever against pgvector on identical vectors and queries.
+
+Reports single-query p50/p95 and queries/sec plus recall@k vs exact search for both backends, and
+NumPy batched throughput per batch size. Writes ``docs/evaluations/benchmarks/retrievers_<timestamp>.json``.
+
+``--no-pgvector`` runs the NumPy side only (no Postgres needed). To serve retrieval from NumPy, export
+the library with ``--export DIR`` and set ``RETRIEVER_BACKEND=numpy`` and ``NUMPY_INDEX_DIR=DIR``.
+
+Examples::
+
+    cd backend
+    uv run python scripts/benchmark_retrievers.py --no-pgvector --vectors 200000
+    uv run python scripts/benchmark_retrievers.py --source chunks --batch-sizes 16 64
+    uv run python scripts/benchmark_retrievers.py --export data/numpy_index
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from app.core.db import get_engine
+from app.core.numpy_retriever import export_pgvector_index
+from peporag_eval.retriever_benchmark import main
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="NumPy vs pgvector retriever benchmark.")
+    parser.add_argument("--source", choices=["synthetic", "chunks"], default="synthetic")
+    parser.add_argument("--vectors", type=int, default=50_000, help="corpus size (max rows read with --source chunks)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=None, help="NumPy batch sizes (default 8 32 128)")
+    parser.add_argument("--no-pgvector", action="store_true", help="benchmark the NumPy backend only")
+    parser.add_argument("--export", type=Path, default=None, help="only export chunks from Postgres to a NumPy index")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    export_dir = args.export.resolve() if args.export else None
+    os.chdir(_BACKEND_ROOT)
+    if export_dir is not None:
+        count = export_pgvector_index(get_engine(), export_dir)
+        print(f"Exported {count} chunks to {export_dir}")
+        sys.exit(0)
+    main(
+        source=args.source,
+        n_vectors=args.vectors,
+        n_queries=args.queries,
+        k=args.k,
+        batch_sizes=args.batch_sizes,
+        pgvector=not args.no_pgvector,
+    )
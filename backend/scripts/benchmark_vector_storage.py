@@ -0,0 +1,56 @@
+"""
+Benchmark pgvector storage modes: float32 ``vector``, ``halfvec`` and binary quantization.
+
+Quantized modes search an HNSW expression index and re-score ``k * rescore_factor`` candidates with the
+float32 column, exactly like ``PgVectorRetriever`` does at query time. For each mode reports index build
+time, index size, query p50/p95 and recall@k vs exact search, and writes
+``docs/evaluations/benchmarks/vector_storage_<timestamp>.json``.
+
+Needs the Postgres from docker-compose (``POSTGRES_*`` env); works in a scratch table, ``chunks`` is
+only read.
+
+Examples::
+
+    cd backend
+    uv run python scripts/benchmark_vector_storage.py
+    uv run python scripts/benchmark_vector_storage.py --source chunks --queries 500 --rescore-factor 8
+    uv run python scripts/benchmark_vector_storage.py --vectors 200000 --modes halfvec binary
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from app.core.vector_index import StorageMode
+from peporag_eval.vector_storage_benchmark import main
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="pgvector storage modes: size, build time, latency, recall@k.")
+    parser.add_argument("--source", choices=["synthetic", "chunks"], default="synthetic")
+    parser.add_argument("--vectors", type=int, default=50_000, help="corpus size (max rows read with --source chunks)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, default=4, help="ANN candidates per result in quantized modes")
+    parser.add_argument("--modes", nargs="+", type=StorageMode, choices=list(StorageMode), default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    os.chdir(_BACKEND_ROOT)
+    main(
+        source=args.source,
+        n_vectors=args.vectors,
+        n_queries=args.queries,
+        k=args.k,
+        rescore_factor=args.rescore_factor,
+        modes=args.modes,
+    )
@@ -0,0 +1,81 @@
+"""
+Build the entity graph used for multi-hop retrieval expansion.
+
+Sends ingested chunks to Ollama in batches (one schema-constrained ``/api/chat`` call per batch) to extract
+entities and relations, stores them in ``entities`` and ``chunks.entity_ids`` / ``chunks.relation_pairs``,
+then recomputes ``entity_edges`` and the compact ``entity_adjacency`` table retrieval reads from them.
+Interrupting is safe: a rerun only extracts chunks whose ``entity_ids`` are still NULL. Run it again after
+ingesting new books; edges of re-ingested books' deleted chunks drop out at that rebuild.
+
+Needs the Postgres from docker-compose with ``db/init/002_entity_graph.sql`` applied, and ``ollama serve``.
+
+Examples::
+
+    cd backend
+    uv run python scripts/build_entity_graph.py
+    uv run python scripts/build_entity_graph.py --model qwen2.5:7b --batch-size 4 --concurrency 1 --limit 200
+    uv run python scripts/build_entity_graph.py --rebuild-only --max-degree 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from app.core.db import get_engine
+from app.core.entity_graph import (
+    GRAPH_EXTRACTION_MODEL,
+    GRAPH_HUB_FRACTION,
+    GRAPH_MAX_DEGREE,
+    GRAPH_MAX_POSTINGS,
+    build_entity_graph,
+    rebuild_adjacency,
+)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract entities from chunks and build the adjacency table.")
+    parser.add_argument("--model", default=GRAPH_EXTRACTION_MODEL)
+    parser.add_argument("--batch-size", type=int, default=8, help="chunks per extraction call")
+    parser.add_argument("--concurrency", type=int, default=2, help="extraction calls in flight")
+    parser.add_argument("--limit", type=int, default=None, help="extract at most this many chunks in this run")
+    parser.add_argument("--rebuild-only", action="store_true", help="skip extraction, only recompute adjacency")
+    parser.add_argument("--max-degree", type=int, default=GRAPH_MAX_DEGREE)
+    parser.add_argument("--max-postings", type=int, default=GRAPH_MAX_POSTINGS)
+    parser.add_argument("--hub-fraction", type=float, default=GRAPH_HUB_FRACTION)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    os.chdir(_BACKEND_ROOT)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    engine = get_engine()
+    adjacency_options = {
+        "max_degree": args.max_degree,
+        "max_postings": args.max_postings,
+        "hub_fraction": args.hub_fraction,
+    }
+    if args.rebuild_only:
+        stats = rebuild_adjacency(engine, **adjacency_options)
+    else:
+        stats = asyncio.run(
+            build_entity_graph(
+                engine,
+                model=args.model,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                limit=args.limit,
+                **adjacency_options,
+            )
+        )
+    print(json.dumps(stats, indent=2, default=str))
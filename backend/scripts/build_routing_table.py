@@ -0,0 +1,67 @@
+"""
+Build a data-driven routing table from golden-set eval results.
+
+Groups eval details by the router's query bucket (length x complexity keywords) and picks, per bucket,
+the primary/fallback model pair with the lowest expected latency including the chance of falling back.
+Golden categories are reported too. Default input is every JSON under ``docs/evaluations/rag/``, of
+which only single-attempt ``--mode full`` runs are used (RAW_QWEN, output-mode comparisons and untagged
+legacy files are skipped); output is ``docs/evaluations/routing_table.json``.
+
+The router loads the table at startup when ``ROUTING_TABLE_PATH`` points at it; buckets missing from
+the table keep the keyword/length heuristics.
+
+Examples::
+
+    cd backend
+    uv run python scripts/eval_rag_quality.py --mode full
+    uv run python scripts/build_routing_table.py
+    uv run python scripts/build_routing_table.py ../docs/evaluations/rag/eval_results_*.json --min-success 0.95
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from app.core.agent_factory import DEFAULT_OUTPUT_MODE, OutputMode
+from peporag_eval.routing_table import DEFAULT_MIN_SAMPLES, DEFAULT_MIN_SUCCESS, main
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Learn the model routing table from eval results.")
+    parser.add_argument("results", nargs="*", type=Path, help="eval result JSON files (default: docs/evaluations/rag)")
+    parser.add_argument("--output", type=Path, default=None, help="table path (default: docs/evaluations/)")
+    parser.add_argument(
+        "--min-success",
+        type=float,
+        default=DEFAULT_MIN_SUCCESS,
+        help=f"required success rate of primary + fallback (default {DEFAULT_MIN_SUCCESS})",
+    )
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=DEFAULT_MIN_SAMPLES,
+        help=f"attempts per model before a bucket overrides the heuristics (default {DEFAULT_MIN_SAMPLES})",
+    )
+    parser.add_argument("--output-mode", type=OutputMode, choices=list(OutputMode), default=DEFAULT_OUTPUT_MODE)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    results = [p.resolve() for p in args.results]
+    output = args.output.resolve() if args.output else None
+    os.chdir(_BACKEND_ROOT)
+    main(
+        result_files=results or None,
+        output=output,
+        min_success=args.min_success,
+        min_samples=args.min_samples,
+        output_mode=args.output_mode,
+    )
@@ -0,0 +1,45 @@
+"""
+Compare PROMPTED vs NATIVE (schema-constrained) agent output modes on the golden set.
+
+For each model and mode, runs the production ``RagResponse`` agent and records how many model
+requests each question needed (every request beyond the first is a validation retry), success
+rate and latency. Writes ``docs/evaluations/rag/output_modes_<timestamp>.json``.
+
+Prerequisites: Ollama running (or ``scripts/mock_ollama.py``), models pulled, ``OLLAMA_BASE_URL`` set.
+
+Examples::
+
+    cd backend
+    uv run python scripts/eval_output_modes.py
+    uv run python scripts/eval_output_modes.py --models ollama:granite3-dense:2b --modes native
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from app.core.agent_factory import OutputMode
+from peporag_eval.output_mode_eval import run_output_mode_eval
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Retry rate and latency per model: prompted vs native output.")
+    parser.add_argument("--models", nargs="+", default=None, help="PydanticAI model names (default: eval set)")
+    parser.add_argument("--modes", nargs="+", type=OutputMode, default=None, help="prompted and/or native")
+    args = parser.parse_args()
+    out = asyncio.run(run_output_mode_eval(models=args.models, modes=args.modes))
+    if out is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    os.chdir(_BACKEND_ROOT)
+    main()
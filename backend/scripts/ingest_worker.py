@@ -0,0 +1,73 @@
+"""
+Ingestion worker: drains the Postgres job queue filled by ``POST /ingest``.
+
+Each process claims one job at a time, chunks the book with the production chunker, embeds
+``INGEST_BATCH_SIZE`` chunks per Ollama call and commits them together with the job's progress, so a job
+whose worker dies is picked up by another after ``INGEST_STALE_SEC`` and resumes after its last committed
+chunk. ``INGEST_MAX_RUNNING_JOBS`` caps running jobs across all workers, so starting more processes than
+that only adds standbys. SIGINT/SIGTERM finish the current batch and hand the job back to the queue.
+
+Needs the Postgres from docker-compose with ``db/init/003_ingestion_jobs.sql`` applied, ``ollama serve``
+and the books under ``INGEST_LIBRARY_DIR``.
+
+Examples::
+
+    cd backend
+    uv run python scripts/ingest_worker.py
+    INGEST_MAX_RUNNING_JOBS=2 uv run python scripts/ingest_worker.py --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from app.core.ingestion import INGEST_POLL_SEC, run_worker
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run ingestion workers.")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--poll-sec", type=float, default=INGEST_POLL_SEC, help="idle wait between empty claims")
+    return parser.parse_args()
+
+
+async def _serve(poll_sec: float) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await run_worker(stop=stop, poll_sec=poll_sec)
+
+
+def _worker_main(poll_sec: float) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+    asyncio.run(_serve(poll_sec))
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    os.chdir(_BACKEND_ROOT)
+    if args.workers == 1:
+        _worker_main(args.poll_sec)
+    else:
+        processes = [
+            multiprocessing.Process(target=_worker_main, args=(args.poll_sec,), name=f"worker-{i}")
+            for i in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        # Forward SIGTERM (docker stop) so every worker hands its job back; Ctrl-C already reaches the group
+        signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in processes])
+        for p in processes:
+            p.join()
@@ -0,0 +1,43 @@
+"""
+Run a local mock of the Ollama HTTP API for load and performance tests on any CPU box.
+
+Implements ``/api/generate``, ``/api/chat``, ``/api/embed`` (plus ``/api/tags``, ``/api/ps`` and
+the OpenAI-compatible ``/v1/chat/completions`` used by PydanticAI), with streaming. Per-model
+profiles configure TTFT and tokens/sec distributions, prompt-eval speed, cold-load delays and
+injected malformed / trailing-text outputs; ``max_concurrency`` queues requests like
+``OLLAMA_NUM_PARALLEL``. See ``backend/tests/data/mock_ollama_profile.json`` for an example.
+
+Point the app or the ``peporag_eval`` tools at it instead of a real Ollama::
+
+    cd backend
+    uv run python scripts/mock_ollama.py --port 11435 --profile tests/data/mock_ollama_profile.json
+    OLLAMA_BASE_URL=http://localhost:11435/v1 uv run uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from peporag_eval.mock_ollama import main
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mock Ollama server with latency/throughput profiles.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--profile", type=Path, default=None, help="JSON MockOllamaConfig (default: built-in)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    profile = args.profile.resolve() if args.profile else None
+    os.chdir(_BACKEND_ROOT)
+    main(config_path=profile, host=args.host, port=args.port)
@@ -0,0 +1,44 @@
+"""
+Profile backend cold start: import times and time to liveness/readiness.
+
+Reports ``-X importtime`` totals for ``app.main`` and for the modules the warm-up imports after the
+port is bound (agent stack, retrieval), with their heaviest direct imports. Then launches uvicorn and
+measures time until ``/health`` and ``/ready`` return 200. Writes
+``docs/evaluations/benchmarks/startup_<timestamp>.json``.
+
+``/ready`` needs the DB (or a NumPy index) and Ollama with the routed models; use ``--skip-server`` for
+the import profile only.
+
+Examples::
+
+    cd backend
+    uv run python scripts/profile_startup.py
+    uv run python scripts/profile_startup.py --skip-server --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+_BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(_BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_ROOT))
+
+from peporag_eval.startup_profile import main
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backend import-time and startup-time profile.")
+    parser.add_argument("--repeat", type=int, default=3, help="import runs per module (median reported)")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="seconds to wait for /ready")
+    parser.add_argument("--skip-server", action="store_true", help="only profile imports")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    os.chdir(_BACKEND_ROOT)
+    main(repeat=args.repeat, ready_timeout_sec=args.ready_timeout, skip_server=args.skip_server)
@@ -0,0 +1,69 @@
+from app.core.chunker import chunk_text, iter_blocks
+
+
+def _lines(text: str) -> list[str]:
+    return text.splitlines()
+
+
+def test_oversized_fence_is_split_and_every_part_is_a_closed_fence():
+    code = [f"    value_{i} = compute(value_{i - 1}, factor={i})" for i in range(1, 60)]
+    blocks = list(iter_blocks(["```python", *code, "```"], max_tokens=64))
+
+    assert len(blocks) > 1
+    assert all(b.kind == "code" for b in blocks)
+    for block in blocks:
+        lines = block.text.splitlines()
+        assert lines[0] == "```python"
+        assert lines[-1] == "```"
+        assert block.tokens <= 64 + 16  # one line may overshoot; the fence lines are re-added
+    body = [line for b in blocks for line in b.text.splitlines()[1:-1]]
+    assert body == code
+
+
+def test_tilde_fence_is_reopened_with_its_own_marker():
+    code = [f"line {i} " + "x" * 40 for i in range(30)]
+    blocks = list(iter_blocks(["~~~~", *code, "~~~~"], max_tokens=64))
+    assert len(blocks) > 1
+    assert all(b.text.startswith("~~~~\n") and b.text.endswith("\n~~~~") for b in blocks)
+
+
+def test_oversized_table_repeats_its_header_in_each_part():
+    header = ["| option | default | meaning |", "|---|---|---|"]
+    rows = [f"| opt_{i} | {i} | what option {i} controls in some detail |" for i in range(40)]
+    blocks = list(iter_blocks([*header, *rows], max_tokens=64))
+
+    assert len(blocks) > 1
+    assert all(b.kind == "table" for b in blocks)
+    for block in blocks:
+        assert block.text.splitlines()[:2] == header
+    assert [row for b in blocks for row in b.text.splitlines()[2:]] == rows
+
+
+def test_table_and_heading_lines_inside_a_fence_are_code():
+    lines = ["```", "| not | a table |", "# not a heading", "```", "after"]
+    blocks = list(iter_blocks(lines, max_tokens=512))
+    assert [b.kind for b in blocks] == ["code", "paragraph"]
+    assert blocks[0].text == "\n".join(lines[:4])
+
+
+def test_unterminated_fence_at_eof_stays_code():
+    blocks = list(iter_blocks(["```sql", "SELECT 1;", "# comment"], max_tokens=512))
+    assert [b.kind for b in blocks] == ["code"]
+
+
+def test_split_fence_parts_are_not_duplicated_as_chunk_overlap():
+    code = [f"    step_{i}()" + " # " + "y" * 30 for i in range(80)]
+    text = ["# Section", "Intro sentence. " * 5, "```", *code, "```"]
+    chunks = list(chunk_text(text, max_tokens=96, overlap_tokens=32, min_tokens=16))
+
+    code_lines = [line for c in chunks for line in c.text.splitlines() if line.startswith("    step_")]
+    assert code_lines == code
+    assert all(c.text.count("```") % 2 == 0 for c in chunks)
+
+
+def test_fence_closes_only_on_a_run_of_its_own_character_at_least_as_long():
+    lines = ["````", "```", "~~~~", "````python", "still code", "`````", "after the fence"]
+    blocks = list(iter_blocks(lines))
+    assert [b.kind for b in blocks] == ["code", "paragraph"]
+    assert blocks[0].text.splitlines() == lines[:-1]
+    assert blocks[1].text == "after the fence"
@@ -0,0 +1,185 @@
+import asyncio
+
+import pytest
+
+from app.core import circuit_breaker, rag_service
+from app.core.circuit_breaker import BreakerState, CircuitBreaker, CircuitOpenError
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: _Clock, **kwargs) -> CircuitBreaker:
+    options = {"min_calls": 4, "error_rate": 0.5, "slow_call_sec": 10.0, "open_sec": 30.0, "half_open_probes": 1}
+    return CircuitBreaker("test-model", clock=clock, **{**options, **kwargs})
+
+
+def _trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record(breaker.allow(), False, 1.0)
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_errors_below_min_calls_do_not_trip():
+    breaker = _breaker(_Clock())
+    for _ in range(3):
+        breaker.record(breaker.allow(), False, 1.0)
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_error_rate_trips_and_open_breaker_rejects():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    breaker.record(breaker.allow(), True, 1.0)
+    breaker.record(breaker.allow(), True, 1.0)
+    breaker.record(breaker.allow(), False, 1.0)
+    assert breaker.state is BreakerState.CLOSED
+    breaker.record(breaker.allow(), False, 1.0)
+
+    assert breaker.state is BreakerState.OPEN
+    assert breaker.allow() is None
+    clock.now = 12.0
+    assert breaker.retry_after() == pytest.approx(18.0)
+
+
+def test_slow_successes_trip_the_breaker():
+    breaker = _breaker(_Clock(), slow_call_rate=0.75)
+    for _ in range(4):
+        breaker.record(breaker.allow(), True, 11.0)
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_old_calls_leave_the_window():
+    clock = _Clock()
+    breaker = _breaker(clock, window_sec=60.0)
+    for _ in range(3):
+        breaker.record(breaker.allow(), False, 1.0)
+    clock.now = 61.0
+    breaker.record(breaker.allow(), False, 1.0)
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_half_open_admits_only_the_probe_budget():
+    clock = _Clock()
+    breaker = _breaker(clock, half_open_probes=2)
+    _trip(breaker)
+    clock.now = 30.0
+
+    first, second = breaker.allow(), breaker.allow()
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert first.probe and second.probe
+    assert breaker.allow() is None
+
+
+def test_successful_probes_close_the_breaker():
+    clock = _Clock()
+    breaker = _breaker(clock, half_open_probes=2)
+    _trip(breaker)
+    clock.now = 30.0
+    probes = [breaker.allow(), breaker.allow()]
+
+    breaker.record(probes[0], True, 1.0)
+    assert breaker.state is BreakerState.HALF_OPEN
+    breaker.record(probes[1], True, 1.0)
+    assert breaker.state is BreakerState.CLOSED
+    assert not breaker.allow().probe
+
+
+def test_failed_or_slow_probe_reopens():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    _trip(breaker)
+    clock.now = 30.0
+    breaker.record(breaker.allow(), True, 11.0)
+    assert breaker.state is BreakerState.OPEN
+    assert breaker.retry_after() == pytest.approx(30.0)
+
+
+def test_released_probe_frees_its_slot_without_a_verdict():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    _trip(breaker)
+    clock.now = 30.0
+    probe = breaker.allow()
+    assert breaker.allow() is None
+
+    breaker.release(probe)
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert breaker.allow() is not None
+
+
+def test_call_admitted_while_closed_does_not_count_as_probe():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    in_flight = breaker.allow()
+    _trip(breaker)
+    clock.now = 30.0
+    probe = breaker.allow()
+
+    breaker.record(in_flight, False, 1.0)  # finishes late, while half-open
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert breaker.allow() is None  # the probe slot is still taken
+    breaker.record(probe, True, 1.0)
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_probe_from_an_earlier_half_open_period_is_ignored():
+    clock = _Clock()
+    breaker = _breaker(clock, half_open_probes=2)
+    _trip(breaker)
+    clock.now = 30.0
+    stale, failing = breaker.allow(), breaker.allow()
+    breaker.record(failing, False, 1.0)
+    clock.now = 60.0
+    current = breaker.allow()
+
+    breaker.record(stale, True, 1.0)
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert breaker.allow() is not None  # second slot of this period
+    assert breaker.allow() is None
+    breaker.record(current, True, 1.0)
+    assert breaker.state is BreakerState.HALF_OPEN  # needs both of this period's probes
+
+
+def test_failed_agent_setup_releases_the_probe_slot(monkeypatch):
+    clock = _Clock()
+    breakers = {m: _breaker(clock) for m in ("primary", "fallback")}
+    monkeypatch.setattr(circuit_breaker, "BREAKER_ENABLED", True)
+    monkeypatch.setattr(circuit_breaker, "_breakers", breakers)
+    monkeypatch.setattr(rag_service, "get_model_for_query", lambda query: "primary")
+    monkeypatch.setattr(rag_service, "get_fallback_model", lambda query, primary: "fallback")
+
+    def broken_agent(**kwargs):
+        raise RuntimeError("cannot build agent")
+
+    monkeypatch.setattr(rag_service, "get_rag_agent", broken_agent)
+    for breaker in breakers.values():
+        _trip(breaker)
+    clock.now = 30.0
+
+    with pytest.raises(RuntimeError, match="cannot build agent"):
+        asyncio.run(rag_service.run_agent_with_fallback("question", "context"))
+    for breaker in breakers.values():
+        assert breaker.state is BreakerState.HALF_OPEN
+        assert breaker.allow() is not None
+
+
+def test_both_breakers_open_fails_fast(monkeypatch):
+    clock = _Clock()
+    breakers = {m: _breaker(clock) for m in ("primary", "fallback")}
+    monkeypatch.setattr(circuit_breaker, "BREAKER_ENABLED", True)
+    monkeypatch.setattr(circuit_breaker, "_breakers", breakers)
+    monkeypatch.setattr(rag_service, "get_model_for_query", lambda query: "primary")
+    monkeypatch.setattr(rag_service, "get_fallback_model", lambda query, primary: "fallback")
+    for breaker in breakers.values():
+        _trip(breaker)
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        asyncio.run(rag_service.run_agent_with_fallback("question", "context"))
+    assert exc_info.value.models == ["primary", "fallback"]
+    assert exc_info.value.retry_after_sec == pytest.approx(30.0)
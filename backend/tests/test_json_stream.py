@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from app.core.json_stream import JsonObjectTracker, JsonStringFieldStream
+
+
+def _splits(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def _stream_field(text: str, field: str, size: int) -> tuple[str, bool]:
+    stream = JsonStringFieldStream(field)
+    decoded = "".join(stream.feed(chunk) for chunk in _splits(text, size))
+    return decoded, stream.done
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7])
+def test_escapes_and_surrogate_pairs_decode_across_any_chunk_split(size):
+    answer = 'Line 1\nTab\there "quoted" back\\slash / é 😀   end'
+    text = json.dumps({"confidence_score": 0.5, "answer": answer})
+    assert "\\ud83d\\ude00" in text  # ensure_ascii writes the emoji as a surrogate pair
+    assert _stream_field(text, "answer", size) == (answer, True)
+
+
+@pytest.mark.parametrize("size", [1, 4])
+def test_unpaired_surrogates_become_replacement_characters(size):
+    text = '{"answer": "a\\ud83d b \\ud83d\\n c \\ude00 d \\ud83d\\u0041 e \\ud83d\\ud83d\\ude00"}'
+    assert _stream_field(text, "answer", size) == ("a\ufffd b \ufffd\n c \ufffd d \ufffdA e \ufffd\U0001f600", True)
+
+
+@pytest.mark.parametrize("size", [1, 3, 100])
+def test_braces_and_quotes_inside_strings_do_not_confuse_the_field_stream(size):
+    payload = {
+        "note": 'a "}" and {"answer": "decoy"}',
+        "nested": {"answer": "deeper decoy", "list": ["}", "{"]},
+        "answer": 'call f({"k": "v"}) then }',
+    }
+    text = "Sure, here it is: " + json.dumps(payload)
+    assert _stream_field(text, "answer", size) == (payload["answer"], True)
+
+
+def test_only_the_first_occurrence_of_the_field_is_followed():
+    assert _stream_field('{"answer": "first", "answer": "second"}', "answer", 1) == ("first", True)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"confidence_score": 0.2, "key_terms": ["answer"]}',
+        '{"answer": null, "key_terms": []}',
+        '{"answer": 42}',
+        '{"answer": ["not", "a", "string"]}',
+        '{"answer": {"text": "nested"}}',
+    ],
+)
+def test_missing_or_non_string_field_yields_nothing_and_ends_with_the_object(text):
+    assert _stream_field(text + ' trailing "answer": "x"', "answer", 2) == ("", True)
+
+
+def test_incomplete_stream_is_not_done():
+    assert _stream_field('{"answer": "partial \\u00', "answer", 3) == ("partial ", False)
+
+
+@pytest.mark.parametrize("size", [1, 2, 6, 1000])
+def test_tracker_finds_object_bounds_across_chunks(size):
+    obj = json.dumps({"answer": 'braces { } and "quotes" \\ inside', "n": {"m": [1, {"x": "}"}]}})
+    text = "prose with a stray } first " + obj + " {after}"
+    tracker = JsonObjectTracker()
+    consumed = 0
+    offset = None
+    for chunk in _splits(text, size):
+        result = tracker.feed(chunk)
+        if result is not None:
+            assert offset is None  # reported once
+            offset = consumed + result
+        consumed += len(chunk)
+    assert tracker.complete
+    assert text[tracker.start : tracker.end] == obj
+    assert offset == tracker.end
+
+
+def test_tracker_is_incomplete_while_a_string_hides_the_closing_brace():
+    tracker = JsonObjectTracker()
+    assert tracker.feed('{"answer": "ends with \\"}') is None
+    assert not tracker.complete
+    assert tracker.feed('"}') == 2
+    assert tracker.complete
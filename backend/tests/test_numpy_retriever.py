@@ -0,0 +1,39 @@
+import numpy as np
+
+from app.core.numpy_retriever import NumpyRetriever, write_numpy_index
+
+
+def _chunks(generation: int, n: int) -> list[dict]:
+    return [
+        {"chunk_id": generation * 100 + i, "book_id": 1, "seq": i, "content": f"chunk {i}", "metadata": {}}
+        for i in range(n)
+    ]
+
+
+def test_search_returns_the_most_similar_rows(tmp_path):
+    embeddings = np.eye(4, dtype=np.float32)
+    write_numpy_index(tmp_path, embeddings, _chunks(1, 4), "1")
+    results = NumpyRetriever(tmp_path, block_rows=3).search([0.1, 0.0, 1.0, 0.0], 2)
+    assert [r.chunk_id for r in results] == [102, 100]
+    assert results[0].score > results[1].score
+
+
+def test_reexport_at_the_same_version_writes_new_files(tmp_path):
+    embeddings = np.eye(3, dtype=np.float32)
+    write_numpy_index(tmp_path, embeddings, _chunks(1, 3), "1")
+    first = {p.name for p in tmp_path.iterdir()}
+    write_numpy_index(tmp_path, embeddings, _chunks(2, 3), "1")
+    second = {p.name for p in tmp_path.iterdir()}
+    assert first - {"manifest.json"} <= second  # previous files kept, not overwritten
+    assert len(second) == len(first) + 2
+
+
+def test_retriever_two_exports_behind_reloads_instead_of_failing(tmp_path):
+    embeddings = np.eye(3, dtype=np.float32)
+    write_numpy_index(tmp_path, embeddings, _chunks(1, 3), "1")
+    retriever = NumpyRetriever(tmp_path)
+    write_numpy_index(tmp_path, embeddings, _chunks(2, 3), "2")
+    write_numpy_index(tmp_path, embeddings, _chunks(3, 3), "3")  # removes the files of version 1
+
+    assert retriever.search([0.0, 1.0, 0.0], 1)[0].chunk_id == 301
+    assert retriever.library_version() == "3"
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from app.core.output_repair import NO_ANSWER_PLACEHOLDER, extract_json_object, repair_rag_output
+
+VALID = {"answer": "Use an HNSW index.", "confidence_score": 0.8, "key_terms": ["HNSW"], "sources_used": True}
+
+
+def test_valid_object_passes_strict_validation():
+    response, outcome = repair_rag_output(json.dumps(VALID))
+    assert outcome == "valid"
+    assert response.answer == "Use an HNSW index."
+    assert response.key_terms == ["HNSW"]
+
+
+def test_object_is_found_inside_fences_and_prose():
+    text = f"Here is the answer:\n```json\n{json.dumps(VALID)}\n```\nHope that helps {{!}}"
+    response, outcome = repair_rag_output(text)
+    assert outcome == "valid"
+    assert response.answer == VALID["answer"]
+
+
+def test_braces_inside_strings_do_not_end_the_object():
+    payload = {**VALID, "answer": 'Call f({"k": 1}) then close }'}
+    assert extract_json_object("prefix " + json.dumps(payload) + " suffix") == json.dumps(payload)
+
+
+def test_alternative_shape_is_repaired_from_payload():
+    response, outcome = repair_rag_output(json.dumps({"output": "Vacuum the table.", "confidence": 2}))
+    assert outcome == "repaired_payload"
+    assert response.answer == "Vacuum the table."
+    assert response.confidence_score == 1.0
+
+
+def test_missing_required_fields_are_filled_by_normalization():
+    response, outcome = repair_rag_output(json.dumps({"answer": "Yes.", "key_terms": "not a list"}))
+    assert outcome == "repaired_payload"
+    assert response.key_terms == []
+    assert 0.0 <= response.confidence_score <= 1.0
+
+
+def test_plain_prose_becomes_the_answer():
+    response, outcome = repair_rag_output("The planner picks a bitmap scan here.")
+    assert outcome == "repaired_text"
+    assert "bitmap scan" in response.answer
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"answer": "cut off mid-',  # object never closes
+        '{"answer": "x", "confidence_score": 0.5,}',  # closes but is not JSON
+        "[1, 2, 3] {}",  # the object found has no answer at all
+        json.dumps({"confidence_score": 0.4}),
+        "   ",
+    ],
+)
+def test_unrepairable_output_asks_for_regeneration(text):
+    response, outcome = repair_rag_output(text)
+    assert response is None
+    assert outcome == "unrepairable"
+
+
+def test_placeholder_answer_is_never_returned():
+    response, _ = repair_rag_output(json.dumps({"output": {"unrelated": 1}}))
+    assert response is None or response.answer != NO_ANSWER_PLACEHOLDER
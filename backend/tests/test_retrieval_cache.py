@@ -0,0 +1,134 @@
+import asyncio
+
+from app.core.retrieval import RetrievalService
+from app.core.retrieval_cache import RetrievalCache, normalize_query
+from app.schemas.retrieval import RetrievedChunk
+
+
+def _chunks(n: int, content: str = "x") -> list[RetrievedChunk]:
+    return [RetrievedChunk(chunk_id=i, book_id=1, seq=i, content=content, score=1.0) for i in range(n)]
+
+
+def test_normalize_query_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_query("  What is  MVCC? ") == normalize_query("what is mvcc")
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = RetrievalCache(max_entries=2, similarity_threshold=None)
+    cache.put("1", "a", None, _chunks(1))
+    cache.put("1", "b", None, _chunks(1))
+    assert cache.get_exact("1", "a") is not None  # refreshes a
+    cache.put("1", "c", None, _chunks(1))
+    assert cache.get_exact("1", "b") is None
+    assert cache.get_exact("1", "a") is not None
+    assert cache.get_exact("1", "c") is not None
+
+
+def test_byte_budget_evicts_and_oversized_results_are_not_stored():
+    cache = RetrievalCache(max_entries=100, max_bytes=3000, similarity_threshold=None)
+    cache.put("1", "a", None, _chunks(1, "a" * 1000))
+    cache.put("1", "b", None, _chunks(1, "b" * 1000))
+    cache.put("1", "c", None, _chunks(1, "c" * 1000))
+    assert cache.get_exact("1", "a") is None
+    assert cache.stats()["bytes"] <= 3000
+
+    cache.put("1", "huge", None, _chunks(1, "h" * 5000))
+    assert cache.get_exact("1", "huge") is None
+    assert cache.get_exact("1", "c") is not None
+
+
+def test_new_library_version_drops_every_entry():
+    cache = RetrievalCache(similarity_threshold=None)
+    cache.put("1", "a", None, _chunks(1))
+    assert cache.get_exact("2", "a") is None
+    assert cache.get_exact("1", "a") is None  # version 1 is now stale
+    assert cache.stats()["entries"] == 0
+
+
+def test_older_version_neither_clears_nor_fills_the_cache():
+    cache = RetrievalCache()
+    cache.put("5", "a", [1.0, 0.0], _chunks(2))
+    assert cache.get_exact("4", "a") is None
+    assert cache.get_nearest("4", [1.0, 0.0]) is None
+    cache.put("4", "b", [0.0, 1.0], _chunks(2))
+    assert cache.get_exact("5", "a") is not None
+    assert cache.get_exact("5", "b") is None
+
+
+def test_nearest_neighbour_hit_needs_similarity_and_enough_results():
+    cache = RetrievalCache(similarity_threshold=0.95)
+    cache.put("1", "a", [1.0, 0.0, 0.0], _chunks(3))
+    assert cache.get_nearest("1", [0.99, 0.05, 0.0]) is not None
+    assert cache.get_nearest("1", [0.0, 1.0, 0.0]) is None
+    assert cache.get_nearest("1", [1.0, 0.0, 0.0], min_results=4) is None
+    assert cache.get_nearest("1", [1.0, 0.0]) is None  # other embedding dimension
+
+
+class _FakeRetriever:
+    def __init__(self) -> None:
+        self.searches = 0
+
+    def library_version(self) -> str:
+        return "1"
+
+    def search(self, query_embedding, k):
+        self.searches += 1
+        return _chunks(k)
+
+
+async def _embed(texts: list[str]) -> list[list[float]]:
+    return [[1.0, 0.0] for _ in texts]
+
+
+def test_semantic_hit_is_stored_at_the_requested_k():
+    retriever = _FakeRetriever()
+    service = RetrievalService(retriever, cache=RetrievalCache(similarity_threshold=0.9), embed=_embed)
+
+    async def run() -> tuple[list[RetrievedChunk], list[RetrievedChunk]]:
+        await service.retrieve("how does vacuum work", k=8)
+        paraphrase = await service.retrieve("explain vacuum", k=3)
+        again = await service.retrieve("explain vacuum", k=3)  # exact hit on what the paraphrase stored
+        return paraphrase, again
+
+    paraphrase, again = asyncio.run(run())
+    assert retriever.searches == 1
+    assert len(paraphrase) == 3
+    assert len(again) == 3
+
+
+def _graph_chunks(n: int) -> list[RetrievedChunk]:
+    return [
+        RetrievedChunk(chunk_id=100 + i, book_id=1, seq=100 + i, content="g", score=0.5, metadata={"via": "graph"})
+        for i in range(n)
+    ]
+
+
+def test_graph_neighbours_do_not_count_towards_min_results():
+    cache = RetrievalCache(similarity_threshold=0.95)
+    cache.put("1", "a", [1.0, 0.0], _chunks(2) + _graph_chunks(3))
+    assert cache.get_nearest("1", [1.0, 0.0], min_results=2) is not None
+    assert cache.get_nearest("1", [1.0, 0.0], min_results=3) is None
+
+
+class _FakeGraph:
+    async def neighbours(self, query, embedding, results):
+        return _graph_chunks(2)
+
+
+def test_semantic_hit_drops_graph_neighbours_when_the_query_would_not_expand(monkeypatch):
+    from app.core import retrieval
+
+    service = RetrievalService(
+        _FakeRetriever(), cache=RetrievalCache(similarity_threshold=0.9), graph=_FakeGraph(), embed=_embed
+    )
+    monkeypatch.setattr(retrieval, "should_expand", lambda query: query.startswith("compare"))
+
+    async def run() -> tuple[list[RetrievedChunk], list[RetrievedChunk]]:
+        expanded = await service.retrieve("compare vacuum and autovacuum", k=3)
+        plain = await service.retrieve("what is vacuum", k=3)
+        return expanded, plain
+
+    expanded, plain = asyncio.run(run())
+    assert sum(c.metadata.get("via") == "graph" for c in expanded) == 2
+    assert len(plain) == 3
+    assert all(c.metadata.get("via") != "graph" for c in plain)
@@ -0,0 +1,107 @@
+import time
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, SystemPromptPart, TextPart, UserPromptPart
+
+from app.core import sessions as sessions_module
+from app.core.rag_service import _session_turn, build_rag_prompt
+from app.core.sessions import CONTEXT_SEPARATOR, Session, SessionStore, turn_request
+
+CONTEXT = CONTEXT_SEPARATOR.join(["passage one", "passage two"])
+
+
+def _request(prompt: str) -> ModelRequest:
+    return ModelRequest(parts=[SystemPromptPart("You are PepoRAG."), UserPromptPart(prompt)])
+
+
+def _session_with_turn(session_id: str = "s", context: str = CONTEXT, output: str = '{"answer": "a"}') -> Session:
+    session = Session(session_id)
+    session.record_turn("ollama:qwen2.5:3b", context, _request(build_rag_prompt("q", context)), output)
+    return session
+
+
+def test_new_context_keeps_only_passages_not_sent_yet():
+    session = _session_with_turn()
+    follow_up = CONTEXT_SEPARATOR.join(["passage two", "passage three", "passage one"])
+    assert session.new_context(follow_up) == "passage three"
+    assert session.new_context(CONTEXT) == ""
+
+
+def test_first_turn_has_no_history_and_the_full_context():
+    history, prompt = _session_turn(None, "what is mvcc?", CONTEXT)
+    assert history is None
+    assert prompt == build_rag_prompt("what is mvcc?", CONTEXT)
+
+    history, prompt = _session_turn(Session("empty"), "what is mvcc?", CONTEXT)
+    assert history is None
+    assert prompt == build_rag_prompt("what is mvcc?", CONTEXT)
+
+
+def test_follow_up_reuses_the_history_unchanged_and_sends_only_new_passages():
+    session = _session_with_turn()
+    before = list(session.messages)
+
+    history, prompt = _session_turn(session, "and vacuum?", CONTEXT + CONTEXT_SEPARATOR + "passage three")
+    assert history is session.messages
+    assert history == before
+    assert "passage three" in prompt
+    assert "passage one" not in prompt
+
+    _, prompt = _session_turn(session, "again?", CONTEXT)
+    assert "No new passages" in prompt
+
+
+def test_follow_up_over_the_budget_starts_the_session_over(monkeypatch):
+    session = _session_with_turn()
+    monkeypatch.setattr(sessions_module, "SESSION_MAX_PROMPT_TOKENS", session.tokens + 5)
+
+    history, prompt = _session_turn(session, "a much longer follow-up question " * 4, CONTEXT)
+    assert history is None
+    assert "passage one" in prompt
+    assert session.messages == []
+    assert session.model_name == "ollama:qwen2.5:3b"  # a restart stays on the same model
+
+
+def test_default_budget_leaves_room_for_the_answer_in_num_ctx():
+    assert sessions_module.SESSION_MAX_PROMPT_TOKENS <= (
+        sessions_module.OLLAMA_NUM_CTX - sessions_module.SESSION_ANSWER_RESERVE_TOKENS
+    )
+
+
+def test_record_turn_tracks_history_size():
+    session = _session_with_turn(output="x" * 400)
+    assert session.turns == 1
+    assert session.chars >= 400
+    assert session.tokens >= 100
+    assert isinstance(session.messages[-1], ModelResponse)
+
+
+def test_turn_request_is_the_first_request_with_a_user_prompt():
+    first = _request("prompt")
+    retry = ModelRequest(parts=[UserPromptPart("Respond again with only the JSON object.")])
+    assert turn_request([first, ModelResponse(parts=[TextPart("bad")]), retry]) is first
+
+
+def test_store_evicts_least_recently_used_beyond_max_count():
+    store = SessionStore(max_count=2, max_chars=10**6, ttl_sec=60)
+    store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert set(store._sessions) == {"a", "c"}
+
+
+def test_store_evicts_oldest_sessions_beyond_the_memory_bound():
+    store = SessionStore(max_count=10, max_chars=1000, ttl_sec=60)
+    for session_id in ("a", "b", "c"):
+        session = store.get(session_id)
+        session.record_turn("m", "ctx", _request("p"), "y" * 400)
+        store.update()
+    assert list(store._sessions) == ["b", "c"]
+
+
+def test_store_expires_idle_sessions():
+    store = SessionStore(max_count=10, max_chars=10**6, ttl_sec=60)
+    store.get("old").last_used = time.monotonic() - 61
+    store.get("fresh")
+    assert list(store._sessions) == ["fresh"]
+    assert store.get("old").messages == []  # a new, empty session
@@ -1,16 +1,112 @@
-import streamlit as st
-import httpx
+import json
 import os
+import time
+import uuid
 
-st.title("Tech RAG Assistant")
+import httpx
+import streamlit as st
 
 backend_url = os.getenv("BACKEND_URL", "http://backend:8000")
 
+# Answers stream for as long as the model generates, so only the read timeout is generous
+TIMEOUT = httpx.Timeout(connect=5.0, read=float(os.getenv("BACKEND_READ_TIMEOUT", "120")), write=10.0, pool=5.0)
+# Shared by every browser session; a streaming answer holds its connection until the model finishes
+LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=8, keepalive_expiry=60)
+
+
+@st.cache_resource
+def get_client() -> httpx.Client:
+    """
+    Pooled HTTP client shared by all browser sessions of this process.
+
+    Streamlit reruns the script on every interaction; a cached client lets requests reuse keep-alive
+    connections instead of reconnecting each time. ``httpx.Client`` is thread-safe, so the sessions'
+    script threads share one pool and nothing per session is left open when a tab goes away.
+    """
+    return httpx.Client(base_url=backend_url, timeout=TIMEOUT, limits=LIMITS)
+
+
+def stream_answer(client: httpx.Client, question: str, session_id: str, answer_box, status_box) -> dict | None:
+    """
+    Consume ``/ask/stream`` (NDJSON events) and render the answer as it grows.
+
+    Questions sent with the same ``session_id`` are follow-ups: the backend reuses the model's cached
+    prompt from earlier turns instead of re-evaluating it.
+
+    Returns:
+        dict | None: The ``final`` event (validated RagResponse + timings), or None on error.
+    """
+    started = time.perf_counter()
+    ttft = None
+    answer = ""
+    final = None
+
+    with client.stream("POST", "/ask/stream", json={"question": question, "session_id": session_id}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "answer_delta":
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    status_box.caption(f"First token after {ttft:.2f}s")
+                answer += event["text"]
+                answer_box.markdown(answer + "▌")
+            elif event["type"] == "fallback":
+                # The alternate model answers from scratch
+                answer = ""
+                answer_box.markdown("▌")
+                status_box.caption(f"Retrying with {event['model']}...")
+            elif event["type"] == "final":
+                final = event
+            elif event["type"] == "error":
+                answer_box.empty()
+                status_box.error(event["detail"])
+
+    total = time.perf_counter() - started
+    if final is None:
+        return None
+    answer_box.markdown(final["response"]["answer"])
+    ttft_text = f"{ttft:.2f}s" if ttft is not None else "n/a"
+    status_box.caption(f"{final['model']} · time to first token {ttft_text} · total {total:.2f}s")
+    return final
+
+
+st.title("Tech RAG Assistant")
+
 st.write(f"Connecting to backend at: {backend_url}")
 
+client = get_client()
+
+# Follow-up questions share one backend session until the user starts over
+if st.button("New conversation") or "conversation_id" not in st.session_state:
+    st.session_state.conversation_id = uuid.uuid4().hex
+
 if st.button("Check Health"):
     try:
-        response = httpx.get(f"{backend_url}/health")
+        response = client.get("/health")
         st.write(response.json())
     except Exception as e:
         st.error(f"Error connecting to backend: {e}")
+
+question = st.text_input("Ask a question about your library")
+
+if st.button("Ask", disabled=not question.strip()):
+    answer_box = st.empty()
+    status_box = st.empty()
+    session_id = st.session_state.conversation_id
+    try:
+        final = stream_answer(client, question, session_id, answer_box, status_box)
+    except Exception as e:
+        final = None
+        st.error(f"Error querying backend: {e}")
+
+    if final is not None:
+        rag = final["response"]
+        st.progress(rag["confidence_score"], text=f"Confidence: {rag['confidence_score']:.0%}")
+        if rag["key_terms"]:
+            st.write("**Key terms:** " + ", ".join(rag["key_terms"]))
+        if rag.get("reasoning"):
+            with st.expander("Reasoning"):
+                st.write(rag["reasoning"])